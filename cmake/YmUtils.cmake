@@ -45,6 +45,18 @@ macro ( ym_init )
     endif ()
   endforeach ()
 
+  # ===================================================================
+  # C++ の規格
+  # ===================================================================
+
+  # pym のヘッダと mk_py_capi が生成するコードは C++20 の機能
+  # (std::span, std::remove_cvref_t, [[unlikely]] など)を用いる．
+  if ( NOT DEFINED CMAKE_CXX_STANDARD OR CMAKE_CXX_STANDARD LESS 20 )
+    set ( CMAKE_CXX_STANDARD 20 )
+  endif ()
+  set ( CMAKE_CXX_STANDARD_REQUIRED ON )
+
+
   # ===================================================================
   # システムの検査
   # ===================================================================
@@ -569,6 +581,34 @@ function ( ym_add_object_library )
 
 endfunction ()
 
+# mk_py_capi の unity ビルド用のターゲットライブラリの設定
+#
+# ModuleGen.make_all( unity_batch = N ) で生成された
+# <module>_module.cc と <module>_unity_N.cc を指定する．
+# 個々の拡張クラスの .cc ファイルは指定しないこと．
+#
+# USAGE: ym_add_unity_object_library ( <target-name>
+#                         <pch-header>
+#                         <source-file> [<source-file>]
+#                       )
+function ( ym_add_unity_object_library )
+  list ( GET ARGV 0 _name )
+  list ( GET ARGV 1 _pch )
+  list ( SUBLIST ARGV 2 -1 _sources )
+
+  ym_add_object_library ( ${_name}
+    ${_sources}
+    )
+
+  # 3つのモードのターゲットにプリコンパイル済みヘッダを設定する．
+  foreach ( _target "${_name}_obj" "${_name}_obj_p" "${_name}_obj_d" )
+    target_precompile_headers ( ${_target}
+      PRIVATE ${_pch}
+      )
+  endforeach ()
+
+endfunction ()
+
 # gtest 用のターゲットの生成
 # USAGE: ym_add_gtest ( <target-name>
 #                       <source-file> [<source-file>]
@@ -0,0 +1,173 @@
+#ifndef PYBYTEARRAYBUF_H
+#define PYBYTEARRAYBUF_H
+
+/// @file PyByteArrayBuf.h
+/// @brief PyByteArrayBuf のヘッダファイル
+/// @author Yusuke Matsunaga (松永 裕介)
+///
+/// Copyright (C) 2025 Yusuke Matsunaga
+/// All rights reserved.
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include "ym_config.h"
+#include <cstring>
+#include <new>
+#include <string>
+
+
+BEGIN_NAMESPACE_YM
+
+//////////////////////////////////////////////////////////////////////
+/// @class PyByteArrayBuf PyByteArrayBuf.h "PyByteArrayBuf.h"
+/// @brief Python の bytearray に直接書き込むバッファ
+///
+/// mk_py_capi の PyObjGen.add_pickle() で serialize 関数に渡される．
+/// std::string と同様に末尾に追加していくと bytearray の領域に
+/// 直接書き込まれるので，最後に release() で取り出す時に
+/// 内容の複製は起こらない．
+/// 領域の確保に失敗した場合には Python の例外をセットして
+/// std::bad_alloc を送出する．
+///
+/// 内部で Python のオブジェクトを扱うので GIL を持った状態で用いること．
+//////////////////////////////////////////////////////////////////////
+class PyByteArrayBuf
+{
+public:
+
+  /// @brief コンストラクタ
+  PyByteArrayBuf(
+    SizeType capacity = 256 ///< [in] 初期容量
+  )
+  {
+    mObj = PyByteArray_FromStringAndSize(nullptr, capacity);
+    if ( mObj == nullptr ) {
+      throw std::bad_alloc{};
+    }
+    mCapacity = capacity;
+  }
+
+  /// @brief デストラクタ
+  ~PyByteArrayBuf()
+  {
+    Py_XDECREF(mObj);
+  }
+
+  PyByteArrayBuf(const PyByteArrayBuf&) = delete;
+  PyByteArrayBuf& operator=(const PyByteArrayBuf&) = delete;
+
+
+public:
+  //////////////////////////////////////////////////////////////////////
+  // 外部インターフェイス
+  //////////////////////////////////////////////////////////////////////
+
+  /// @brief 書き込んだバイト数を返す．
+  SizeType
+  size() const
+  {
+    return mSize;
+  }
+
+  /// @brief 先頭のアドレスを返す．
+  char*
+  data()
+  {
+    return PyByteArray_AS_STRING(mObj);
+  }
+
+  /// @brief 1バイト追加する．
+  void
+  push_back(
+    char c ///< [in] 追加する値
+  )
+  {
+    *grow(1) = c;
+  }
+
+  /// @brief 領域の内容を追加する．
+  void
+  append(
+    const char* src, ///< [in] 追加する領域の先頭
+    SizeType n       ///< [in] バイト数
+  )
+  {
+    auto dst = grow(n);
+    if ( n > 0 ) {
+      std::memcpy(dst, src, n);
+    }
+  }
+
+  /// @brief 文字列の内容を追加する．
+  void
+  append(
+    const std::string& src ///< [in] 追加する文字列
+  )
+  {
+    append(src.data(), src.size());
+  }
+
+  /// @brief 末尾に n バイトの領域を確保してその先頭を返す．
+  ///
+  /// 返された領域には呼び出し側が n バイト書き込むこと．
+  char*
+  grow(
+    SizeType n ///< [in] バイト数
+  )
+  {
+    auto new_size = mSize + n;
+    if ( new_size > mCapacity ) {
+      auto new_capacity = mCapacity * 2;
+      if ( new_capacity < new_size ) {
+	new_capacity = new_size;
+      }
+      if ( PyByteArray_Resize(mObj, new_capacity) == -1 ) {
+	throw std::bad_alloc{};
+      }
+      mCapacity = new_capacity;
+    }
+    auto dst = PyByteArray_AS_STRING(mObj) + mSize;
+    mSize = new_size;
+    return dst;
+  }
+
+  /// @brief 書き込んだ内容を持つ bytearray を取り出す．
+  /// @return 新しい参照を返す．失敗した時は nullptr を返す．
+  ///
+  /// 以降このオブジェクトは空になる．
+  PyObject*
+  release()
+  {
+    if ( mSize != mCapacity ) {
+      if ( PyByteArray_Resize(mObj, mSize) == -1 ) {
+	return nullptr;
+      }
+    }
+    auto obj = mObj;
+    mObj = nullptr;
+    mSize = 0;
+    mCapacity = 0;
+    return obj;
+  }
+
+
+private:
+  //////////////////////////////////////////////////////////////////////
+  // データメンバ
+  //////////////////////////////////////////////////////////////////////
+
+  // 本体の bytearray
+  PyObject* mObj{nullptr};
+
+  // 書き込んだバイト数
+  SizeType mSize{0};
+
+  // 確保したバイト数
+  SizeType mCapacity{0};
+
+};
+
+END_NAMESPACE_YM
+
+#endif // PYBYTEARRAYBUF_H
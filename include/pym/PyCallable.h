@@ -0,0 +1,231 @@
+#ifndef PYCALLABLE_H
+#define PYCALLABLE_H
+
+/// @file PyCallable.h
+/// @brief PyCallable のヘッダファイル
+/// @author Yusuke Matsunaga (松永 裕介)
+///
+/// Copyright (C) 2025 Yusuke Matsunaga
+/// All rights reserved.
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include "ym_config.h"
+#include <stdexcept>
+#include <type_traits>
+
+
+BEGIN_NAMESPACE_YM
+
+//////////////////////////////////////////////////////////////////////
+/// @class PyCallableError PyCallable.h "PyCallable.h"
+/// @brief PyCallable の呼び出しで Python の例外が起きたことを表す例外
+///
+/// この例外が送出された時には Python の例外はセットされたままになっている．
+/// 受け取った側はそのままエラー値を返せばよい．
+//////////////////////////////////////////////////////////////////////
+class PyCallableError :
+  public std::runtime_error
+{
+public:
+
+  /// @brief コンストラクタ
+  PyCallableError(
+  ) : std::runtime_error{"Python exception in callback"}
+  {
+  }
+
+};
+
+
+//////////////////////////////////////////////////////////////////////
+/// @brief PyCallable の返り値の型を求めるクラス
+//////////////////////////////////////////////////////////////////////
+template<class PyR>
+struct PyCallableRet
+{
+  using type = typename PyR::ElemType;
+};
+
+template<>
+struct PyCallableRet<void>
+{
+  using type = void;
+};
+
+
+//////////////////////////////////////////////////////////////////////
+/// @class PyCallable PyCallable.h "PyCallable.h"
+/// @brief 呼び出し可能な Python オブジェクトを C++ の関数オブジェクトとして
+///        用いるためのクラス
+///
+/// mk_py_capi の CallableArg で用いられる．
+/// - PyR は返り値の変換を行うクラス(PyBool など)．
+///   返り値を用いない場合は void とする．
+/// - PyArgs は引数の変換を行うクラス(PyInt など)．
+///
+/// 引数は PyArgs::ToPyObject() で変換され，スタック上の配列を用いて
+/// PyObject_Vectorcall() で呼び出される．
+/// 束縛メソッドは構築時に関数と self に分解しておく．
+/// Python の例外が起きた場合には PyCallableError を送出する．
+///
+/// 内部で Python のオブジェクトを扱うので，構築，複製，破壊，呼び出しは
+/// いずれも GIL を持った状態で行わなければならない．
+//////////////////////////////////////////////////////////////////////
+template<class PyR, class... PyArgs>
+class PyCallable
+{
+public:
+
+  /// @brief 返り値の型
+  using RetType = typename PyCallableRet<PyR>::type;
+
+
+public:
+
+  /// @brief コンストラクタ
+  ///
+  /// obj が nullptr の場合は空となる．
+  explicit
+  PyCallable(
+    PyObject* obj = nullptr ///< [in] 呼び出し可能なオブジェクト
+  )
+  {
+    if ( obj != nullptr && PyMethod_Check(obj) ) {
+      mFunc = PyMethod_GET_FUNCTION(obj);
+      mSelf = PyMethod_GET_SELF(obj);
+    }
+    else {
+      mFunc = obj;
+    }
+    Py_XINCREF(mFunc);
+    Py_XINCREF(mSelf);
+  }
+
+  /// @brief コピーコンストラクタ
+  PyCallable(
+    const PyCallable& src ///< [in] コピー元のオブジェクト
+  ) : mFunc{src.mFunc},
+      mSelf{src.mSelf}
+  {
+    Py_XINCREF(mFunc);
+    Py_XINCREF(mSelf);
+  }
+
+  /// @brief 代入演算子
+  PyCallable&
+  operator=(
+    const PyCallable& src ///< [in] コピー元のオブジェクト
+  )
+  {
+    if ( this != &src ) {
+      Py_XINCREF(src.mFunc);
+      Py_XINCREF(src.mSelf);
+      Py_XDECREF(mFunc);
+      Py_XDECREF(mSelf);
+      mFunc = src.mFunc;
+      mSelf = src.mSelf;
+    }
+    return *this;
+  }
+
+  /// @brief デストラクタ
+  ~PyCallable()
+  {
+    Py_XDECREF(mFunc);
+    Py_XDECREF(mSelf);
+  }
+
+
+public:
+  //////////////////////////////////////////////////////////////////////
+  // 外部インターフェイス
+  //////////////////////////////////////////////////////////////////////
+
+  /// @brief 空でない時 true を返す．
+  explicit
+  operator bool() const
+  {
+    return mFunc != nullptr;
+  }
+
+  /// @brief 呼び出す．
+  ///
+  /// Python の例外が起きた場合や返り値の変換に失敗した場合には
+  /// PyCallableError を送出する．
+  RetType
+  operator()(
+    const typename PyArgs::ElemType&... args ///< [in] 引数
+  ) const
+  {
+    // argv[0] は PY_VECTORCALL_ARGUMENTS_OFFSET 用，
+    // argv[1] は self 用に空けておく．
+    PyObject* argv[sizeof...(PyArgs) + 2];
+    argv[0] = nullptr;
+    argv[1] = mSelf;
+    SizeType n = 0;
+    auto set_arg = [&](PyObject* obj) -> bool {
+      if ( obj == nullptr ) {
+	return false;
+      }
+      argv[n + 2] = obj;
+      ++ n;
+      return true;
+    };
+    PyObject* res = nullptr;
+    if ( (set_arg(PyArgs::ToPyObject(args)) && ...) ) {
+      if ( mSelf != nullptr ) {
+	res = PyObject_Vectorcall(mFunc, argv + 1,
+				  (n + 1) | PY_VECTORCALL_ARGUMENTS_OFFSET,
+				  nullptr);
+      }
+      else {
+	res = PyObject_Vectorcall(mFunc, argv + 2,
+				  n | PY_VECTORCALL_ARGUMENTS_OFFSET,
+				  nullptr);
+      }
+    }
+    for ( SizeType i = 0; i < n; ++ i ) {
+      Py_DECREF(argv[i + 2]);
+    }
+    if ( res == nullptr ) {
+      if ( !PyErr_Occurred() ) {
+	PyErr_SetString(PyExc_TypeError, "could not convert the arguments of callback");
+      }
+      throw PyCallableError{};
+    }
+    if constexpr ( std::is_void_v<RetType> ) {
+      Py_DECREF(res);
+    }
+    else {
+      RetType val;
+      auto ok = PyR::FromPyObject(res, val);
+      Py_DECREF(res);
+      if ( !ok ) {
+	if ( !PyErr_Occurred() ) {
+	  PyErr_SetString(PyExc_TypeError, "invalid return value of callback");
+	}
+	throw PyCallableError{};
+      }
+      return val;
+    }
+  }
+
+
+private:
+  //////////////////////////////////////////////////////////////////////
+  // データメンバ
+  //////////////////////////////////////////////////////////////////////
+
+  // 呼び出す関数
+  PyObject* mFunc{nullptr};
+
+  // 束縛メソッドの self (束縛メソッドでない場合は nullptr)
+  PyObject* mSelf{nullptr};
+
+};
+
+END_NAMESPACE_YM
+
+#endif // PYCALLABLE_H
@@ -0,0 +1,283 @@
+#ifndef PYCAPI_H
+#define PYCAPI_H
+
+/// @file PyCapi.h
+/// @brief PyCapi のヘッダファイル
+/// @author Yusuke Matsunaga (松永 裕介)
+///
+/// Copyright (C) 2025 Yusuke Matsunaga
+/// All rights reserved.
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include "ym_config.h"
+#include <cstring>
+
+
+BEGIN_NAMESPACE_YM
+
+//////////////////////////////////////////////////////////////////////
+/// @class PyCapiEntry PyCapi.h "PyCapi.h"
+/// @brief 一つの拡張クラスの C-API を表す構造体
+///
+/// 値の型はモジュールの境界を越えるので void* で受け渡す．
+/// 定義されていない関数は nullptr となる．
+//////////////////////////////////////////////////////////////////////
+struct PyCapiEntry
+{
+  // Python 上の型名
+  const char* mName;
+  // 型オブジェクト
+  PyTypeObject* mType;
+  // 型オブジェクトを使用可能にする関数
+  // (遅延初期化を行わないモジュールでは nullptr)
+  bool (*mReady)();
+  // PyObject が対象の型か調べる関数
+  bool (*mCheck)(PyObject*);
+  // PyObject から値を取り出す関数
+  const void* (*mGetRef)(PyObject*);
+  // 値から PyObject を作る関数
+  PyObject* (*mToPyObject)(const void*);
+  // PyObject から値を取り出す関数(型変換を伴う)
+  bool (*mFromPyObject)(PyObject*, void*);
+};
+
+
+//////////////////////////////////////////////////////////////////////
+/// @class PyCapiTable PyCapi.h "PyCapi.h"
+/// @brief モジュールが公開する C-API の表
+//////////////////////////////////////////////////////////////////////
+struct PyCapiTable
+{
+  // この構造体のレイアウトのバージョン
+  int mLayoutVersion;
+  // モジュールの C-API のバージョン
+  int mVersion;
+  // 要素数
+  SizeType mNum;
+  // 要素の配列
+  const PyCapiEntry* mEntries;
+};
+
+
+//////////////////////////////////////////////////////////////////////
+/// @class PyCapi PyCapi.h "PyCapi.h"
+/// @brief PyCapsule を用いて C-API の表を公開/取得する関数群
+///
+/// 公開側は mk_py_capi の ModuleGen(capi_version=N) が生成する．
+/// 利用側は以下のように用いる．
+///
+/// auto table = PyCapi::import("mypkg.mymod._C_API", N);
+/// PyCapiType<Vec> vec_api(table, "Vec");
+/// if ( vec_api.Check(obj) ) {
+///   auto& val = vec_api._get_ref(obj);
+///   ...
+/// }
+//////////////////////////////////////////////////////////////////////
+class PyCapi
+{
+public:
+
+  /// @brief PyCapiTable のレイアウトのバージョン
+  static constexpr int LAYOUT_VERSION = 1;
+
+
+public:
+  //////////////////////////////////////////////////////////////////////
+  // 外部インターフェイス
+  //////////////////////////////////////////////////////////////////////
+
+  /// @brief C-API の表をモジュールに登録する．
+  /// @return 成功したら true を返す．
+  ///
+  /// カプセル名はモジュールの __name__ に "._C_API" を付けたもの．
+  /// パッケージのサブモジュールの場合も初期化中の __name__ は
+  /// "pkg.mod" のような完全な名前になっている．
+  static
+  bool
+  export_table(
+    PyObject* m,             ///< [in] モジュールオブジェクト
+    const PyCapiTable* table ///< [in] 表
+  )
+  {
+    auto modname = PyModule_GetName(m);
+    if ( modname == nullptr ) {
+      return false;
+    }
+    // カプセル名はカプセルが保持し，開放時に削除する．
+    static const char suffix[] = "._C_API";
+    auto len = std::strlen(modname);
+    auto name = new char[len + sizeof(suffix)];
+    std::memcpy(name, modname, len);
+    std::memcpy(name + len, suffix, sizeof(suffix));
+    auto capsule = PyCapsule_New(const_cast<PyCapiTable*>(table), name,
+				 _free_name);
+    if ( capsule == nullptr ) {
+      delete [] name;
+      return false;
+    }
+    if ( PyModule_AddObject(m, "_C_API", capsule) < 0 ) {
+      Py_DECREF(capsule);
+      return false;
+    }
+    return true;
+  }
+
+  /// @brief C-API の表を取り出す．
+  /// @return 表を返す．
+  ///
+  /// バージョンが異なる場合には ImportError をセットして nullptr を返す．
+  static
+  const PyCapiTable*
+  import(
+    const char* name, ///< [in] カプセル名("<module の __name__>._C_API")
+    int version       ///< [in] 要求するバージョン
+  )
+  {
+    auto table = reinterpret_cast<const PyCapiTable*>(PyCapsule_Import(name, 0));
+    if ( table == nullptr ) {
+      return nullptr;
+    }
+    if ( table->mLayoutVersion != LAYOUT_VERSION || table->mVersion != version ) {
+      PyErr_Format(PyExc_ImportError,
+		   "%s: version mismatch (expected %d, got %d)",
+		   name, version, table->mVersion);
+      return nullptr;
+    }
+    return table;
+  }
+
+  /// @brief 型名から要素を探す．
+  /// @return 見つからない場合には ImportError をセットして nullptr を返す．
+  static
+  const PyCapiEntry*
+  find(
+    const PyCapiTable* table, ///< [in] 表
+    const char* name          ///< [in] 型名
+  )
+  {
+    for ( SizeType i = 0; i < table->mNum; ++ i ) {
+      auto& entry = table->mEntries[i];
+      if ( std::strcmp(entry.mName, name) == 0 ) {
+	if ( entry.mReady != nullptr && !entry.mReady() ) {
+	  return nullptr;
+	}
+	return &entry;
+      }
+    }
+    PyErr_Format(PyExc_ImportError, "%s: no such type", name);
+    return nullptr;
+  }
+
+
+
+private:
+  //////////////////////////////////////////////////////////////////////
+  // 内部で用いられる関数
+  //////////////////////////////////////////////////////////////////////
+
+  /// @brief カプセル名を開放する．
+  static
+  void
+  _free_name(
+    PyObject* capsule ///< [in] カプセル
+  )
+  {
+    delete [] PyCapsule_GetName(capsule);
+  }
+
+};
+
+
+//////////////////////////////////////////////////////////////////////
+/// @class PyCapiType PyCapi.h "PyCapi.h"
+/// @brief PyCapiEntry に型をつけて用いるためのクラス
+///
+/// T は公開側の ElemType と同じ型でなければならない．
+//////////////////////////////////////////////////////////////////////
+template<typename T>
+class PyCapiType
+{
+public:
+
+  /// @brief コンストラクタ
+  ///
+  /// 見つからなかった場合には is_valid() が false となる．
+  PyCapiType(
+    const PyCapiTable* table, ///< [in] 表
+    const char* name          ///< [in] 型名
+  ) : mEntry{table != nullptr ? PyCapi::find(table, name) : nullptr}
+  {
+  }
+
+  /// @brief 適正な状態の時 true を返す．
+  bool
+  is_valid() const
+  {
+    return mEntry != nullptr;
+  }
+
+  /// @brief 型オブジェクトを返す．
+  PyTypeObject*
+  _typeobject() const
+  {
+    return mEntry->mType;
+  }
+
+  /// @brief PyObject が対象の型か調べる．
+  ///
+  /// 型オブジェクトのポインタ比較のみを行う．
+  bool
+  Check(
+    PyObject* obj ///< [in] 対象の PyObject
+  ) const
+  {
+    return Py_IS_TYPE(obj, mEntry->mType);
+  }
+
+  /// @brief PyObject から値を取り出す．
+  ///
+  /// Check(obj) == true であると仮定している．
+  const T&
+  _get_ref(
+    PyObject* obj ///< [in] 変換元の PyObject
+  ) const
+  {
+    return *static_cast<const T*>(mEntry->mGetRef(obj));
+  }
+
+  /// @brief 値から PyObject を作る．
+  PyObject*
+  ToPyObject(
+    const T& val ///< [in] 値
+  ) const
+  {
+    return mEntry->mToPyObject(&val);
+  }
+
+  /// @brief PyObject から値を取り出す．
+  /// @return 変換が成功したら true を返す．
+  bool
+  FromPyObject(
+    PyObject* obj, ///< [in] 変換元の PyObject
+    T& val         ///< [out] 結果を格納する変数
+  ) const
+  {
+    return mEntry->mFromPyObject(obj, &val);
+  }
+
+
+private:
+  //////////////////////////////////////////////////////////////////////
+  // データメンバ
+  //////////////////////////////////////////////////////////////////////
+
+  // 対象の要素
+  const PyCapiEntry* mEntry;
+
+};
+
+END_NAMESPACE_YM
+
+#endif // PYCAPI_H
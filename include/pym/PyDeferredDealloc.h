@@ -0,0 +1,318 @@
+#ifndef PYDEFERREDDEALLOC_H
+#define PYDEFERREDDEALLOC_H
+
+/// @file PyDeferredDealloc.h
+/// @brief PyDeferredDealloc のヘッダファイル
+/// @author Yusuke Matsunaga (松永 裕介)
+///
+/// Copyright (C) 2025 Yusuke Matsunaga
+/// All rights reserved.
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include "ym_config.h"
+#include <condition_variable>
+#include <deque>
+#include <mutex>
+#include <thread>
+#include <type_traits>
+#if defined(YM_UNIX)
+#include <pthread.h>
+#endif
+
+
+BEGIN_NAMESPACE_YM
+
+//////////////////////////////////////////////////////////////////////
+/// @class PyDeferredDealloc PyDeferredDealloc.h "PyDeferredDealloc.h"
+/// @brief 値の破壊をバックグラウンドのスレッドで行うためのクラス
+///
+/// mk_py_capi で PyObjGen(deferred_dealloc=True) を指定した時に用いられる．
+/// dealloc 関数は mVal をムーブしてキューに入れるだけで，
+/// 実際のデストラクタは GIL を持たないネイティブスレッドで実行される．
+/// そのため値は Python オブジェクトを保持していてはいけない．
+///
+/// キューの長さが上限に達している場合には値はムーブされず，
+/// 呼び出し側で(同期的に)破壊される．
+/// インタープリタの終了時(Py_AtExit)にはキューを空にしてスレッドを終了する．
+///
+/// fork() で作られた子プロセスにはバックグラウンドのスレッドは存在しないので
+/// 子プロセス側では状態を作り直す(キューに残っていた値は破壊されない)．
+//////////////////////////////////////////////////////////////////////
+class PyDeferredDealloc
+{
+public:
+
+  /// @brief キューの長さの上限のデフォルト値
+  static constexpr SizeType DEFAULT_MAX_BACKLOG = 1024;
+
+
+public:
+  //////////////////////////////////////////////////////////////////////
+  // 外部インターフェイス
+  //////////////////////////////////////////////////////////////////////
+
+  /// @brief 終了処理を登録する．
+  /// @return 成功したら true を返す．
+  ///
+  /// モジュールの初期化時に呼ばれる．
+  /// 何度呼んでもよい．
+  static
+  bool
+  init()
+  {
+    auto& st = _state();
+    std::lock_guard<std::mutex> lock{st.mMutex};
+    if ( !st.mRegistered ) {
+      if ( Py_AtExit(_finalize) < 0 ) {
+	PyErr_SetString(PyExc_RuntimeError, "Py_AtExit() failed");
+	return false;
+      }
+#if defined(YM_UNIX)
+      if ( pthread_atfork(nullptr, nullptr, _after_fork_child) != 0 ) {
+	PyErr_SetString(PyExc_RuntimeError, "pthread_atfork() failed");
+	return false;
+      }
+#endif
+      st.mRegistered = true;
+    }
+    return true;
+  }
+
+  /// @brief 値をキューに入れる．
+  ///
+  /// キューが一杯の場合や終了処理の後では val はムーブされない．
+  /// いずれの場合も呼び出し側は val のデストラクタを呼ぶ必要がある．
+  template<typename T>
+  static
+  void
+  push(
+    T&& val ///< [in] 破壊する値
+  )
+  {
+    using ValType = std::remove_cvref_t<T>;
+    auto& st = _state();
+    {
+      std::lock_guard<std::mutex> lock{st.mMutex};
+      if ( st.mStop || st.mQueue.size() >= st.mMaxBacklog ) {
+	++ st.mOverflowNum;
+	return;
+      }
+      st.mQueue.push_back(new ValItem<ValType>{std::move(val)});
+      ++ st.mPushNum;
+      if ( st.mMaxDepth < st.mQueue.size() ) {
+	st.mMaxDepth = st.mQueue.size();
+      }
+      if ( !st.mThread.joinable() ) {
+	st.mThread = std::thread{_run};
+      }
+    }
+    st.mCond.notify_one();
+  }
+
+  /// @brief キュー中の値が全て破壊されるまで待つ．
+  ///
+  /// GIL を持ったまま呼んでもよいが，長く待つ可能性がある場合には
+  /// Py_BEGIN_ALLOW_THREADS/Py_END_ALLOW_THREADS で囲むこと．
+  static
+  void
+  flush()
+  {
+    auto& st = _state();
+    std::unique_lock<std::mutex> lock{st.mMutex};
+    st.mIdleCond.wait(lock, [&st]{ return st.mQueue.empty() && !st.mBusy; });
+  }
+
+  /// @brief キューの長さの上限を設定する．
+  static
+  void
+  set_max_backlog(
+    SizeType max_backlog ///< [in] 上限
+  )
+  {
+    auto& st = _state();
+    std::lock_guard<std::mutex> lock{st.mMutex};
+    st.mMaxBacklog = max_backlog;
+  }
+
+  /// @brief 統計情報を表す辞書を返す．
+  ///
+  /// 辞書のキーは以下の通り．
+  /// - "depth":       現在のキューの長さ
+  /// - "max_depth":   キューの長さの最大値
+  /// - "max_backlog": キューの長さの上限
+  /// - "pushed":      キューに入れられた値の数
+  /// - "destroyed":   バックグラウンドで破壊された値の数
+  /// - "overflow":    キューに入れられずに同期的に破壊された値の数
+  static
+  PyObject*
+  stats()
+  {
+    auto& st = _state();
+    std::lock_guard<std::mutex> lock{st.mMutex};
+    return Py_BuildValue("{s:n,s:n,s:n,s:K,s:K,s:K}",
+			 "depth", static_cast<Py_ssize_t>(st.mQueue.size()),
+			 "max_depth", static_cast<Py_ssize_t>(st.mMaxDepth),
+			 "max_backlog", static_cast<Py_ssize_t>(st.mMaxBacklog),
+			 "pushed", static_cast<unsigned long long>(st.mPushNum),
+			 "destroyed", static_cast<unsigned long long>(st.mDestroyNum),
+			 "overflow", static_cast<unsigned long long>(st.mOverflowNum));
+  }
+
+
+private:
+  //////////////////////////////////////////////////////////////////////
+  // 内部で用いられるデータ構造
+  //////////////////////////////////////////////////////////////////////
+
+  /// @brief キューの要素の基底クラス
+  struct Item
+  {
+    virtual
+    ~Item() = default;
+  };
+
+  /// @brief 値を保持するキューの要素
+  template<typename T>
+  struct ValItem :
+    public Item
+  {
+    explicit
+    ValItem(
+      T&& val
+    ) : mVal{std::move(val)}
+    {
+    }
+
+    T mVal;
+  };
+
+  /// @brief 全体の状態
+  struct State
+  {
+    // 排他制御用の mutex
+    std::mutex mMutex;
+    // キューに要素が入ったことを知らせる条件変数
+    std::condition_variable mCond;
+    // キューが空になったことを知らせる条件変数
+    std::condition_variable mIdleCond;
+    // キュー
+    std::deque<Item*> mQueue;
+    // キューの長さの上限
+    SizeType mMaxBacklog{DEFAULT_MAX_BACKLOG};
+    // 破壊を実行中の時 true
+    bool mBusy{false};
+    // 終了処理を行った時 true
+    bool mStop{false};
+    // 終了処理を登録した時 true
+    bool mRegistered{false};
+    // バックグラウンドのスレッド
+    std::thread mThread;
+    // キューの長さの最大値
+    SizeType mMaxDepth{0};
+    // キューに入れられた値の数
+    std::uint64_t mPushNum{0};
+    // 破壊された値の数
+    std::uint64_t mDestroyNum{0};
+    // 同期的に破壊された値の数
+    std::uint64_t mOverflowNum{0};
+  };
+
+
+private:
+  //////////////////////////////////////////////////////////////////////
+  // 内部で用いられる関数
+  //////////////////////////////////////////////////////////////////////
+
+  /// @brief 全体の状態を返す．
+  static
+  State&
+  _state()
+  {
+    return *_state_ptr();
+  }
+
+  /// @brief 全体の状態を指すポインタを返す．
+  ///
+  /// 静的オブジェクトの破壊順序の影響を受けないように
+  /// 確保した領域は解放しない．
+  static
+  State*&
+  _state_ptr()
+  {
+    static State* state = new State;
+    return state;
+  }
+
+  /// @brief fork() 後の子プロセスで状態を作り直す．
+  ///
+  /// 子プロセスにはバックグラウンドのスレッドは存在せず，
+  /// mutex の状態も不定なので古い状態は破壊せずに捨てる．
+  /// (joinable な std::thread を破壊すると std::terminate() が呼ばれる)
+  static
+  void
+  _after_fork_child()
+  {
+    auto old_state = _state_ptr();
+    auto new_state = new State;
+    new_state->mRegistered = old_state->mRegistered;
+    new_state->mMaxBacklog = old_state->mMaxBacklog;
+    _state_ptr() = new_state;
+  }
+
+  /// @brief バックグラウンドのスレッドの本体
+  static
+  void
+  _run()
+  {
+    auto& st = _state();
+    for ( ; ; ) {
+      Item* item;
+      {
+	std::unique_lock<std::mutex> lock{st.mMutex};
+	st.mCond.wait(lock, [&st]{ return st.mStop || !st.mQueue.empty(); });
+	if ( st.mQueue.empty() ) {
+	  // 終了処理が行われた．
+	  break;
+	}
+	item = st.mQueue.front();
+	st.mQueue.pop_front();
+	st.mBusy = true;
+      }
+      delete item;
+      {
+	std::lock_guard<std::mutex> lock{st.mMutex};
+	st.mBusy = false;
+	++ st.mDestroyNum;
+	if ( !st.mQueue.empty() ) {
+	  continue;
+	}
+      }
+      st.mIdleCond.notify_all();
+    }
+  }
+
+  /// @brief 終了処理を行う．
+  ///
+  /// キュー中の値を全て破壊してからスレッドを終了させる．
+  static
+  void
+  _finalize()
+  {
+    auto& st = _state();
+    {
+      std::lock_guard<std::mutex> lock{st.mMutex};
+      st.mStop = true;
+    }
+    st.mCond.notify_all();
+    if ( st.mThread.joinable() ) {
+      st.mThread.join();
+    }
+  }
+
+};
+
+END_NAMESPACE_YM
+
+#endif // PYDEFERREDDEALLOC_H
@@ -71,9 +71,12 @@ public:
 	return false;
       }
       auto n = PySequence_Size(obj);
+      if ( n < 0 ) {
+	return false;
+      }
       val_list.clear();
       val_list.reserve(n);
-      for ( SizeType i = 0; i < n; ++ i ) {
+      for ( Py_ssize_t i = 0; i < n; ++ i ) {
 	auto val_obj = PySequence_GetItem(obj, i);
 	T val;
 	auto ans = deconv(val_obj, val);
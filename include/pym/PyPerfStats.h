@@ -0,0 +1,218 @@
+#ifndef PYPERFSTATS_H
+#define PYPERFSTATS_H
+
+/// @file PyPerfStats.h
+/// @brief PyPerfStats のヘッダファイル
+/// @author Yusuke Matsunaga (松永 裕介)
+///
+/// Copyright (C) 2025 Yusuke Matsunaga
+/// All rights reserved.
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include "ym_config.h"
+#include "ym/Timer.h"
+#include <cstdint>
+#include <deque>
+#include <string>
+#include <unordered_map>
+
+
+BEGIN_NAMESPACE_YM
+
+//////////////////////////////////////////////////////////////////////
+/// @class PyPerfStats PyPerfStats.h "PyPerfStats.h"
+/// @brief 生成されたエントリポイントの呼び出し回数と実行時間を記録するクラス
+///
+/// mk_py_capi で instrument=True を指定した時に用いられる．
+/// 各関数は static な Entry を一つ持ち，関数の先頭で Probe を作る．
+//////////////////////////////////////////////////////////////////////
+class PyPerfStats
+{
+public:
+
+  /// @brief 一つの関数の計測結果
+  struct Entry
+  {
+    // 名前
+    const char* mName;
+    // 呼び出し回数
+    std::uint64_t mCount{0};
+    // 累積実行時間(ミリ秒)
+    double mTime{0.0};
+    // 引数の型ごとの呼び出し回数
+    // キーは tp_name のポインタ(文字列の比較を避けるため)
+    std::unordered_map<const char*, std::uint64_t> mTypeHist;
+
+    /// @brief 引数の型を記録する．
+    void
+    count_type(
+      PyTypeObject* type ///< [in] 型
+    )
+    {
+      ++ mTypeHist[type->tp_name];
+    }
+  };
+
+  /// @brief 生存期間中の時間を計測するクラス
+  class Probe
+  {
+  public:
+
+    /// @brief コンストラクタ
+    explicit
+    Probe(
+      Entry& entry ///< [in] 結果を記録する Entry
+    ) : mEntry{entry}
+    {
+      ++ mEntry.mCount;
+      mTimer.start();
+    }
+
+    /// @brief デストラクタ
+    ~Probe()
+    {
+      mTimer.stop();
+      mEntry.mTime += mTimer.get_time();
+    }
+
+
+  private:
+    //////////////////////////////////////////////////////////////////////
+    // データメンバ
+    //////////////////////////////////////////////////////////////////////
+
+    // 結果を記録する Entry
+    Entry& mEntry;
+
+    // タイマー
+    Timer mTimer;
+
+  };
+
+
+public:
+  //////////////////////////////////////////////////////////////////////
+  // 外部インターフェイス
+  //////////////////////////////////////////////////////////////////////
+
+  /// @brief Entry を登録する．
+  /// @return 登録した Entry を返す．
+  static
+  Entry&
+  entry(
+    const char* name ///< [in] 名前
+  )
+  {
+    auto& entry_list = _entry_list();
+    entry_list.push_back(Entry{name});
+    return entry_list.back();
+  }
+
+  /// @brief 計測結果を表す辞書を返す．
+  ///
+  /// 辞書のキーは関数名，値は
+  /// (呼び出し回数, 累積実行時間(ミリ秒), 型ごとの呼び出し回数の辞書)
+  /// のタプル．
+  /// json.dump() した結果は mk_py_capi の profile として用いることができる．
+  static
+  PyObject*
+  stats()
+  {
+    auto dict = PyDict_New();
+    if ( dict == nullptr ) {
+      return nullptr;
+    }
+    for ( auto& entry: _entry_list() ) {
+      auto hist = _hist_dict(entry);
+      if ( hist == nullptr ) {
+	Py_DECREF(dict);
+	return nullptr;
+      }
+      auto val = Py_BuildValue("(KdN)",
+			       static_cast<unsigned long long>(entry.mCount),
+			       entry.mTime,
+			       hist);
+      if ( val == nullptr ) {
+	Py_DECREF(dict);
+	return nullptr;
+      }
+      auto stat = PyDict_SetItemString(dict, entry.mName, val);
+      Py_DECREF(val);
+      if ( stat < 0 ) {
+	Py_DECREF(dict);
+	return nullptr;
+      }
+    }
+    return dict;
+  }
+
+  /// @brief 計測結果をリセットする．
+  static
+  void
+  reset()
+  {
+    for ( auto& entry: _entry_list() ) {
+      entry.mCount = 0;
+      entry.mTime = 0.0;
+      entry.mTypeHist.clear();
+    }
+  }
+
+
+private:
+  //////////////////////////////////////////////////////////////////////
+  // 内部で用いられる関数
+  //////////////////////////////////////////////////////////////////////
+
+  /// @brief 型ごとの呼び出し回数を表す辞書を作る．
+  ///
+  /// mTypeHist のキーはポインタなので，同じ名前の別の型の回数は
+  /// ここで足し合わせる．
+  static
+  PyObject*
+  _hist_dict(
+    const Entry& entry ///< [in] 対象の Entry
+  )
+  {
+    std::unordered_map<std::string, std::uint64_t> count_map;
+    for ( auto& p: entry.mTypeHist ) {
+      count_map[p.first] += p.second;
+    }
+    auto hist = PyDict_New();
+    if ( hist == nullptr ) {
+      return nullptr;
+    }
+    for ( auto& p: count_map ) {
+      auto n = PyLong_FromUnsignedLongLong(p.second);
+      if ( n == nullptr ) {
+	Py_DECREF(hist);
+	return nullptr;
+      }
+      auto stat = PyDict_SetItemString(hist, p.first.c_str(), n);
+      Py_DECREF(n);
+      if ( stat < 0 ) {
+	Py_DECREF(hist);
+	return nullptr;
+      }
+    }
+    return hist;
+  }
+
+  /// @brief Entry のリストを返す．
+  ///
+  /// 要素のアドレスが変わらないように std::deque を用いる．
+  static
+  std::deque<Entry>&
+  _entry_list()
+  {
+    static std::deque<Entry> the_list;
+    return the_list;
+  }
+
+};
+
+END_NAMESPACE_YM
+
+#endif // PYPERFSTATS_H
@@ -0,0 +1,131 @@
+#ifndef PYRUNTIME_H
+#define PYRUNTIME_H
+
+/// @file PyRuntime.h
+/// @brief PyRuntime のヘッダファイル
+/// @author Yusuke Matsunaga (松永 裕介)
+///
+/// Copyright (C) 2025 Yusuke Matsunaga
+/// All rights reserved.
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include "ym_config.h"
+#include <stdexcept>
+#include <string>
+
+
+BEGIN_NAMESPACE_YM
+
+//////////////////////////////////////////////////////////////////////
+/// @class PyArgSpec PyRuntime.h "PyRuntime.h"
+/// @brief 引数の解釈に用いる情報を表す構造体
+///
+/// 生成された関数ごとに static const なインスタンスを一つ持つ．
+//////////////////////////////////////////////////////////////////////
+struct PyArgSpec
+{
+  // PyArg_Parse() 用のフォーマット文字列
+  const char* mFormat;
+  // キーワードのリスト(nullptr の時はキーワード引数をとらない)
+  const char* const* mKwList{nullptr};
+};
+
+
+//////////////////////////////////////////////////////////////////////
+/// @class PyRuntime PyRuntime.h "PyRuntime.h"
+/// @brief mk_py_capi で生成されたコードが共通に用いる関数群
+///
+/// shared_runtime=True を指定した時に用いられる．
+/// 引数の解釈とエラー処理をここにまとめることで生成されるコードを小さくする．
+//////////////////////////////////////////////////////////////////////
+class PyRuntime
+{
+public:
+  //////////////////////////////////////////////////////////////////////
+  // 外部インターフェイス
+  //////////////////////////////////////////////////////////////////////
+
+  /// @brief 引数を解釈する．
+  /// @return 成功したら true を返す．
+  ///
+  /// 失敗した場合には Python の例外がセットされている．
+  template<typename... Ts>
+  static
+  bool
+  parse_args(
+    PyObject* args,        ///< [in] 位置引数
+    PyObject* kwds,        ///< [in] キーワード引数
+    const PyArgSpec& spec, ///< [in] 引数の情報
+    Ts... vars             ///< [out] 結果を格納する変数のポインタ
+  )
+  {
+    if ( spec.mKwList != nullptr ) {
+      return PyArg_ParseTupleAndKeywords(args, kwds, spec.mFormat,
+					 const_cast<char**>(spec.mKwList),
+					 vars...);
+    }
+    return PyArg_ParseTuple(args, spec.mFormat, vars...);
+  }
+
+  /// @brief PyObject を C++ の値に変換する．
+  /// @return 成功したら true を返す．
+  ///
+  /// obj が nullptr の場合(省略された引数)は何もしないで true を返す．
+  /// 失敗した場合には exc_type の例外をセットする．
+  template<class PyClass, typename T>
+  static
+  bool
+  conv_arg(
+    PyObject* obj,      ///< [in] 対象のオブジェクト
+    T& val,             ///< [out] 結果を格納する変数
+    PyObject* exc_type, ///< [in] 失敗時の例外の型
+    const char* msg     ///< [in] 失敗時のメッセージ
+  )
+  {
+    if ( obj == nullptr || PyClass::FromPyObject(obj, val) ) {
+      return true;
+    }
+    set_error(exc_type, msg);
+    return false;
+  }
+
+  /// @brief 送出中の C++ の例外を Python の例外に変換する．
+  ///
+  /// catch ( ... ) の中から呼ぶ．
+  /// std::invalid_argument は ValueError に変換する．
+  /// それ以外の例外はそのまま再送出される．
+  [[gnu::cold]] [[gnu::noinline]]
+  static
+  void
+  translate_exception(
+    const char* msg ///< [in] メッセージの先頭につける文字列
+  )
+  {
+    try {
+      throw;
+    }
+    catch ( std::invalid_argument& err ) {
+      auto buf = std::string{msg} + ": " + err.what();
+      PyErr_SetString(PyExc_ValueError, buf.c_str());
+    }
+  }
+
+  /// @brief 例外をセットする．
+  [[gnu::cold]] [[gnu::noinline]]
+  static
+  void
+  set_error(
+    PyObject* exc_type, ///< [in] 例外の型
+    const char* msg     ///< [in] メッセージ
+  )
+  {
+    PyErr_SetString(exc_type, msg);
+  }
+
+};
+
+END_NAMESPACE_YM
+
+#endif // PYRUNTIME_H
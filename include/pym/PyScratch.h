@@ -0,0 +1,134 @@
+#ifndef PYSCRATCH_H
+#define PYSCRATCH_H
+
+/// @file PyScratch.h
+/// @brief PyScratch のヘッダファイル
+/// @author Yusuke Matsunaga (松永 裕介)
+///
+/// Copyright (C) 2025 Yusuke Matsunaga
+/// All rights reserved.
+
+#include "ym_config.h"
+#include <optional>
+
+
+BEGIN_NAMESPACE_YM
+
+//////////////////////////////////////////////////////////////////////
+/// @class PyScratch PyScratch.h "PyScratch.h"
+/// @brief 引数の変換に用いるスレッドごとの作業領域
+///
+/// mk_py_capi で ObjConvArg(scratch=True) を指定した時に用いられる．
+/// T は clear(), capacity(), shrink_to_fit() を持つコンテナ型
+/// (std::vector など)．
+///
+/// 作業領域はスレッドごと，型ごとに一つ用意され，
+/// 使い終わったら解放せずに clear() だけ行うので
+/// 2回目以降の呼び出しでは領域の確保が起こらない．
+/// ただし，容量が max_capacity を超えた場合には領域を解放する．
+/// 作業領域が使用中の場合(同じ型の引数が複数ある場合や再入した場合)は
+/// 局所的な領域を用いる．
+//////////////////////////////////////////////////////////////////////
+template<typename T>
+class PyScratch
+{
+public:
+
+  /// @brief コンストラクタ
+  explicit
+  PyScratch(
+    SizeType max_capacity ///< [in] 作業領域を保持する容量の上限
+  ) : mMaxCapacity{max_capacity}
+  {
+    auto& buf = _buffer();
+    if ( !buf.mBusy ) {
+      buf.mBusy = true;
+      mBuffer = &buf;
+    }
+    else {
+      mLocal.emplace();
+    }
+  }
+
+  /// @brief デストラクタ
+  ~PyScratch()
+  {
+    if ( mBuffer != nullptr ) {
+      auto& body = mBuffer->mBody;
+      body.clear();
+      if ( body.capacity() > mMaxCapacity ) {
+	body.shrink_to_fit();
+      }
+      mBuffer->mBusy = false;
+    }
+  }
+
+  PyScratch(const PyScratch&) = delete;
+  PyScratch& operator=(const PyScratch&) = delete;
+
+
+public:
+  //////////////////////////////////////////////////////////////////////
+  // 外部インターフェイス
+  //////////////////////////////////////////////////////////////////////
+
+  /// @brief 作業領域を返す．
+  T&
+  get()
+  {
+    if ( mBuffer != nullptr ) {
+      return mBuffer->mBody;
+    }
+    return *mLocal;
+  }
+
+
+private:
+  //////////////////////////////////////////////////////////////////////
+  // 内部で用いられるデータ構造
+  //////////////////////////////////////////////////////////////////////
+
+  /// @brief スレッドごとの作業領域
+  struct Buffer
+  {
+    // 本体
+    T mBody;
+    // 使用中の時 true
+    bool mBusy{false};
+  };
+
+
+private:
+  //////////////////////////////////////////////////////////////////////
+  // 内部で用いられる関数
+  //////////////////////////////////////////////////////////////////////
+
+  /// @brief このスレッドの作業領域を返す．
+  static
+  Buffer&
+  _buffer()
+  {
+    static thread_local Buffer buf;
+    return buf;
+  }
+
+
+private:
+  //////////////////////////////////////////////////////////////////////
+  // データメンバ
+  //////////////////////////////////////////////////////////////////////
+
+  // 作業領域を保持する容量の上限
+  SizeType mMaxCapacity;
+
+  // スレッドごとの作業領域(使用中だった場合は nullptr)
+  Buffer* mBuffer{nullptr};
+
+  // 局所的な領域
+  std::optional<T> mLocal;
+
+};
+
+END_NAMESPACE_YM
+
+#endif // PYSCRATCH_H
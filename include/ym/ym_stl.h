@@ -24,6 +24,7 @@
 #include <bitset>
 #include <regex>
 #include <memory>
+#include <optional>
 #include <limits>
 #include <utility>
 #include <chrono>
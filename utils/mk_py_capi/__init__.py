@@ -17,6 +17,8 @@ from .arg import LongArg, UlongArg, DoubleArg
 from .arg import BoolArg, StringArg
 from .arg import RawObjArg, TypedRawObjArg
 from .arg import ObjConvArgBase, ObjConvArg, TypedObjConvArg
+from .arg import ObjRefArg, TypedObjRefArg
+from .arg import CallableArg
 from .number_gen import Op, Iop
 from .number_gen import AddOp, SubOp, MulOp, DivOp, RemOp
 from .number_gen import AddIop, SubIop, MulIop, DivIop, RemIop
@@ -17,6 +17,17 @@ def make_vardef(vartype, varname, vardefault):
 def make_varref(varname):
     return f'&{varname}'
 
+def gen_runtime_conv(writer, arg, exc_type):
+    """PyRuntime::conv_arg() を用いた変換コードを生成する．
+    """
+    line = f'if ( !PyRuntime::conv_arg<{arg.pyclassname}>({arg.tmpname}, {arg.cvarname}, '
+    line += f'{exc_type}, "could not convert to {arg.cvartype}") ) {{'
+    writer.write_line(line)
+    writer.indent_inc()
+    writer.gen_return(writer.error_val)
+    writer.indent_dec()
+    writer.write_line('}')
+
 
 class ArgBase:
     """引数の基底クラス
@@ -35,6 +46,11 @@ class ArgBase:
     def gen_conv(self, gen):
         pass
 
+    def include_files(self):
+        """変換コードが必要とするインクルードファイルのリストを返す．
+        """
+        return []
+
 
 class OptArg(ArgBase):
     """以降がオプション引数であることを示すマーカー
@@ -352,13 +368,21 @@ class StringArg(ConvArg):
 
 class ObjConvArgBase(ArgBase):
     """PyObject* 型の引数を表すクラス
+
+    scratch=True の場合，変換結果を格納する変数をスレッドごとの作業領域
+    (PyScratch)に束縛する．
+    作業領域は呼び出しごとに解放されずに clear() されるので
+    std::vector などのコンテナ型の領域確保を省くことができる．
+    容量が scratch_limit を超えた場合には領域を解放する．
     """
 
     def __init__(self, *,
                  name=None,
                  cvartype,
                  cvarname,
-                 cvardefault):
+                 cvardefault,
+                 scratch=False,
+                 scratch_limit=4096):
         tmptype = 'PyObject*'
         tmpname = f'{cvarname}_obj'
         super().__init__(name=name,
@@ -369,10 +393,30 @@ class ObjConvArgBase(ArgBase):
         self.cvarname = cvarname
         self.cvardefault = cvardefault
         self.tmpname = tmpname
+        self.scratch = scratch
+        self.scratch_limit = scratch_limit
+
+    def gen_decl(self, writer):
+        """変換結果を格納する変数の宣言を生成する．
+        """
+        if not self.scratch:
+            line = make_vardef(self.cvartype, self.cvarname, self.cvardefault) + ';'
+            writer.write_line(line)
+            return
+        scratchname = f'{self.cvarname}_scratch'
+        writer.write_line(f'PyScratch<{self.cvartype}> {scratchname}{{{self.scratch_limit}}};')
+        writer.gen_autoref_assign(self.cvarname, f'{scratchname}.get()')
+        if self.cvardefault is not None:
+            with writer.gen_if_block(f'{self.tmpname} == nullptr'):
+                writer.gen_assign(self.cvarname, self.cvardefault)
+
+    def include_files(self):
+        if self.scratch:
+            return ['pym/PyScratch.h']
+        return []
 
     def gen_conv(self, writer):
-        line = make_vardef(self.cvartype, self.cvarname, self.cvardefault) + ';'
-        writer.write_line(line)
+        self.gen_decl(writer)
         with writer.gen_if_block(f'{self.tmpname} != nullptr'):
             self.conv_body(writer)
 
@@ -389,13 +433,24 @@ class ObjConvArg(ObjConvArgBase):
                  cvartype,
                  cvarname,
                  cvardefault,
-                 pyclassname):
+                 pyclassname,
+                 scratch=False,
+                 scratch_limit=4096):
         super().__init__(name=name,
                          cvartype=cvartype,
                          cvarname=cvarname,
-                         cvardefault=cvardefault)
+                         cvardefault=cvardefault,
+                         scratch=scratch,
+                         scratch_limit=scratch_limit)
         self.pyclassname = pyclassname
 
+    def gen_conv(self, writer):
+        if writer.use_runtime:
+            self.gen_decl(writer)
+            gen_runtime_conv(writer, self, 'PyExc_ValueError')
+            return
+        super().gen_conv(writer)
+
     def conv_body(self, writer):
         with writer.gen_if_block(f'!{self.pyclassname}::FromPyObject({self.tmpname}, {self.cvarname})'):
             writer.gen_value_error(f'"could not convert to {self.cvartype}"')
@@ -426,6 +481,132 @@ class TypedObjConvArg(ArgBase):
     def gen_conv(self, writer):
         line = make_vardef(self.cvartype, self.cvarname, self.cvardefault) + ';'
         writer.write_line(line)
+        if writer.use_runtime:
+            gen_runtime_conv(writer, self, 'PyExc_TypeError')
+            return
         with writer.gen_if_block(f'{self.tmpname} != nullptr'):
             with writer.gen_if_block(f'!{self.pyclassname}::FromPyObject({self.tmpname}, {self.cvarname})'):
                 writer.gen_type_error(f'"could not convert to {self.cvartype}"')
+
+
+class ObjRefArg(ArgBase):
+    """PyObject* 型の引数を値のコピーなしで参照するクラス
+
+    引数が pyclassname の型の場合にはオブジェクトが保持している値を
+    そのまま const 参照で束縛する．
+    それ以外の場合(Deconv の extra_func で受け付ける文字列など)は
+    FromPyObject() で変換した一時変数を束縛する．
+    """
+
+    def __init__(self, *,
+                 name=None,
+                 cvartype,
+                 cvarname,
+                 cvardefault=None,
+                 pyclassname,
+                 pchar='O',
+                 varref=None):
+        tmptype = 'PyObject*'
+        tmpname = f'{cvarname}_obj'
+        if varref is None:
+            varref = make_varref(tmpname)
+        super().__init__(name=name,
+                         pchar=pchar,
+                         vardef=make_vardef(tmptype, tmpname, 'nullptr'),
+                         varref=varref)
+        self.cvartype = cvartype
+        self.cvarname = cvarname
+        self.cvardefault = cvardefault
+        self.pyclassname = pyclassname
+        self.tmpname = tmpname
+
+    def gen_conv(self, writer):
+        # 変換が必要な場合にのみ用いる一時変数
+        valname = f'{self.cvarname}_val'
+        ptrname = f'{self.cvarname}_ptr'
+        writer.gen_vardecl(typename=f'std::optional<{self.cvartype}>',
+                           varname=valname)
+        writer.gen_vardecl(typename=f'const {self.cvartype}*',
+                           varname=ptrname,
+                           initializer='nullptr')
+        with writer.gen_if_block(f'{self.tmpname} != nullptr'):
+            self.ref_body(writer, valname, ptrname)
+        with writer.gen_else_block():
+            if self.cvardefault is None:
+                writer.gen_stmt(f'{valname}.emplace()')
+            else:
+                writer.gen_stmt(f'{valname}.emplace({self.cvardefault})')
+            writer.gen_assign(ptrname, f'&*{valname}')
+        writer.gen_vardecl(typename=f'const {self.cvartype}&',
+                           varname=self.cvarname,
+                           initializer=f'*{ptrname}')
+
+    def ref_body(self, writer, valname, ptrname):
+        with writer.gen_if_block(f'{self.pyclassname}::Check({self.tmpname})'):
+            writer.gen_assign(ptrname, f'&{self.pyclassname}::_get_ref({self.tmpname})')
+        with writer.gen_else_block():
+            writer.gen_stmt(f'{valname}.emplace()')
+            with writer.gen_if_block(f'!{self.pyclassname}::FromPyObject({self.tmpname}, *{valname})'):
+                writer.gen_value_error(f'"could not convert to {self.cvartype}"')
+            writer.gen_assign(ptrname, f'&*{valname}')
+
+
+class TypedObjRefArg(ObjRefArg):
+    """pyclassname 型に限定した PyObject* 型の引数を値のコピーなしで参照するクラス
+    """
+
+    def __init__(self, *,
+                 name=None,
+                 cvartype,
+                 cvarname,
+                 cvardefault=None,
+                 pyclassname):
+        super().__init__(name=name,
+                         cvartype=cvartype,
+                         cvarname=cvarname,
+                         cvardefault=cvardefault,
+                         pyclassname=pyclassname,
+                         pchar='O!',
+                         varref=f'{pyclassname}::_typeobject(), &{cvarname}_obj')
+
+    def ref_body(self, writer, valname, ptrname):
+        # PyArg_Parse() で型のチェックは済んでいる．
+        writer.gen_assign(ptrname, f'&{self.pyclassname}::_get_ref({self.tmpname})')
+
+
+class CallableArg(ArgBase):
+    """呼び出し可能な PyObject* 型の引数を表すクラス
+
+    C++ 側では PyCallable<ret_pyclass, arg_pyclasses...> 型の
+    関数オブジェクトとして扱われる．
+    ret_pyclass は返り値の変換を行うクラスで返り値を用いない場合は 'void'．
+    arg_pyclasses は引数の変換を行うクラスのリスト．
+    コールバック中で起きた Python の例外は PyCallableError として送出され，
+    生成された関数の中で捕まえられる．
+    pym/PyCallable.h をインクルードしておく必要がある．
+    """
+
+    def __init__(self, *,
+                 name=None,
+                 cvarname,
+                 ret_pyclass='void',
+                 arg_pyclasses=None):
+        if arg_pyclasses is None:
+            arg_pyclasses = []
+        tmptype = 'PyObject*'
+        tmpname = f'{cvarname}_obj'
+        super().__init__(name=name,
+                         pchar='O',
+                         vardef=make_vardef(tmptype, tmpname, 'nullptr'),
+                         varref=make_varref(tmpname))
+        self.cvartype = 'PyCallable<' + ', '.join([ret_pyclass] + arg_pyclasses) + '>'
+        self.cvarname = cvarname
+        self.tmpname = tmpname
+
+    def gen_conv(self, writer):
+        with writer.gen_if_block(f'{self.tmpname} != nullptr && '
+                                 f'!PyCallable_Check({self.tmpname})'):
+            name = self.cvarname if self.name is None else self.name
+            writer.gen_type_error(f'"{name}: must be callable"')
+        writer.write_line(f'{self.cvartype} {self.cvarname}{{{self.tmpname}}};')
+        writer.catch_py_error = True
@@ -20,16 +20,20 @@ class CodeBlock:
     def __init__(self, writer, *,
                  br_chars='{}',
                  prefix='',
-                 postfix=''):
+                 postfix='',
+                 prologue=[]):
         self.__writer = writer
         self.__br_chars = br_chars
         self.__prefix = prefix
         self.__postfix = postfix
+        self.__prologue = prologue
 
     def __enter__(self):
         line = f'{self.__prefix}{self.__br_chars[0]}'
         self.__writer.write_line(line)
         self.__writer.indent_inc()
+        for line in self.__prologue:
+            self.__writer.write_line(line)
 
     def __exit__(self, ex_type, ex_value, trace):
         self.__writer.indent_dec()
@@ -37,6 +41,36 @@ class CodeBlock:
         self.__writer.write_line(line)
 
 
+class FuncBlock(CodeBlock):
+    """関数定義のコードブロックを表すクラス
+
+    catch_py_error フラグを関数ごとに退避/復帰する．
+    関数の終わりでフラグが立ったままの場合(PyCallableError を
+    捕まえるコードが出力されなかった場合)はエラーとする．
+    """
+
+    def __init__(self, writer, *,
+                 func_name,
+                 prologue=[]):
+        super().__init__(writer, prologue=prologue)
+        self.__writer = writer
+        self.__func_name = func_name
+        self.__saved_flag = False
+
+    def __enter__(self):
+        self.__saved_flag = self.__writer.catch_py_error
+        self.__writer.catch_py_error = False
+        super().__enter__()
+
+    def __exit__(self, ex_type, ex_value, trace):
+        super().__exit__(ex_type, ex_value, trace)
+        flag = self.__writer.catch_py_error
+        self.__writer.catch_py_error = self.__saved_flag
+        if flag and ex_type is None:
+            raise ValueError(f'{self.__func_name}: CallableArg can not be used here'
+                             ' (PyCallableError is not caught)')
+
+
 class CxxWriter:
     """C++ のコードを出力するクラス
     """
@@ -48,6 +82,26 @@ class CxxWriter:
         # 現在のインデント位置
         self.__indent = 0
 
+        # 引数のパーズ失敗などのエラー処理に [[unlikely]] を付ける時 True
+        self.mark_unlikely = False
+
+        # 引数の解釈とエラー処理に pym/PyRuntime.h の関数を用いる時 True
+        self.use_runtime = False
+
+        # gen_error() などで error_val を省略した時の返り値
+        # gen_arg_parser() が引数の変換コードを生成する間だけ
+        # 関数の種類に応じた値に変更する．
+        self.error_val = 'nullptr'
+
+        # gen_func_block() で関数本体の先頭に出力する行のリスト
+        self.func_prologue = []
+
+        # PyCallableError を捕まえる必要がある時 True
+        # CallableArg の変換コードで設定され，gen_catch_py_error() で
+        # リセットされる．
+        # gen_func_block() で関数ごとに退避/復帰される．
+        self.catch_py_error = False
+
     def gen_include(self, filename):
         """include 文を出力する．
 
@@ -94,8 +148,13 @@ class CxxWriter:
         for arg in arg_list:
             fmt_str += arg.pchar
 
+        if self.use_runtime and (has_args or force_has_keywords):
+            self.__gen_runtime_arg_parser(arg_list,
+                                          fmt_str=fmt_str,
+                                          has_keywords=has_keywords,
+                                          is_proc=is_proc)
         # パーズ関数の呼び出し
-        if has_args:
+        elif has_args:
             if has_keywords:
                 line = f'if ( !PyArg_ParseTupleAndKeywords(args, kwds, "{fmt_str}",'
                 self.write_line(line)
@@ -117,7 +176,7 @@ class CxxWriter:
                 if i < nargs - 1:
                     line += ','
                 else:
-                    line += ') ) {'
+                    line += f') ){self.__unlikely()} {{'
                 self.write_line(line)
             self.indent_dec(delta)
             self.indent_inc()
@@ -132,7 +191,7 @@ class CxxWriter:
             self.gen_comment('余分な引数を取らないことを確認しておく．')
             line = 'if ( !PyArg_ParseTupleAndKeywords(args, kwds'
             line += f', "{fmt_str}"'
-            line += f', const_cast<char**>({kwds_table})) ) {{'
+            line += f', const_cast<char**>({kwds_table})) ){self.__unlikely()} {{'
             self.write_line(line)
             self.indent_inc()
             if is_proc:
@@ -144,8 +203,48 @@ class CxxWriter:
             self.write_line('}')
 
         # PyObject から C++ の変数へ変換する．
+        # 変換コード中のエラー処理は関数の種類に応じた値を返す．
+        saved_error_val = self.error_val
+        self.error_val = '-1' if is_proc else 'nullptr'
         for arg in arg_list:
             arg.gen_conv(self)
+        self.error_val = saved_error_val
+
+    def __gen_runtime_arg_parser(self, arg_list, *,
+                                 fmt_str,
+                                 has_keywords,
+                                 is_proc):
+        """PyRuntime::parse_args() を用いて引数を解釈するコードを生成する．
+        """
+        if has_keywords:
+            self.write_line(f'static const PyArgSpec arg_spec{{"{fmt_str}", kwlist}};')
+            kwds = 'kwds'
+        else:
+            self.write_line(f'static const PyArgSpec arg_spec{{"{fmt_str}"}};')
+            kwds = 'nullptr'
+        varref_list = [arg.varref for arg in arg_list if arg.varref is not None]
+        line = f'if ( !PyRuntime::parse_args(args, {kwds}, arg_spec'
+        if len(varref_list) == 0:
+            self.write_line(f'{line}) ){self.__unlikely()} {{')
+        else:
+            self.write_line(f'{line},')
+            delta = line.find('(', line.find('(') + 1) + 1
+            self.indent_inc(delta)
+            nargs = len(varref_list)
+            for i, varref in enumerate(varref_list):
+                if i < nargs - 1:
+                    self.write_line(f'{varref},')
+                else:
+                    self.write_line(f'{varref}) ){self.__unlikely()} {{')
+            self.indent_dec(delta)
+        self.indent_inc()
+        if is_proc:
+            ret_val = '-1'
+        else:
+            ret_val = 'nullptr'
+        self.gen_return(ret_val)
+        self.indent_dec()
+        self.write_line('}')
 
     def gen_sequence(self, sequence_gen, sequence_name):
         if sequence_gen is None:
@@ -246,9 +345,15 @@ class CxxWriter:
         """
         self.gen_return(f'PyBool_FromLong({expr})')
 
-    def gen_return_pyobject(self, pyclassname, expr):
+    def gen_return_pyobject(self, pyclassname, expr, *,
+                            move=False):
         """PyObject に変換した値を返す return 文を出力する．
+
+        一時オブジェクトの式はそのまま ToPyObject(ElemType&&) が選ばれる．
+        move=True の場合は expr(名前付きの変数)をムーブして渡す．
         """
+        if move:
+            expr = f'std::move({expr})'
         self.gen_return(f'{pyclassname}::ToPyObject({expr})')
 
     def gen_return_py_none(self):
@@ -341,11 +446,14 @@ class CxxWriter:
                         dox_comment=None,
                         dox_comments=None,
                         is_static=False,
+                        attr=None,
                         is_declaration,
                         return_type,
                         func_name,
                         args):
         """関数ヘッダを出力する．
+
+        attr は [[gnu::hot]] などの属性を表す．
         """
         if not no_crlf:
             self.gen_CRLF()
@@ -359,6 +467,8 @@ class CxxWriter:
         if dox_comments is not None:
             for comment in dox_comments:
                 self.gen_dox_comment(comment)
+        if attr is not None:
+            self.write_line(attr)
         if is_static:
             self.write_line('static')
         self.write_line(f'{return_type}')
@@ -407,6 +517,7 @@ class CxxWriter:
                        dox_comment=None,
                        dox_comments=None,
                        is_static=False,
+                       attr=None,
                        return_type,
                        func_name,
                        args):
@@ -424,11 +535,14 @@ class CxxWriter:
                              dox_comment=dox_comment,
                              dox_comments=dox_comments,
                              is_static=is_static,
+                             attr=attr,
                              is_declaration=False,
                              return_type=return_type,
                              func_name=func_name,
                              args=args)
-        return CodeBlock(self)
+        return FuncBlock(self,
+                         func_name=func_name,
+                         prologue=self.func_prologue)
 
     def gen_if_block(self, condition):
         """if 文を出力する
@@ -562,6 +676,22 @@ class CxxWriter:
                          prefix=f'{structname} {varname} = ',
                          postfix=';')
 
+    def gen_lambda_block(self, *,
+                         varname,
+                         return_type,
+                         capture='&'):
+        """ラムダ式を即座に評価して結果を変数に代入するブロックを出力する．
+
+        with obj.gen_lambda_block(varname=XX,
+                                  return_type=XX):
+          ...
+        という風に用いる．
+        ブロック中の return 文の値が varname に代入される．
+        """
+        return CodeBlock(self,
+                         prefix=f'auto {varname} = [{capture}]() -> {return_type} ',
+                         postfix='();')
+
     def gen_try_block(self):
         """try ブロックを出力する．
         """
@@ -574,10 +704,30 @@ class CxxWriter:
         return CodeBlock(self,
                          prefix=f'catch ( {expr} ) ')
 
+    def gen_catch_py_error(self, *,
+                           error_val='nullptr'):
+        """PyCallableError を捕まえる catch ブロックを出力する．
+
+        catch_py_error が False の時には何も出力しない．
+        Python の例外はセットされているのでエラー値を返すだけでよい．
+        """
+        if not self.catch_py_error:
+            return
+        self.catch_py_error = False
+        with self.gen_catch_block('PyCallableError&'):
+            self.gen_return(error_val)
+
     def gen_catch_invalid_argument(self, msg=None, *,
                                    error_val='nullptr'):
+        self.gen_catch_py_error(error_val=error_val)
         if msg is None:
             msg = '"invalid argument"'
+        if self.use_runtime:
+            # 例外の変換は PyRuntime にまかせる．
+            with self.gen_catch_block('...'):
+                self.gen_stmt(f'PyRuntime::translate_exception({msg})')
+                self.gen_return(error_val)
+            return
         with self.gen_catch_block('std::invalid_argument err'):
             self.gen_vardecl(typename='std::ostringstream',
                              varname='buf')
@@ -596,23 +746,27 @@ class CxxWriter:
 
     def gen_type_error(self, error_msg, *,
                        noexit=False,
-                       error_val='nullptr'):
+                       error_val=None):
         self.gen_error('PyExc_TypeError', error_msg,
                        noexit=noexit,
                        error_val=error_val)
 
     def gen_value_error(self, error_msg, *,
                         noexit=False,
-                        error_val='nullptr'):
+                        error_val=None):
         self.gen_error('PyExc_ValueError', error_msg,
                        noexit=noexit,
                        error_val=error_val)
 
     def gen_error(self, error_type, error_msg, *,
                   noexit=False,
-                  error_val='nullptr'):
+                  error_val=None):
         """エラー出力
+
+        error_val を省略した場合は self.error_val を返す．
         """
+        if error_val is None:
+            error_val = self.error_val
         self.write_line(f'PyErr_SetString({error_type}, {error_msg});')
         if not noexit:
             self.gen_return(error_val)
@@ -659,6 +813,13 @@ class CxxWriter:
                 line += delim
             self.write_line(line)
 
+    def write_pp_line(self, line):
+        """プリプロセッサ指令の行を出力する．
+
+        インデントは行わない．
+        """
+        self.__fout.write(f'{line}\n')
+
     def write_line(self, line):
         """一行を出力する．
         """
@@ -682,3 +843,10 @@ class CxxWriter:
         """インデント量をセットする．
         """
         self.__indent = val
+
+    def __unlikely(self):
+        """mark_unlikely が True の時に [[unlikely]] 属性を返す．
+        """
+        if self.mark_unlikely:
+            return ' [[unlikely]]'
+        return ''
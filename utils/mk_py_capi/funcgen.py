@@ -95,6 +95,7 @@ class FuncWithArgs(FuncBase):
     def __init__(self, gen, name, tp_name, body, arg_list):
         super().__init__(gen, name, tp_name, body)
         self.arg_list = arg_list
+        gen.check_arg_list(arg_list)
 
 
 class DeallocGen(FuncBase):
@@ -105,7 +106,13 @@ class DeallocGen(FuncBase):
         if body == 'default':
             # デフォルト実装
             def default_body(writer):
-                writer.write_line(f'obj->mVal.~{gen.classname}();')
+                if gen.deferred_dealloc:
+                    # キューに入らなかった場合はここで破壊される．
+                    writer.gen_stmt('PyDeferredDealloc::push(std::move(obj->mVal))')
+                if gen.storage == 'shared_ptr':
+                    writer.write_line('obj->mVal.~shared_ptr();')
+                else:
+                    writer.write_line(f'obj->mVal.~{gen.classname}();')
             body = default_body
         self = super().__init__(gen, name, 'dealloc', body)
 
@@ -117,7 +124,13 @@ class DeallocGen(FuncBase):
                                    comments=comments,
                                    return_type='void',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=args):
+            self.gen.gen_perf_probe(writer, self.name)
+            self.gen.gen_identity_erase(writer)
+            self.gen.gen_intern_erase(writer)
+            self.gen.gen_trace_untrack(writer)
+            self.gen.gen_view_release(writer)
             if self.body is not None:
                 self.gen.gen_obj_conv(writer, varname='obj')
                 self.body(writer)
@@ -150,7 +163,9 @@ class ReprFuncGen(FuncBase):
                                    comments=comments,
                                    return_type='PyObject*',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=args):
+            self.gen.gen_perf_probe(writer, self.name)
             self.gen.gen_ref_conv(writer, refname='val')
             with writer.gen_try_block():
                 self.body(writer)
@@ -169,7 +184,8 @@ class HashFuncGen(FuncBase):
     """hashfunc 型の関数を生成するクラス
     """
 
-    def __init__(self, gen, name, body):
+    def __init__(self, gen, name, body, *,
+                 cache=False):
         if body is None:
             # 空
             def null_body(writer):
@@ -182,6 +198,7 @@ class HashFuncGen(FuncBase):
                 writer.gen_auto_assign('hash_val', 'val.hash()')
             body = sample_body
         super().__init__(gen, name, 'hash', body)
+        self.__cache = cache
 
     def __call__(self, writer, *,
                  comment=None,
@@ -191,12 +208,53 @@ class HashFuncGen(FuncBase):
                                    comments=comments,
                                    return_type='Py_hash_t',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=args):
+            self.gen.gen_perf_probe(writer, self.name)
+            if self.gen.is_interned:
+                intern_hash = f'reinterpret_cast<{self.gen.objectname}*>(self)->mInternHash'
+                with writer.gen_if_block(f'{intern_hash} != 0'):
+                    writer.gen_comment('インターン表のキーを流用する．')
+                    writer.gen_return(intern_hash)
+            if self.__cache:
+                self.gen.gen_obj_conv(writer, varname='my_obj')
+                with writer.gen_if_block('my_obj->mHash != 0'):
+                    writer.gen_comment('キャッシュされた値を返す．')
+                    writer.gen_return('my_obj->mHash')
             self.gen.gen_ref_conv(writer, refname='val')
             with writer.gen_try_block():
-                self.body(writer)
+                if self.__cache:
+                    with writer.gen_lambda_block(varname='hash_val',
+                                                 return_type='Py_hash_t'):
+                        self.body(writer)
+                    cond = 'hash_val != -1'
+                    if self.gen.has_view:
+                        # ビューの値は親オブジェクトの変更で変わるのでキャッシュしない．
+                        cond += ' && my_obj->mPtr == nullptr'
+                    with writer.gen_if_block(cond):
+                        writer.gen_assign('my_obj->mHash', 'hash_val')
+                    writer.gen_return('hash_val')
+                else:
+                    self.body(writer)
             writer.gen_catch_invalid_argument(error_val='0')
 
+    def gen_value_hash(self, writer, *,
+                       func_name,
+                       comment=None):
+        """C++ の値を受け取ってハッシュ値を返す関数を生成する．
+
+        本体は tp_hash と共通のものを用いる．
+        """
+        args = [CArg.GenArg(f'const {self.gen.classname}&', 'val')]
+        with writer.gen_func_block(comment=comment,
+                                   return_type='Py_hash_t',
+                                   func_name=func_name,
+                                   attr=self.gen.func_attr(func_name),
+                                   args=args):
+            # tp_hash とは別の名前で計測する．
+            self.gen.gen_perf_probe(writer, func_name)
+            self.body(writer)
+
 
 class CallFuncGen(FuncWithArgs):
     """callfunc(ternaryfunc 型の関数を生成するクラス
@@ -222,7 +280,9 @@ class CallFuncGen(FuncWithArgs):
                                    comments=comments,
                                    return_type='PyObject*',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=self.__args):
+            self.gen.gen_perf_probe(writer, self.name)
             writer.gen_arg_parser(self.arg_list)
             self.gen.gen_ref_conv(writer, refname='val')
             with writer.gen_try_block():
@@ -271,7 +331,16 @@ class RichcmpFuncGen(FuncBase):
                                    comments=comments,
                                    return_type='PyObject*',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=args):
+            self.gen.gen_perf_probe(writer, self.name)
+            if self.gen.is_interned:
+                with writer.gen_if_block('self == other'):
+                    writer.gen_comment('インターン化されているので同一なら等しい．')
+                    with writer.gen_if_block('op == Py_EQ'):
+                        writer.write_line('Py_RETURN_TRUE;')
+                    with writer.gen_if_block('op == Py_NE'):
+                        writer.write_line('Py_RETURN_FALSE;')
             self.gen.gen_ref_conv(writer, refname='val')
             with writer.gen_try_block():
                 self.body(writer)
@@ -302,8 +371,11 @@ class InitProcGen(FuncWithArgs):
                                    comments=comments,
                                    return_type='int',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=args):
+            self.gen.gen_perf_probe(writer, self.name)
             writer.gen_arg_parser(self.arg_list, is_proc=True)
+            self.gen.gen_hash_invalidate(writer)
             with writer.gen_try_block():
                 self.body(writer)
             writer.gen_catch_invalid_argument(error_val='-1')
@@ -345,7 +417,9 @@ class NewFuncGen(FuncWithArgs):
                                    comments=comments,
                                    return_type='PyObject*',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=args):
+            self.gen.gen_perf_probe(writer, self.name)
             if self.__disabled:
                 msg = f'"Instantiation of \'{self.gen.classname}\' is disabled"'
                 writer.gen_type_error(msg)
@@ -383,7 +457,9 @@ class LenFuncGen(FuncBase):
                                    comments=comments,
                                    return_type='Py_ssize_t',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=args):
+            self.gen.gen_perf_probe(writer, self.name)
             self.gen.gen_ref_conv(writer, refname='val')
             with writer.gen_try_block():
                 self.body(writer)
@@ -411,7 +487,9 @@ class InquiryGen(FuncBase):
                                    comments=comments,
                                    return_type='int',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=args):
+            self.gen.gen_perf_probe(writer, self.name)
             self.gen.gen_ref_conv(writer, refname='val')
             with writer.gen_try_block():
                 self.body(writer)
@@ -438,7 +516,9 @@ class UnaryFuncGen(FuncBase):
                                    comments=comments,
                                    return_type='PyObject*',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=args):
+            self.gen.gen_perf_probe(writer, self.name)
             self.gen.gen_ref_conv(writer, refname='val')
             with writer.gen_try_block():
                 self.body(writer)
@@ -450,7 +530,8 @@ class BinaryFuncGen(FuncBase):
     """
 
     def __init__(self, gen, name, body, *,
-                 arg2name=None):
+                 arg2name=None,
+                 is_mutator=False):
         if body is None:
             # 空
             def null_body(writer):
@@ -461,6 +542,7 @@ class BinaryFuncGen(FuncBase):
             arg2name = 'other'
         self.__args = [CArg.Self(),
                        CArg.PyArg(arg2name)]
+        self.__is_mutator = is_mutator
 
     def __call__(self, writer, *,
                  comment=None,
@@ -469,8 +551,13 @@ class BinaryFuncGen(FuncBase):
                                    comments=comments,
                                    return_type='PyObject*',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=self.__args):
-            self.gen.gen_ref_conv(writer, refname='val')
+            self.gen.gen_perf_probe(writer, self.name)
+            self.gen.gen_ref_conv(writer, refname='val',
+                                  mutable=self.__is_mutator)
+            if self.__is_mutator:
+                self.gen.gen_hash_invalidate(writer)
             with writer.gen_try_block():
                 self.body(writer)
             writer.gen_catch_invalid_argument()
@@ -483,7 +570,8 @@ class TernaryFuncGen(FuncBase):
     def __init__(self, gen, name, body, *,
                  arg2name=None,
                  arg3name=None,
-                 has_ref_conv=True):
+                 has_ref_conv=True,
+                 is_mutator=False):
         if body is None:
             # 空
             def null_body(writer):
@@ -498,6 +586,7 @@ class TernaryFuncGen(FuncBase):
                        CArg.PyArg(arg2name),
                        CArg.PyArg(arg3name)]
         self.__has_ref_conv = has_ref_conv
+        self.__is_mutator = is_mutator
 
     def __call__(self, writer, *,
                  comment=None,
@@ -506,9 +595,14 @@ class TernaryFuncGen(FuncBase):
                                    comments=comments,
                                    return_type='PyObject*',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=self.__args):
+            self.gen.gen_perf_probe(writer, self.name)
             if self.__has_ref_conv:
-                self.gen.gen_ref_conv(writer, refname='val')
+                self.gen.gen_ref_conv(writer, refname='val',
+                                  mutable=self.__is_mutator)
+            if self.__is_mutator:
+                self.gen.gen_hash_invalidate(writer)
             with writer.gen_try_block():
                 self.body(writer)
             writer.gen_catch_invalid_argument()
@@ -519,7 +613,8 @@ class SsizeArgFuncGen(FuncBase):
     """
 
     def __init__(self, gen, name, body, *,
-                 arg2name=None):
+                 arg2name=None,
+                 is_mutator=False):
         if body is None:
             # 空
             def null_body(writer):
@@ -530,6 +625,7 @@ class SsizeArgFuncGen(FuncBase):
             arg2name = 'arg2'
         self.__args = [CArg.Self(),
                        CArg.GenArg('Py_ssize_t', arg2name)]
+        self.__is_mutator = is_mutator
 
     def __call__(self, writer, *,
                  comment=None,
@@ -538,8 +634,13 @@ class SsizeArgFuncGen(FuncBase):
                                    comments=comments,
                                    return_type='PyObject*',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=self.__args):
-            self.gen.gen_ref_conv(writer, refname='val')
+            self.gen.gen_perf_probe(writer, self.name)
+            self.gen.gen_ref_conv(writer, refname='val',
+                                  mutable=self.__is_mutator)
+            if self.__is_mutator:
+                self.gen.gen_hash_invalidate(writer)
             with writer.gen_try_block():
                 self.body(writer)
             writer.gen_catch_invalid_argument()
@@ -573,8 +674,11 @@ class SsizeObjArgProcGen(FuncBase):
                                    comments=comments,
                                    return_type='int',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=self.__args):
-            self.gen.gen_ref_conv(writer, refname='val')
+            self.gen.gen_perf_probe(writer, self.name)
+            self.gen.gen_ref_conv(writer, refname='val', mutable=True)
+            self.gen.gen_hash_invalidate(writer)
             with writer.gen_try_block():
                 self.body(writer)
             writer.gen_catch_invalid_argument(error_val='-1')
@@ -604,7 +708,9 @@ class ObjObjProcGen(FuncBase):
                                    comments=comments,
                                    return_type='int',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=self.__args):
+            self.gen.gen_perf_probe(writer, self.name)
             self.gen.gen_ref_conv(writer, refname='val')
             with writer.gen_try_block():
                 self.body(writer)
@@ -639,8 +745,11 @@ class ObjObjArgProcGen(FuncBase):
                                    comments=comments,
                                    return_type='int',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=self.__args):
-            self.gen.gen_ref_conv(writer, refname='val')
+            self.gen.gen_perf_probe(writer, self.name)
+            self.gen.gen_ref_conv(writer, refname='val', mutable=True)
+            self.gen.gen_hash_invalidate(writer)
             with writer.gen_try_block():
                 self.body(writer)
             writer.gen_catch_invalid_argument(error_val='-1')
@@ -648,21 +757,42 @@ class ObjObjArgProcGen(FuncBase):
 
 class ConvGen:
     """Conv ファンクタクラスを生成するクラス
+
+    move_body が指定された場合は右辺値参照を受け取る
+    operator()(ElemType&&) と ToPyObject(ElemType&&) も生成する．
+    一時オブジェクトを変換する場合はこちらが選ばれるので
+    値のコピーを避けることができる．
     """
 
-    def __init__(self, gen, body):
+    def __init__(self, gen, body, *,
+                 move_body=None):
         self.gen = gen
+        if body == 'default' and gen.item_type is not None:
+            raise ValueError('default Conv is not available for var-sized objects')
         if body == 'default':
             # デフォルト実装
             def default_body(writer):
                 gen.gen_alloc_code(writer, varname='obj')
                 gen.gen_obj_conv(writer, objname='obj', varname='my_obj')
-                writer.write_line(f'new (&my_obj->mVal) {gen.classname}(val);')
+                gen.gen_val_construct(writer, expr='val')
                 writer.gen_return('obj')
             body = default_body
+            if move_body is None:
+                move_body = 'default'
+        if move_body == 'default':
+            # デフォルト実装
+            def default_move_body(writer):
+                gen.gen_alloc_code(writer, varname='obj')
+                gen.gen_obj_conv(writer, objname='obj', varname='my_obj')
+                gen.gen_val_construct(writer, expr='std::move(val)')
+                writer.gen_return('obj')
+            move_body = default_move_body
         self.body = body
+        self.move_body = move_body
         self.args = [CArg.GenArg('const ElemType&', 'val',
                                  comment='[in] 元の値')]
+        self.move_args = [CArg.GenArg('ElemType&&', 'val',
+                                      comment='[in] 元の値(ムーブされる)')]
 
     def gen_decl(self, writer):
         """ヘッダ用の宣言を生成する．
@@ -673,6 +803,10 @@ class ConvGen:
                                         return_type='PyObject*',
                                         func_name='operator()',
                                         args=self.args)
+            if self.move_body is not None:
+                writer.gen_func_declaration(return_type='PyObject*',
+                                            func_name='operator()',
+                                            args=self.move_args)
 
     def gen_tofunc(self, writer):
         """ToPyObject() 関数の定義を生成する．
@@ -689,13 +823,221 @@ class ConvGen:
             writer.gen_vardecl(typename='Conv',
                                varname='conv')
             writer.gen_return('conv(val)')
+        if self.move_body is None:
+            return
+        dox_comments = [f'@brief {self.gen.classname} を表す PyObject を作る．',
+                        '@return 生成した PyObject を返す．',
+                        '',
+                        'val の内容は生成したオブジェクトにムーブされる．',
+                        '返り値は新しい参照が返される．']
+        with writer.gen_func_block(dox_comments=dox_comments,
+                                   is_static=True,
+                                   return_type='PyObject*',
+                                   func_name='ToPyObject',
+                                   args=self.move_args):
+            writer.gen_vardecl(typename='Conv',
+                               varname='conv')
+            writer.gen_return('conv(std::move(val))')
 
     def __call__(self, writer):
         with writer.gen_func_block(comment=f'{self.gen.classname} を PyObject に変換する．',
                                    return_type='PyObject*',
                                    func_name=f'{self.gen.pyclassname}::Conv::operator()',
+                                   attr=self.gen.func_attr('Conv'),
                                    args=self.args):
-            self.body(writer)
+            self.gen.gen_perf_probe(writer, 'Conv')
+            self.__gen_body(writer, self.body)
+        if self.move_body is not None:
+            with writer.gen_func_block(comment=f'{self.gen.classname} をムーブして PyObject に変換する．',
+                                       return_type='PyObject*',
+                                       func_name=f'{self.gen.pyclassname}::Conv::operator()',
+                                       attr=self.gen.func_attr('Conv(move)'),
+                                       args=self.move_args):
+                self.gen.gen_perf_probe(writer, 'Conv(move)')
+                self.__gen_body(writer, self.move_body)
+
+    def __gen_body(self, writer, body):
+        gen = self.gen
+        if not (gen.has_identity_cache or gen.is_interned or gen.has_trace_malloc):
+            body(writer)
+            return
+        if gen.has_identity_cache:
+            # 同一性キャッシュを調べてから本体を呼ぶ．
+            gen.gen_identity_lookup(writer)
+        elif gen.is_interned:
+            # インターン表を調べてから本体を呼ぶ．
+            gen.gen_intern_lookup(writer)
+        with writer.gen_lambda_block(varname='new_obj',
+                                     return_type='PyObject*'):
+            body(writer)
+        if gen.has_identity_cache:
+            gen.gen_identity_register(writer, objname='new_obj')
+        elif gen.is_interned:
+            gen.gen_intern_register(writer, objname='new_obj')
+        if gen.has_trace_malloc:
+            gen.gen_trace_track(writer, objname='new_obj')
+        writer.gen_return('new_obj')
+
+
+class ViewConvGen:
+    """ToPyView() 関数を生成するクラス
+    """
+
+    def __init__(self, gen):
+        self.gen = gen
+        self.args = [CArg.GenArg('ElemType&', 'val',
+                                 comment='[in] 親のオブジェクト中の値'),
+                     CArg.PyArg('parent',
+                                comment='[in] val を保持する Python オブジェクト')]
+
+    def gen_decl(self, writer):
+        """ヘッダ用の宣言を生成する．
+        """
+        dox_comments = [f'@brief {self.gen.classname} のビューを表す PyObject を作る．',
+                        '@return 生成した PyObject を返す．',
+                        '',
+                        'val はコピーされずに参照される．',
+                        'parent の参照カウントは生成したオブジェクトが',
+                        '開放されるまで増やされる．',
+                        '返り値は新しい参照が返される．']
+        writer.gen_func_declaration(dox_comments=dox_comments,
+                                    is_static=True,
+                                    return_type='PyObject*',
+                                    func_name='ToPyView',
+                                    args=self.args)
+
+    def __call__(self, writer):
+        with writer.gen_func_block(comment=f'{self.gen.classname} のビューを表す PyObject を作る．',
+                                   return_type='PyObject*',
+                                   func_name=f'{self.gen.pyclassname}::ToPyView',
+                                   attr=self.gen.func_attr('ToPyView'),
+                                   args=self.args):
+            self.gen.gen_perf_probe(writer, 'ToPyView')
+            self.gen.gen_alloc_code(writer, varname='obj')
+            with writer.gen_if_block('obj == nullptr'):
+                writer.gen_return('nullptr')
+            self.gen.gen_obj_conv(writer, objname='obj', varname='my_obj')
+            writer.gen_assign('my_obj->mPtr', '&val')
+            writer.write_line('Py_INCREF(parent);')
+            writer.gen_assign('my_obj->mParent', 'parent')
+            writer.gen_return('obj')
+
+
+class SharedGen:
+    """storage='shared_ptr' の時に所有権を共有する関数を生成するクラス
+    """
+
+    def __init__(self, gen):
+        self.gen = gen
+        self.shared_type = 'std::shared_ptr<const ElemType>'
+
+    def gen_decl(self, writer):
+        """ヘッダ用の宣言を生成する．
+        """
+        dox_comments = [f'@brief 所有権を共有して {self.gen.classname} を表す PyObject を作る．',
+                        '@return 生成した PyObject を返す．',
+                        '',
+                        '返り値は新しい参照が返される．']
+        writer.gen_func_declaration(dox_comments=dox_comments,
+                                    is_static=True,
+                                    return_type='PyObject*',
+                                    func_name='ToPyObject',
+                                    args=self.__to_args())
+        dox_comments = [f'@brief PyObject から所有権を共有して {self.gen.classname} を取り出す．',
+                        '@return 正しく変換できた時に true を返す．']
+        writer.gen_func_declaration(dox_comments=dox_comments,
+                                    is_static=True,
+                                    return_type='bool',
+                                    func_name='FromPyObject',
+                                    args=self.__from_args())
+        dox_comments = [f'@brief {self.gen.classname} を表す PyObject から共有ポインタを取り出す．',
+                        '',
+                        'Check(obj) == true であると仮定している．']
+        writer.gen_func_declaration(dox_comments=dox_comments,
+                                    is_static=True,
+                                    return_type=self.shared_type,
+                                    func_name='_get_shared',
+                                    args=self.__get_args())
+        dox_comments = [f'@brief {self.gen.classname} を表す PyObject から変更可能な参照を取り出す．',
+                        '',
+                        '他と共有されている場合や外部から渡された値の場合には',
+                        '複製してから返す(copy-on-write)．',
+                        'Check(obj) == true であると仮定している．']
+        writer.gen_func_declaration(dox_comments=dox_comments,
+                                    is_static=True,
+                                    return_type='ElemType&',
+                                    func_name='_get_mutable_ref',
+                                    args=self.__get_args())
+
+    def __call__(self, writer):
+        gen = self.gen
+        pyclassname = gen.pyclassname
+        with writer.gen_func_block(comment=f'所有権を共有して {gen.classname} を表す PyObject を作る．',
+                                   return_type='PyObject*',
+                                   func_name=f'{pyclassname}::ToPyObject',
+                                   args=self.__to_args()):
+            gen.gen_alloc_code(writer, varname='obj')
+            gen.gen_obj_conv(writer, objname='obj', varname='my_obj')
+            writer.write_line(f'new (&my_obj->mVal) {self.shared_type}(std::move(val));')
+            writer.gen_comment('外部から渡された実体は const の可能性がある．')
+            writer.gen_assign('my_obj->mOwned', 'false')
+            writer.gen_return('obj')
+
+        with writer.gen_func_block(comment=f'PyObject から所有権を共有して {gen.classname} を取り出す．',
+                                   return_type='bool',
+                                   func_name=f'{pyclassname}::FromPyObject',
+                                   args=self.__from_args()):
+            with writer.gen_if_block(f'{pyclassname}::Check(obj)'):
+                writer.gen_assign('val', f'{pyclassname}::_get_shared(obj)')
+                writer.gen_return('true')
+            if gen.has_deconv:
+                writer.gen_vardecl(typename='ElemType', varname='tmp')
+                with writer.gen_if_block(f'{pyclassname}::FromPyObject(obj, tmp)'):
+                    writer.gen_assign('val', 'std::make_shared<ElemType>(std::move(tmp))')
+                    writer.gen_return('true')
+            writer.gen_return('false')
+
+        with writer.gen_func_block(comment=f'PyObject から {gen.classname} の共有ポインタを取り出す．',
+                                   return_type=f'std::shared_ptr<const {gen.classname}>',
+                                   func_name=f'{pyclassname}::_get_shared',
+                                   args=self.__get_args()):
+            gen.gen_obj_conv(writer, objname='obj', varname='my_obj')
+            if gen.has_view:
+                with writer.gen_if_block('my_obj->mPtr != nullptr'):
+                    writer.gen_comment('ビューの場合は複製する．')
+                    writer.gen_return('std::make_shared<ElemType>(*my_obj->mPtr)')
+            writer.gen_return('my_obj->mVal')
+
+        with writer.gen_func_block(comment=f'PyObject から {gen.classname} の変更可能な参照を取り出す．',
+                                   return_type=f'{gen.classname}&',
+                                   func_name=f'{pyclassname}::_get_mutable_ref',
+                                   args=self.__get_args()):
+            gen.gen_obj_conv(writer, objname='obj', varname='my_obj')
+            if gen.has_view:
+                with writer.gen_if_block('my_obj->mPtr != nullptr'):
+                    writer.gen_return('*my_obj->mPtr')
+            with writer.gen_if_block('!my_obj->mOwned || my_obj->mVal.use_count() > 1'):
+                writer.gen_comment('外部から渡された値か他と共有されている値なので複製する．')
+                writer.gen_assign('my_obj->mVal',
+                                  'std::make_shared<ElemType>(*my_obj->mVal)')
+                writer.gen_assign('my_obj->mOwned', 'true')
+            writer.gen_comment('mOwned が true の実体は const でない ElemType として')
+            writer.gen_comment('このオブジェクトが作ったものである．')
+            writer.gen_return('const_cast<ElemType&>(*my_obj->mVal)')
+
+    def __to_args(self):
+        return [CArg.GenArg(self.shared_type, 'val',
+                            comment='[in] 元の値の共有ポインタ')]
+
+    def __from_args(self):
+        return [CArg.PyArg('obj',
+                           comment='[in] Python のオブジェクト'),
+                CArg.GenArg(f'{self.shared_type}&', 'val',
+                            comment='[out] 結果を格納する変数')]
+
+    def __get_args(self):
+        return [CArg.PyArg('obj',
+                           comment='[in] 変換元の PyObject')]
 
 
 class DeconvGen:
@@ -748,7 +1090,9 @@ class DeconvGen:
         with writer.gen_func_block(comment=f'PyObject を {self.gen.classname} に変換する．',
                                    return_type='bool',
                                    func_name=f'{self.gen.pyclassname}::Deconv::operator()',
+                                   attr=self.gen.func_attr('Deconv'),
                                    args=self.args):
+            self.gen.gen_perf_probe(writer, 'Deconv')
             if self.__extra_func is not None:
                 with writer.gen_if_block(f'{self.__extra_func}(obj, val)'):
                     writer.gen_return('true')
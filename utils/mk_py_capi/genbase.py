@@ -8,6 +8,7 @@
 """
 
 import os
+import json
 import datetime
 
 
@@ -15,15 +16,37 @@ class GenBase:
     """PyObject の CAPI 出力用の基底クラス
     """
 
-    def __init__(self):
+    # 全呼び出し回数に対してこの割合以上呼ばれた関数を hot とみなす．
+    hot_ratio = 0.05
+
+    def __init__(self, *,
+                 instrument=False,
+                 profile=None,
+                 shared_runtime=False):
         # 出力するC++の変数名の重複チェック用の辞書
         self.__name_dict = set()
+        # 呼び出し回数と実行時間を計測するコードを生成する時 True
+        self.instrument = instrument
+        # instrument=True で得られた計測結果
+        # (_perf_stats() の結果を JSON で保存したファイル名もしくは辞書)
+        self.profile = read_profile(profile)
+        # 同じモジュールの拡張クラスの pyclassname から pyname への辞書
+        # (計測結果の型名を求めるために ModuleGen が設定する)
+        self.pyname_dict = {}
+        # 引数の解釈とエラー処理に pym/PyRuntime.h の共通関数を用いる時 True
+        self.shared_runtime = shared_runtime
+        # 引数の変換コードが必要とするインクルードファイルのリスト
+        self.__arg_include_files = []
 
     def make_file(self, *,
                   template_file,
                   writer,
                   gen_list = [],
                   replace_list = []):
+        if self.profile is not None:
+            # 計測結果がある時はエラー処理を cold path として扱う．
+            writer.mark_unlikely = True
+        writer.use_runtime = self.shared_runtime
         with open(template_file, 'rt') as fin:
             for line in fin:
                 # 余分な改行を削除
@@ -57,6 +80,90 @@ class GenBase:
         self.__name_dict.add(name)
         return name
 
+    def check_arg_list(self, arg_list):
+        """引数リストの変換コードが必要とするインクルードファイルを記録する．
+        """
+        if arg_list is None:
+            return
+        for arg in arg_list:
+            for filename in arg.include_files():
+                if filename not in self.__arg_include_files:
+                    self.__arg_include_files.append(filename)
+
+    def add_arg_include_files(self, include_files):
+        """include_files に引数の変換コードが必要とするファイルを加えたリストを返す．
+        """
+        return include_files + [filename for filename in self.__arg_include_files
+                                if filename not in include_files]
+
+    def gen_perf_probe(self, writer, name):
+        """呼び出し回数と実行時間を計測するコードを生成する．
+
+        instrument=False の場合には何も出力しない．
+        """
+        if not self.instrument:
+            return
+        writer.write_line('static auto& perf_entry = '
+                          f'PyPerfStats::entry("{self.perf_prefix}.{name}");')
+        writer.gen_vardecl(typename='PyPerfStats::Probe',
+                           varname='perf_probe(perf_entry)')
+
+    def gen_perf_count_type(self, writer, type_expr):
+        """引数の型を記録するコードを生成する．
+
+        gen_perf_probe() の後で用いる．
+        instrument=False の場合には何も出力しない．
+        """
+        if not self.instrument:
+            return
+        writer.gen_stmt(f'perf_entry.count_type({type_expr})')
+
+    def profile_count(self, name):
+        """計測結果の呼び出し回数を返す．
+
+        計測結果がない場合には 0 を返す．
+        """
+        entry = self.__profile_entry(name)
+        if entry is None:
+            return 0
+        return entry[0]
+
+    def profile_type_count(self, name, tp_name):
+        """計測結果の型ごとの呼び出し回数を返す．
+
+        tp_name が None の場合には 0 を返す．
+        """
+        if tp_name is None:
+            return 0
+        entry = self.__profile_entry(name)
+        if entry is None or len(entry) < 3:
+            return 0
+        return entry[2].get(tp_name, 0)
+
+    def is_hot(self, name):
+        """計測結果で頻繁に呼ばれている関数の時 True を返す．
+        """
+        if self.profile is None:
+            return False
+        total = sum(entry[0] for entry in self.profile.values())
+        if total == 0:
+            return False
+        return self.profile_count(name) >= total * self.hot_ratio
+
+    def func_attr(self, name):
+        """関数に付ける属性を返す．
+
+        計測結果で hot と判断された関数には [[gnu::hot]] を付ける．
+        """
+        if self.is_hot(name):
+            return '[[gnu::hot]]'
+        return None
+
+    def __profile_entry(self, name):
+        if self.profile is None:
+            return None
+        return self.profile.get(f'{self.perf_prefix}.{name}', None)
+
     @staticmethod
     def year():
         """現在の年を表す文字列を返す．
@@ -72,6 +179,17 @@ class GenBase:
         return os.path.join(basedir, 'templates', filename)
 
 
+def read_profile(profile):
+    """計測結果を読み込む．
+
+    profile は JSON ファイル名もしくは辞書
+    """
+    if profile is None or isinstance(profile, dict):
+        return profile
+    with open(profile, 'rt') as fin:
+        return json.load(fin)
+
+
 class IncludesGen:
     """%%INCLUDES%% の置換を行うクラス
     """
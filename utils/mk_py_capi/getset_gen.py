@@ -120,7 +120,9 @@ class GetSetGen:
             args = [arg0, arg1]
             with writer.gen_func_block(return_type='PyObject*',
                                        func_name=getter.name,
+                                       attr=getter.gen.func_attr(getter.name),
                                        args=args):
+                getter.gen.gen_perf_probe(writer, getter.name)
                 getter.gen.gen_ref_conv(writer, refname='val')
                 getter.body(writer)
 
@@ -133,8 +135,11 @@ class GetSetGen:
             args = [arg0, arg1, arg2]
             with writer.gen_func_block(return_type='int',
                                        func_name=setter.name,
+                                       attr=setter.gen.func_attr(setter.name),
                                        args=args):
-                setter.gen.gen_ref_conv(writer, refname='val')
+                setter.gen.gen_perf_probe(writer, setter.name)
+                setter.gen.gen_ref_conv(writer, refname='val', mutable=True)
+                setter.gen.gen_hash_invalidate(writer)
                 setter.body(writer)
 
         # getset テーブルの生成
@@ -19,8 +19,12 @@ Method = namedtuple('Method',
                      'func_name',
                      'arg_parser',
                      'is_static',
+                     'mutator',
                      'func_body',
-                     'doc_str'])
+                     'doc_str',
+                     'use_self',
+                     'use_val'],
+                    defaults=[False, True])
 
 class NullParser:
     """引数を取らない場合のダミーパーサー
@@ -75,13 +79,23 @@ class MethodGen:
             arg_parser,
             is_static,
             func_body,
-            doc_str):
+            doc_str,
+            mutator=False,
+            use_self=False,
+            use_val=True):
+        """メソッドを追加する．
+
+        use_self はモジュール関数の本体でモジュールオブジェクト(self)を
+        用いる時に True にする．
+        use_val は本体で val を用いない時に False にする．
+        """
         if arg_list is None:
             if arg_parser is None:
                 arg_parser = NullParser()
         else:
             assert arg_parser is None
             arg_parser = DefaultParser(arg_list)
+            self.__gen.check_arg_list(arg_list)
         if func_body is None:
             def default_body(writer):
                 pass
@@ -91,13 +105,16 @@ class MethodGen:
                                          func_name=func_name,
                                          arg_parser=arg_parser,
                                          is_static=is_static,
+                                         mutator=mutator,
                                          func_body=func_body,
-                                         doc_str=doc_str))
+                                         doc_str=doc_str,
+                                         use_self=use_self,
+                                         use_val=use_val))
 
     def __call__(self, writer):
         # 個々のメソッドの実装コードを生成する．
         for method in self.__method_list:
-            if self.__module_func or method.is_static:
+            if (self.__module_func and not method.use_self) or method.is_static:
                 self_unused = True
             else:
                 self_unused = False
@@ -110,11 +127,23 @@ class MethodGen:
             with writer.gen_func_block(comment=method.doc_str,
                                        return_type='PyObject*',
                                        func_name=method.func_name,
+                                       attr=self.__gen.func_attr(method.name),
                                        args=args):
+                self.__gen.gen_perf_probe(writer, method.name)
                 method.arg_parser(writer)
-                if not (self.__module_func or method.is_static):
-                    self.__gen.gen_ref_conv(writer, refname='val')
-                method.func_body(writer)
+                if not (self.__module_func or method.is_static) and \
+                   (method.use_val or method.mutator):
+                    self.__gen.gen_ref_conv(writer, refname='val',
+                                            mutable=method.mutator)
+                    if method.mutator:
+                        self.__gen.gen_hash_invalidate(writer)
+                if writer.catch_py_error:
+                    # コールバック中の Python の例外を捕まえる．
+                    with writer.gen_try_block():
+                        method.func_body(writer)
+                    writer.gen_catch_py_error()
+                else:
+                    method.func_body(writer)
 
         # メソッドテーブルを生成する．
         with writer.gen_array_block(typename='PyMethodDef',
@@ -14,6 +14,8 @@ from .genbase import GenBase
 from .genbase import IncludesGen, BeginNamespaceGen, EndNamespaceGen
 from .method_gen import MethodGen
 from .cxxwriter import CxxWriter
+from .funcgen import CArg
+from .arg import RawObjArg
 
 
 class ExtraCodeGen:
@@ -59,15 +61,65 @@ class ModuleGen(GenBase):
                  pyclass_gen_list=[],
                  extra_include_files=[],
                  submodule_list=[],
-                 ex_init=None):
-        super().__init__()
+                 ex_init=None,
+                 instrument=False,
+                 profile=None,
+                 shared_runtime=False,
+                 lazy=False,
+                 capi_version=None):
+        super().__init__(instrument=instrument,
+                         profile=profile,
+                         shared_runtime=shared_runtime)
         self.modulename = modulename
         self.namespace = namespace
         self.doc_str = doc_str
         self.gen_list = pyclass_gen_list
+        # 拡張クラスとサブモジュールを最初にアクセスされた時に初期化する時 True
+        # モジュールの __getattr__ (PEP 562) を用いる．
+        # 環境変数 YM_PY_IMPORTTIME が設定されている時には
+        # それぞれの初期化にかかった時間を標準エラー出力に出す．
+        self.lazy = lazy
+        # C-API の表を PyCapsule として公開する時のバージョン番号
+        # (None の時は公開しない)
+        # 利用側は pym/PyCapi.h を用いる．
+        if capi_version is not None and len(pyclass_gen_list) == 0:
+            raise ValueError('capi_version requires pyclass_gen_list')
+        self.capi_version = capi_version
 
         # インクルードファイルのリスト
         self.__include_files = [f'pym/{gen.pyclassname}.h' for gen in pyclass_gen_list] + extra_include_files
+        if instrument:
+            self.__include_files.append('pym/PyPerfStats.h')
+            # 拡張クラスも計測の対象にする．
+            for gen in pyclass_gen_list:
+                gen.instrument = True
+        if shared_runtime:
+            self.__include_files.append('pym/PyRuntime.h')
+            # 拡張クラスも共通関数を用いる．
+            for gen in pyclass_gen_list:
+                gen.shared_runtime = True
+        if self.profile is not None:
+            # 計測結果は拡張クラスでも用いる．
+            for gen in pyclass_gen_list:
+                if gen.profile is None:
+                    gen.profile = self.profile
+        # 計測結果の型名は拡張クラスの pyname で記録されている．
+        pyname_dict = {gen.pyclassname: gen.pyname
+                       for gen in pyclass_gen_list}
+        for gen in pyclass_gen_list:
+            gen.pyname_dict = pyname_dict
+        if lazy:
+            self.__include_files += ['ym/Timer.h', '<cstdlib>']
+            # 型オブジェクトの準備だけはモジュールの初期化時に行う．
+            for gen in pyclass_gen_list:
+                gen.lazy = True
+        if capi_version is not None:
+            self.__include_files.append('pym/PyCapi.h')
+        # 値の破壊をバックグラウンドのスレッドで行う拡張クラスを持つ時 True
+        self.__deferred_dealloc = any(gen.deferred_dealloc
+                                      for gen in pyclass_gen_list)
+        if self.__deferred_dealloc:
+            self.__include_files.append('pym/PyDeferredDealloc.h')
 
         # メソッド構造体の定義
         # モジュール定義の場合は関数がなくても空のテーブルをつくる．
@@ -83,28 +135,105 @@ class ModuleGen(GenBase):
         # 追加の初期化コード
         self.__ex_init_gen = ex_init
 
+        if instrument:
+            def stats_body(writer):
+                writer.gen_return('PyPerfStats::stats()')
+            self.add_method('_perf_stats',
+                            arg_list=None,
+                            func_body=stats_body,
+                            doc_str='return the performance statistics')
+
+            def reset_body(writer):
+                writer.gen_stmt('PyPerfStats::reset()')
+                writer.gen_return_py_none()
+            self.add_method('_perf_reset',
+                            arg_list=None,
+                            func_body=reset_body,
+                            doc_str='reset the performance statistics')
+
+        if self.__deferred_dealloc:
+            def flush_body(writer):
+                writer.write_line('Py_BEGIN_ALLOW_THREADS')
+                writer.gen_stmt('PyDeferredDealloc::flush()')
+                writer.write_line('Py_END_ALLOW_THREADS')
+                writer.gen_return_py_none()
+            self.add_method('_dealloc_flush',
+                            arg_list=None,
+                            func_body=flush_body,
+                            doc_str='wait for the deferred destructions')
+
+            def dealloc_stats_body(writer):
+                writer.gen_return('PyDeferredDealloc::stats()')
+            self.add_method('_dealloc_stats',
+                            arg_list=None,
+                            func_body=dealloc_stats_body,
+                            doc_str='return the statistics of the deferred destructions')
+
+        if lazy:
+            self.add_method('__getattr__',
+                            func_name='module_getattr',
+                            arg_list=[RawObjArg(cvarname='name_obj')],
+                            func_body=self.__gen_getattr_body,
+                            doc_str='initialize types and submodules on demand',
+                            use_self=True)
+            self.add_method('__dir__',
+                            func_name='module_dir',
+                            arg_list=None,
+                            func_body=self.__gen_dir_body,
+                            doc_str='return the list of attributes',
+                            use_self=True)
+
+    @property
+    def perf_prefix(self):
+        """計測結果の名前の接頭辞を返す．
+        """
+        return self.modulename
+
     def add_method(self, name, *,
                    func_name=None,
                    arg_list=[],
                    func_body=None,
-                   doc_str=''):
+                   doc_str='',
+                   use_self=False):
         """メソッド定義を追加する．
+
+        use_self が True の時は本体でモジュールオブジェクト(self)を用いる．
         """
         # デフォルトの関数名は Python のメソッド名をそのまま用いる．
         func_name = self.complete_name(func_name, name)
         self.__method_gen.add(func_name,
                               name=name,
                               arg_list=arg_list,
+                              arg_parser=None,
                               is_static=False,
                               func_body=func_body,
-                              doc_str=doc_str)
+                              doc_str=doc_str,
+                              use_self=use_self)
 
     def add_submodule(self, name, init_func):
         """サブモジュールを追加する．
         """
         self.__submodule_list.append((name, init_func))
 
-    def make_all(self, *, include_dir, source_dir):
+    def make_all(self, *, include_dir, source_dir,
+                 unity_batch=None,
+                 pxd_dir=None,
+                 cxx_namespace=None):
+        """全てのファイルを出力する．
+
+        pxd_dir を指定すると拡張クラスごとの Cython 用の .pxd ファイルと
+        それらをまとめて cimport する {modulename}.pxd も出力する．
+        cxx_namespace は .pxd で用いる C++ 上の名前空間名
+
+        unity_batch に数を指定すると拡張クラスの .cc ファイルを
+        その数ずつまとめた {modulename}_unity_N.cc と
+        プリコンパイル済みヘッダ用の {modulename}_pch.h も出力する．
+        この場合，拡張クラスの .cc ファイルは単独ではコンパイルせずに
+        {modulename}_module.cc と {modulename}_unity_N.cc をコンパイルする．
+        (cmake/YmUtils.cmake の ym_add_unity_object_library() を参照)
+        """
+        if unity_batch is not None and unity_batch <= 0:
+            raise ValueError(f'{unity_batch}: unity_batch should be positive')
         filename = os.path.join(include_dir, f'{self.modulename}.h')
         with open(filename, 'wt') as fout:
             self.make_header(fout=fout)
@@ -113,6 +242,9 @@ class ModuleGen(GenBase):
             self.make_source(fout=fout)
 
         for gen in self.gen_list:
+            if unity_batch is not None:
+                # 無名名前空間の中身をクラスごとの名前空間に入れる．
+                gen.unity_namespace = f'ns{gen.pyclassname}'
             filename = os.path.join(include_dir, f'{gen.pyclassname}.h')
             with open(filename, 'wt') as fout:
                 gen.make_header(fout=fout)
@@ -120,6 +252,95 @@ class ModuleGen(GenBase):
             with open(filename, 'wt') as fout:
                 gen.make_source(fout=fout)
 
+        if pxd_dir is not None:
+            for gen in self.gen_list:
+                filename = os.path.join(pxd_dir, f'{gen.pyclassname}.pxd')
+                with open(filename, 'wt') as fout:
+                    gen.make_pxd(fout=fout,
+                                 cxx_namespace=cxx_namespace)
+            filename = os.path.join(pxd_dir, f'{self.modulename}.pxd')
+            with open(filename, 'wt') as fout:
+                self.make_pxd(fout=fout)
+
+        if unity_batch is not None:
+            filename = os.path.join(include_dir, f'{self.modulename}_pch.h')
+            with open(filename, 'wt') as fout:
+                self.make_pch(fout=fout)
+            n = len(self.gen_list)
+            for i, pos in enumerate(range(0, n, unity_batch)):
+                gen_list = self.gen_list[pos:pos + unity_batch]
+                unityname = f'{self.modulename}_unity_{i}'
+                filename = os.path.join(source_dir, f'{unityname}.cc')
+                with open(filename, 'wt') as fout:
+                    self.make_unity(unityname, gen_list, fout=fout)
+
+    def make_pxd(self, fout=sys.stdout):
+        """拡張クラスの .pxd をまとめて cimport する .pxd ファイルを出力する．
+        """
+        writer = CxxWriter(fout=fout)
+        writer.write_line(f'### @file {self.modulename}.pxd')
+        writer.write_line(f'### @brief {self.modulename} モジュールの Cython 用の宣言')
+        writer.write_line('### @author Yusuke Matsunaga (松永 裕介)')
+        writer.write_line('###')
+        writer.write_line(f'### Copyright (C) {self.year()} Yusuke Matsunaga')
+        writer.write_line('### All rights reserved.')
+        writer.gen_CRLF()
+        for gen in self.gen_list:
+            writer.write_line(f'from .{gen.pyclassname} cimport *')
+
+    def make_pch(self, fout=sys.stdout):
+        """unity ビルド用のプリコンパイル済みヘッダを出力する．
+
+        全ての拡張クラスのヘッダファイルとインクルードファイルを含む．
+        """
+        include_files = []
+        for gen in self.gen_list:
+            for filename in gen.header_include_files + \
+                gen.add_arg_include_files(gen.source_include_files):
+                if filename not in include_files:
+                    include_files.append(filename)
+        for filename in self.__include_files:
+            if filename not in include_files:
+                include_files.append(filename)
+
+        # Generator リスト
+        gen_list = []
+        gen_list.append(IncludesGen(include_files))
+
+        # 置換リスト
+        replace_list = []
+        # 年の置換
+        replace_list.append(('%%Year%%', self.year()))
+        # モジュール名の置換
+        replace_list.append(('%%ModuleName%%', self.modulename))
+        replace_list.append(('%%MODULENAME%%', self.modulename.upper()))
+
+        self.make_file(template_file=self.template_file('custom_pch.h'),
+                       writer=CxxWriter(fout=fout),
+                       gen_list=gen_list,
+                       replace_list=replace_list)
+
+    def make_unity(self, unityname, pyclass_gen_list, fout=sys.stdout):
+        """unity ビルド用の .cc ファイルを出力する．
+        """
+
+        # Generator リスト
+        gen_list = []
+        gen_list.append(IncludesGen([f'{gen.pyclassname}.cc' for gen in pyclass_gen_list]))
+
+        # 置換リスト
+        replace_list = []
+        # 年の置換
+        replace_list.append(('%%Year%%', self.year()))
+        # モジュール名の置換
+        replace_list.append(('%%ModuleName%%', self.modulename))
+        replace_list.append(('%%UnityName%%', unityname))
+
+        self.make_file(template_file=self.template_file('custom_unity.cc'),
+                       writer=CxxWriter(fout=fout),
+                       gen_list=gen_list,
+                       replace_list=replace_list)
+
     def make_header(self, fout=sys.stdout):
         """ヘッダファイルを出力する．
         """
@@ -155,7 +376,7 @@ class ModuleGen(GenBase):
 
         # Generator リスト
         gen_list = []
-        gen_list.append(IncludesGen(self.__include_files))
+        gen_list.append(IncludesGen(self.add_arg_include_files(self.__include_files)))
         gen_list.append(BeginNamespaceGen(self.namespace))
         gen_list.append(EndNamespaceGen(self.namespace))
         gen_list.append(ExtraCodeGen(self))
@@ -186,10 +407,44 @@ class ModuleGen(GenBase):
                        replace_list=replace_list)
 
     def make_extra_code(self, writer):
+        if self.lazy:
+            self.__gen_lazy_init(writer)
+        if self.capi_version is not None:
+            self.__gen_capi_table(writer)
         if self.__method_gen is not None:
             self.__method_gen(writer)
 
     def make_init_code(self, writer):
+        if self.__deferred_dealloc:
+            # インタープリタの終了時にキューを空にする．
+            writer.gen_CRLF()
+            with writer.gen_if_block('!PyDeferredDealloc::init()'):
+                writer.write_line('goto error;')
+
+        if self.capi_version is not None:
+            writer.gen_CRLF()
+            if self.lazy:
+                writer.gen_assign('capi_module', 'm')
+            writer.gen_comment('カプセル名はモジュールの __name__ から作られる．')
+            with writer.gen_if_block('!PyCapi::export_table(m, &capi_table)'):
+                writer.write_line('goto error;')
+
+        if self.lazy:
+            # 拡張クラスとサブモジュールの登録は __getattr__ の中で行う．
+            # ただし，登録前にも Conv などで型オブジェクトが使われるので
+            # 型オブジェクトの準備だけは先に行っておく．
+            # 基底クラスなどが先に準備されるように依存関係の順に並べる．
+            writer.gen_CRLF()
+            for pyclass in self.__ready_order():
+                with writer.gen_if_block(f'!{pyclass}::ready()'):
+                    writer.write_line('goto error;')
+            writer.gen_assign('trace_init',
+                              'std::getenv("YM_PY_IMPORTTIME") != nullptr')
+            # 追加の初期化コード
+            if self.__ex_init_gen is not None:
+                self.__ex_init_gen(writer)
+            return
+
         # サブモジュールの登録
         if len(self.__submodule_list) > 0:
             writer.gen_CRLF()
@@ -207,3 +462,205 @@ class ModuleGen(GenBase):
         # 追加の初期化コード
         if self.__ex_init_gen is not None:
             self.__ex_init_gen(writer)
+
+    def __ready_order(self):
+        """依存しているクラスが先になるように並べた拡張クラス名のリストを返す．
+        """
+        gen_dict = {gen.pyclassname: gen for gen in self.gen_list}
+        visited = set()
+        ready_list = []
+        def visit(pyclass):
+            if pyclass in visited or pyclass not in gen_dict:
+                return
+            # 依存関係が循環していても無限ループにならないように先に加える．
+            visited.add(pyclass)
+            for dep in gen_dict[pyclass].depends:
+                visit(dep)
+            ready_list.append(pyclass)
+        for pyclass in self.__pyclass_list:
+            visit(pyclass)
+        return ready_list
+
+    def __lazy_list(self):
+        """遅延初期化の対象の (Python 上の名前, 初期化関数名) のリストを返す．
+        """
+        lazy_list = []
+        for gen in self.gen_list:
+            lazy_list.append((gen.pyname, f'init_{gen.pyclassname}'))
+        for name, _ in self.__submodule_list:
+            lazy_list.append((name, f'init_submodule_{name}'))
+        return lazy_list
+
+    def __gen_lazy_init(self, writer):
+        """遅延初期化用の関数を出力する．
+        """
+        writer.gen_CRLF()
+        writer.gen_comment('初期化にかかった時間を出力する時 true')
+        writer.gen_vardecl(typename='bool',
+                           varname='trace_init',
+                           initializer='false')
+
+        # 依存関係の順に呼び出すので先に宣言しておく．
+        args = [CArg.GenArg('PyObject*', 'm')]
+        for _, init_func in self.__lazy_list():
+            writer.gen_func_declaration(return_type='bool',
+                                        func_name=init_func,
+                                        args=args)
+
+        def gen_body(writer, name, init_stmt, depends):
+            writer.gen_vardecl(typename='static bool',
+                               varname='done',
+                               initializer='false')
+            with writer.gen_if_block('done'):
+                writer.gen_return('true')
+            writer.gen_comment('依存関係が循環していても無限ループにならないように先にセットする．')
+            writer.gen_assign('done', 'true')
+            for dep in depends:
+                with writer.gen_if_block(f'!init_{dep}(m)'):
+                    writer.gen_assign('done', 'false')
+                    writer.gen_return('false')
+            writer.gen_vardecl(typename='Timer',
+                               varname='timer')
+            writer.gen_stmt('timer.start()')
+            with writer.gen_if_block(f'!{init_stmt}'):
+                writer.gen_assign('done', 'false')
+                writer.gen_return('false')
+            writer.gen_stmt('timer.stop()')
+            with writer.gen_if_block('trace_init'):
+                writer.gen_stmt(f'PySys_WriteStderr("{self.modulename}.{name}: %.3f ms\\n", '
+                                'timer.get_time())')
+            writer.gen_return('true')
+
+        pyclass_set = set(self.__pyclass_list)
+        for gen in self.gen_list:
+            depends = [dep for dep in gen.depends if dep in pyclass_set]
+            with writer.gen_func_block(comment=f'{gen.pyname} を初期化する．',
+                                       return_type='bool',
+                                       func_name=f'init_{gen.pyclassname}',
+                                       args=args):
+                gen_body(writer, gen.pyname, f'{gen.pyclassname}::init(m)', depends)
+        for name, init_func in self.__submodule_list:
+            with writer.gen_func_block(comment=f'サブモジュール {name} を初期化する．',
+                                       return_type='bool',
+                                       func_name=f'init_submodule_{name}',
+                                       args=args):
+                gen_body(writer, name,
+                         f'PyModule::reg_submodule(m, "{name}", {init_func}())', [])
+
+    def __gen_getattr_body(self, writer):
+        """__getattr__ の本体を出力する．
+        """
+        writer.gen_auto_assign('name', 'PyUnicode_AsUTF8(name_obj)')
+        with writer.gen_if_block('name == nullptr'):
+            writer.gen_return('nullptr')
+        writer.gen_auto_assign('key', 'std::string{name}')
+        for pyname, init_func in self.__lazy_list():
+            with writer.gen_if_block(f'key == "{pyname}"'):
+                with writer.gen_if_block(f'!{init_func}(self)'):
+                    writer.gen_return('nullptr')
+                writer.gen_comment('初期化によってモジュールの辞書に登録されている．')
+                writer.gen_return('PyObject_GenericGetAttr(self, name_obj)')
+        writer.gen_stmt('PyErr_Format(PyExc_AttributeError, '
+                        f'"module \'{self.modulename}\' has no attribute \'%s\'", name)')
+        writer.gen_return('nullptr')
+
+    def __gen_dir_body(self, writer):
+        """__dir__ の本体を出力する．
+        """
+        writer.gen_auto_assign('dict', 'PyModule_GetDict(self)')
+        writer.gen_auto_assign('list', 'PyDict_Keys(dict)')
+        with writer.gen_if_block('list == nullptr'):
+            writer.gen_return('nullptr')
+        writer.gen_comment('まだ初期化されていない名前を加える．')
+        with writer.gen_array_block(typename='static const char*',
+                                    arrayname='lazy_names',
+                                    no_crlf=True):
+            for pyname, _ in self.__lazy_list():
+                writer.write_line(f'"{pyname}",')
+            writer.write_line('nullptr')
+        with writer.gen_for_block('auto p = lazy_names',
+                                  '*p != nullptr',
+                                  '++ p'):
+            with writer.gen_if_block('PyDict_GetItemString(dict, *p) != nullptr'):
+                writer.write_line('continue;')
+            writer.gen_auto_assign('name', 'PyUnicode_FromString(*p)')
+            with writer.gen_if_block('name == nullptr || PyList_Append(list, name) < 0'):
+                writer.gen_stmt('Py_XDECREF(name)')
+                writer.gen_stmt('Py_DECREF(list)')
+                writer.gen_return('nullptr')
+            writer.gen_stmt('Py_DECREF(name)')
+        writer.gen_return('list')
+
+    def __gen_capi_table(self, writer):
+        """C-API の表を出力する．
+        """
+        if self.lazy:
+            writer.gen_CRLF()
+            writer.gen_comment('C-API から型の初期化を行うためのモジュールオブジェクト')
+            writer.gen_vardecl(typename='PyObject*',
+                               varname='capi_module',
+                               initializer='nullptr')
+
+        # 値の型を void* にした関数
+        obj_arg = CArg.GenArg('PyObject*', 'obj')
+        for gen in self.gen_list:
+            c0 = gen.pyclassname
+            if self.lazy:
+                with writer.gen_func_block(comment=f'C-API 用の {gen.pyname} の初期化関数',
+                                           return_type='bool',
+                                           func_name=f'capi_ready_{c0}',
+                                           args=[]):
+                    writer.gen_return(f'init_{c0}(capi_module)')
+            with writer.gen_func_block(comment=f'C-API 用の {c0}::Check()',
+                                       return_type='bool',
+                                       func_name=f'capi_Check_{c0}',
+                                       args=[obj_arg]):
+                writer.gen_return(f'{c0}::Check(obj)')
+            with writer.gen_func_block(comment=f'C-API 用の {c0}::_get_ref()',
+                                       return_type='const void*',
+                                       func_name=f'capi_get_ref_{c0}',
+                                       args=[obj_arg]):
+                writer.gen_return(f'&{c0}::_get_ref(obj)')
+            if gen.has_conv:
+                with writer.gen_func_block(comment=f'C-API 用の {c0}::ToPyObject()',
+                                           return_type='PyObject*',
+                                           func_name=f'capi_ToPyObject_{c0}',
+                                           args=[CArg.GenArg('const void*', 'val')]):
+                    writer.gen_return(f'{c0}::ToPyObject(*static_cast<const {c0}::ElemType*>(val))')
+            if gen.has_deconv:
+                with writer.gen_func_block(comment=f'C-API 用の {c0}::FromPyObject()',
+                                           return_type='bool',
+                                           func_name=f'capi_FromPyObject_{c0}',
+                                           args=[obj_arg,
+                                                 CArg.GenArg('void*', 'val')]):
+                    writer.gen_return(f'{c0}::FromPyObject(obj, *static_cast<{c0}::ElemType*>(val))')
+
+        with writer.gen_array_block(typename='const PyCapiEntry',
+                                    arrayname='capi_entries',
+                                    comment='C-API の要素の配列'):
+            for gen in self.gen_list:
+                c0 = gen.pyclassname
+                def func_ptr(name, cond=True):
+                    if cond:
+                        return f'capi_{name}_{c0}'
+                    return 'nullptr'
+                writer.write_line(f'{{"{gen.pyname}",')
+                writer.indent_inc(1)
+                writer.write_line(f'{c0}::_typeobject(),')
+                writer.write_line(f'{func_ptr("ready", self.lazy)},')
+                writer.write_line(f'{func_ptr("Check")},')
+                writer.write_line(f'{func_ptr("get_ref")},')
+                writer.write_line(f'{func_ptr("ToPyObject", gen.has_conv)},')
+                writer.write_line(f'{func_ptr("FromPyObject", gen.has_deconv)}}},')
+                writer.indent_dec(1)
+
+        writer.gen_CRLF()
+        writer.gen_comment('C-API の表')
+        writer.write_line('const PyCapiTable capi_table = {')
+        writer.indent_inc()
+        writer.write_line('PyCapi::LAYOUT_VERSION,')
+        writer.write_line(f'{self.capi_version},')
+        writer.write_line(f'{len(self.gen_list)},')
+        writer.write_line('capi_entries')
+        writer.indent_dec()
+        writer.write_line('};')
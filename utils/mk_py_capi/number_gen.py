@@ -11,138 +11,234 @@ from .funcgen import FuncBase, CArg
 from .utils import gen_func, add_member_def
 
 
+# 組み込み型を表すクラスとその PyTypeObject の対応表
+# これらのクラスの Check() はサブクラスも受け付けるので
+# 型の完全一致は高速判定としてのみ用いる．
+BUILTIN_TYPE_DICT = {
+    'PyInt': '&PyLong_Type',
+    'PyInt32': '&PyLong_Type',
+    'PyInt64': '&PyLong_Type',
+    'PyLong': '&PyLong_Type',
+    'PyUint32': '&PyLong_Type',
+    'PyUint64': '&PyLong_Type',
+    'PyUlong': '&PyLong_Type',
+    'PyFloat': '&PyFloat_Type',
+    'PyBool': '&PyBool_Type',
+    'PyString': '&PyUnicode_Type',
+}
+
+
 class OpBase:
     """演算の情報を表すクラス
+
+    exact=True は classname::Check() が型の完全一致判定であることを表す．
+    (このツールで生成したクラスは全てこれに該当する)
+    この場合，Check() の呼び出しの代わりに PyTypeObject のポインタ比較を行う．
     """
 
     def __init__(self, classname, *,
-                 useref=True):
-        self.__classname = classname
+                 useref=True,
+                 exact=False):
+        self.classname = classname
+        self.is_exact = exact
         self.__useref = useref
 
+    def check_cond(self, *,
+                   objname,
+                   typevar,
+                   type_dict):
+        """objname が classname の型かどうか調べる条件式を返す．
+
+        typevar は Py_TYPE(objname) を保持している変数名
+        type_dict は完全一致判定を行うクラスと PyTypeObject の辞書
+        """
+        if self.classname in type_dict:
+            return f'{typevar} == {type_dict[self.classname]}'
+        if self.classname in BUILTIN_TYPE_DICT:
+            # 完全一致の場合に Check() の呼び出しを省略する．
+            type_obj = BUILTIN_TYPE_DICT[self.classname]
+            return f'{typevar} == {type_obj} || {self.classname}::Check({objname})'
+        return f'{self.classname}::Check({objname})'
+
     def __call__(self, writer, *,
                  retclassname,
                  objname,
-                 varname):
-        with writer.gen_if_block(f'{self.__classname}::Check({objname})'):
+                 varname,
+                 typevar,
+                 type_dict,
+                 temp_gen=None):
+        cond = self.check_cond(objname=objname,
+                               typevar=typevar,
+                               type_dict=type_dict)
+        with writer.gen_if_block(cond):
             if self.__useref:
                 writer.gen_autoref_assign(varname,
-                                          f'{self.__classname}::_get_ref({objname})')
+                                          f'{self.classname}::_get_ref({objname})')
             else:
                 writer.gen_auto_assign(varname,
-                                       f'{self.__classname}::Get({objname})')
-            self.body(writer, retclassname)
+                                       f'{self.classname}::Get({objname})')
+            self.body(writer, retclassname, temp_gen)
 
 
 class Op(OpBase):
+    """結果を新しいオブジェクトとして返す演算
+
+    temp_stmt は左オペランド(val1)が一時オブジェクトの時に用いる
+    val1 自身を結果で置き換える文
+    (例: 'val1 += val2' や 'val1 = std::move(val1) + val2')
+    """
 
     def __init__(self, classname, expr, *,
-                 useref=True):
-        super().__init__(classname=classname, useref=useref)
+                 useref=True,
+                 exact=False,
+                 temp_stmt=None):
+        super().__init__(classname=classname,
+                         useref=useref,
+                         exact=exact)
         self.__expr = expr
-
-    def body(self, writer, retclassname):
+        self.__temp_stmt = temp_stmt
+
+    def body(self, writer, retclassname, temp_gen=None):
+        if temp_gen is not None and self.__temp_stmt is not None:
+            with writer.gen_if_block('is_temporary(self)'):
+                writer.gen_comment('self は一時オブジェクトなので結果の格納に再利用する．')
+                writer.gen_stmt(self.__temp_stmt)
+                temp_gen.gen_hash_invalidate(writer)
+                writer.gen_return_self(incref=True)
         writer.gen_return_pyobject(retclassname, self.__expr)
 
 
 class AddOp(Op):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          expr='val1 + val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact,
+                         temp_stmt='val1 += val2')
 
 
 class SubOp(Op):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          expr='val1 - val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact,
+                         temp_stmt='val1 -= val2')
 
 
 class MulOp(Op):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          expr='val1 * val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact,
+                         temp_stmt='val1 *= val2')
 
 
 class DivOp(Op):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          expr='val1 / val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact,
+                         temp_stmt='val1 /= val2')
 
 
 class RemOp(Op):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          expr='val1 % val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact,
+                         temp_stmt='val1 %= val2')
 
 
 class LsftOp(Op):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          expr='val1 << val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact,
+                         temp_stmt='val1 <<= val2')
 
 
 class RsftOp(Op):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          expr='val1 >> val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact,
+                         temp_stmt='val1 >>= val2')
 
 
 class AndOp(Op):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          expr='val1 & val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact,
+                         temp_stmt='val1 &= val2')
 
 
 class XorOp(Op):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          expr='val1 ^ val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact,
+                         temp_stmt='val1 ^= val2')
 
 
 class OrOp(Op):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          expr='val1 | val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact,
+                         temp_stmt='val1 |= val2')
 
 
 class Iop(OpBase):
 
     def __init__(self, classname, stmt, *,
-                 useref=True):
-        super().__init__(classname=classname, useref=useref)
+                 useref=True,
+                 exact=False):
+        super().__init__(classname=classname,
+                         useref=useref,
+                         exact=exact)
         self.__stmt = stmt
 
-    def body(self, writer, _):
+    def body(self, writer, _, temp_gen=None):
         writer.write_line(f'{self.__stmt};')
         writer.gen_return_self(incref=True)
 
@@ -150,128 +246,208 @@ class Iop(OpBase):
 class AddIop(Iop):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          stmt='val1 += val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact)
 
 
 class SubIop(Iop):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          stmt='val1 -= val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact)
 
 
 class MulIop(Iop):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          stmt='val1 *= val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact)
 
 
 class DivIop(Iop):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          stmt='val1 /= val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact)
 
 
 class RemIop(Iop):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          stmt='val1 %= val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact)
 
 
 class LsftIop(Iop):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          stmt='val1 <<= val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact)
 
 
 class RsftIop(Iop):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          stmt='val1 >>= val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact)
 
 
 class AndIop(Iop):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          stmt='val1 &= val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact)
 
 
 class XorIop(Iop):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          stmt='val1 &= val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact)
 
 
 class XorIop(Iop):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          stmt='val1 ^= val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact)
 
 
 class OrIop(Iop):
 
     def __init__(self, classname, *,
-                 useref=True):
+                 useref=True,
+                 exact=False):
         super().__init__(classname=classname,
                          stmt='val1 |= val2',
-                         useref=useref)
+                         useref=useref,
+                         exact=exact)
 
 
 class BinOpGen(FuncBase):
     """二項演算を生成するクラス
+
+    オペランドの型の判定は Py_TYPE() で得られる PyTypeObject の
+    ポインタ比較を優先的に用いる．
+
+    reuse_temp=True の場合，左オペランドが他から参照されていない
+    一時オブジェクトならば新しいオブジェクトを作らずに
+    その領域に結果を格納して返す．
+    ただし，C API から PyNumber_Add() などを呼び出して
+    引数をその後も使い続けるコードとは併用できない．
+    また storage='shared_ptr' とも併用できない．
+    ビューオブジェクトは一時オブジェクトであっても再利用しない．
     """
 
     def __init__(self, gen, name, *,
                  op_list1,
-                 op_list2=[]):
+                 op_list2=[],
+                 is_inplace=False,
+                 reuse_temp=False):
+        if reuse_temp and gen.storage == 'shared_ptr':
+            raise ValueError("reuse_temp can not be used with storage='shared_ptr'")
+        if is_inplace or reuse_temp:
+            gen.add_mutator(name)
         def body(writer):
             c0 = gen.pyclassname
-            with writer.gen_if_block(f'{c0}::Check(self)'):
-                writer.gen_autoref_assign('val1', f'{c0}::_get_ref(self)')
-                for op in op_list1:
+            own_type = f'&{gen.typename}'
+            # 完全一致判定を行うクラスと PyTypeObject の辞書
+            type_dict = {c0: own_type}
+            for op in op_list1 + op_list2:
+                if op.is_exact and op.classname not in type_dict:
+                    type_var = f'{op.classname}_type'
+                    writer.write_line(f'static auto {type_var} = {op.classname}::_typeobject();')
+                    type_dict[op.classname] = type_var
+            writer.gen_auto_assign('self_type', 'Py_TYPE(self)')
+            if len(op_list1) > 0 or len(op_list2) > 0:
+                writer.gen_auto_assign('other_type', 'Py_TYPE(other)')
+                gen.gen_perf_count_type(writer,
+                                        f'self_type == {own_type} ? other_type : self_type')
+            with writer.gen_if_block(f'self_type == {own_type}'):
+                gen.gen_ref_conv(writer, refname='val1',
+                                 mutable=is_inplace)
+                if is_inplace:
+                    gen.gen_hash_invalidate(writer)
+                for op in self.__sort_ops(op_list1):
                     op(writer,
                        retclassname=c0,
                        objname='other',
-                       varname='val2')
+                       varname='val2',
+                       typevar='other_type',
+                       type_dict=type_dict,
+                       temp_gen=gen if reuse_temp else None)
             if len(op_list2) > 0:
-                with writer.gen_if_block(f'{c0}::Check(other)'):
+                with writer.gen_if_block(f'other_type == {own_type}'):
                     writer.gen_autoref_assign('val2', f'{c0}::_get_ref(other)')
-                    for op in op_list2:
+                    for op in self.__sort_ops(op_list2):
                         op(writer,
                            retclassname=c0,
                            objname='self',
-                           varname='val1')
+                           varname='val1',
+                           typevar='self_type',
+                           type_dict=type_dict)
             writer.gen_return_py_notimplemented()
         super().__init__(gen, name, None, body)
+        self.reuse_temp = reuse_temp
+
+    def __sort_ops(self, op_list):
+        """計測結果の型ごとの呼び出し回数の多い順に演算を並べ替える．
+
+        判定条件が重なる可能性のある演算同士は入れ替えない．
+        計測結果がない場合には元の順序のままとなる．
+        """
+        if self.gen.profile is None:
+            return op_list
+        def count(op):
+            return self.gen.profile_type_count(self.name, _op_tp_name(op, self.gen))
+        op_list = list(op_list)
+        for i in range(1, len(op_list)):
+            j = i
+            while j > 0 and _op_disjoint(op_list[j - 1], op_list[j], self.gen) \
+                  and count(op_list[j - 1]) < count(op_list[j]):
+                op_list[j - 1], op_list[j] = op_list[j], op_list[j - 1]
+                j -= 1
+        return op_list
 
     def __call__(self, writer, *,
                  comment=None,
@@ -282,12 +458,62 @@ class BinOpGen(FuncBase):
                                    comments=comments,
                                    return_type='PyObject*',
                                    func_name=self.name,
+                                   attr=self.gen.func_attr(self.name),
                                    args=args):
+            self.gen.gen_perf_probe(writer, self.name)
             with writer.gen_try_block():
                 self.body(writer)
             writer.gen_catch_invalid_argument()
 
 
+# 組み込み型の PyTypeObject と tp_name の辞書
+BUILTIN_TP_NAME_DICT = {
+    '&PyLong_Type': 'int',
+    '&PyFloat_Type': 'float',
+    '&PyBool_Type': 'bool',
+    '&PyUnicode_Type': 'str',
+}
+
+
+def _op_type_key(op, gen):
+    """判定条件に対応する型を返す．
+
+    型が一つに定まらない場合には None を返す．
+    """
+    if op.classname in BUILTIN_TYPE_DICT:
+        return BUILTIN_TYPE_DICT[op.classname]
+    if op.is_exact or op.classname == gen.pyclassname:
+        return op.classname
+    return None
+
+
+def _op_disjoint(op1, op2, gen):
+    """二つの演算の判定条件が重ならない時 True を返す．
+    """
+    key1 = _op_type_key(op1, gen)
+    key2 = _op_type_key(op2, gen)
+    if key1 is None or key2 is None or key1 == key2:
+        return False
+    # bool は int の派生クラス
+    if {key1, key2} == {'&PyLong_Type', '&PyBool_Type'}:
+        return False
+    return True
+
+
+def _op_tp_name(op, gen):
+    """演算の対象の型の tp_name を返す．
+
+    このツールで生成した他のクラスは同じモジュールの拡張クラスから探す．
+    型が分からない場合には None を返す．
+    """
+    key = _op_type_key(op, gen)
+    if key in BUILTIN_TP_NAME_DICT:
+        return BUILTIN_TP_NAME_DICT[key]
+    if op.classname == gen.pyclassname:
+        return gen.pyname
+    return gen.pyname_dict.get(op.classname, None)
+
+
 class NumberGen:
     """Number オブジェクト構造体を作るクラス
     """
@@ -335,7 +561,8 @@ class NumberGen:
     def add_add(self, func_name, *,
                 expr='default',
                 op_list1=[],
-                op_list2=[]):
+                op_list2=[],
+                reuse_temp=False):
         if self.nb_add is not None:
             raise ValueError('nb_add has been already defined')
         if expr is not None:
@@ -344,14 +571,16 @@ class NumberGen:
             else:
                 op = Op(self.pyclassname, expr)
             op_list1 = [op] + op_list1
-        self.nb_add = BinOpGen(self, func_name,
+        self.nb_add = BinOpGen(self.__gen, func_name,
                                op_list1=op_list1,
-                               op_list2=op_list2)
+                               op_list2=op_list2,
+                               reuse_temp=reuse_temp)
 
     def add_subtract(self, func_name, *,
                      expr='default',
                      op_list1=[],
-                     op_list2=[]):
+                     op_list2=[],
+                     reuse_temp=False):
         if self.nb_subtract is not None:
             raise ValueError('nb_subtract has been already defined')
         if expr is not None:
@@ -360,14 +589,16 @@ class NumberGen:
             else:
                 op = Op(self.pyclassname, expr)
             op_list1 = [op] + op_list1
-        self.nb_subtract = BinOpGen(self, func_name,
+        self.nb_subtract = BinOpGen(self.__gen, func_name,
                                     op_list1=op_list1,
-                                    op_list2=op_list2)
+                                    op_list2=op_list2,
+                                    reuse_temp=reuse_temp)
 
     def add_multiply(self, func_name, *,
                      expr='default',
                      op_list1=[],
-                     op_list2=[]):
+                     op_list2=[],
+                     reuse_temp=False):
         if self.nb_multiply is not None:
             raise ValueError('nb_multiply has been already defined')
         if expr is not None:
@@ -376,14 +607,16 @@ class NumberGen:
             else:
                 op = Op(self.pyclassname, expr)
             op_list1 = [op] + op_list1
-        self.nb_multiply = BinOpGen(self, func_name,
+        self.nb_multiply = BinOpGen(self.__gen, func_name,
                                     op_list1=op_list1,
-                                    op_list2=op_list2)
+                                    op_list2=op_list2,
+                                    reuse_temp=reuse_temp)
 
     def add_remainder(self, func_name, *,
                       expr='default',
                       op_list1=[],
-                      op_list2=[]):
+                      op_list2=[],
+                      reuse_temp=False):
         if self.nb_remainder is not None:
             raise ValueError('nb_remainder has been already defined')
         if expr is not None:
@@ -392,9 +625,10 @@ class NumberGen:
             else:
                 op = Op(self.pyclassname, expr)
             op_list1 = [op] + op_list1
-        self.nb_remainder = BinOpGen(self, func_name,
+        self.nb_remainder = BinOpGen(self.__gen, func_name,
                                      op_list1=op_list1,
-                                     op_list2=op_list2)
+                                     op_list2=op_list2,
+                                     reuse_temp=reuse_temp)
 
     def add_divmod(self, func_name, *,
                    expr=None,
@@ -405,7 +639,7 @@ class NumberGen:
         if expr is not None:
             op = Op(self.pyclassname, expr)
             op_list1 = [op] + op_list1
-        self.nb_divmod = BinOpGen(self, func_name,
+        self.nb_divmod = BinOpGen(self.__gen, func_name,
                                   op_list1=op_list1,
                                   op_list2=op_list2)
 
@@ -441,7 +675,8 @@ class NumberGen:
 
     def add_lshift(self, func_name, *,
                    expr='default',
-                   op_list1=[]):
+                   op_list1=[],
+                   reuse_temp=False):
         if self.nb_lshift is not None:
             raise ValueError('nb_lshift has been already defined')
         if expr is not None:
@@ -450,12 +685,14 @@ class NumberGen:
             else:
                 op = Op(self.pyclassname, expr)
             op_list1 = [op] + op_list1
-        self.nb_lshift = BinOpGen(self, func_name,
-                                  op_list1=op_list1)
+        self.nb_lshift = BinOpGen(self.__gen, func_name,
+                                  op_list1=op_list1,
+                                  reuse_temp=reuse_temp)
 
     def add_rshift(self, func_name, *,
                    expr='default',
-                   op_list1=[]):
+                   op_list1=[],
+                   reuse_temp=False):
         if self.nb_rshift is not None:
             raise ValueError('nb_rshift has been already defined')
         if expr is not None:
@@ -464,13 +701,15 @@ class NumberGen:
             else:
                 op = Op(self.pyclassname, expr)
             op_list1 = [op] + op_list1
-        self.nb_rshift = BinOpGen(self, func_name,
-                                  op_list1=op_list1)
+        self.nb_rshift = BinOpGen(self.__gen, func_name,
+                                  op_list1=op_list1,
+                                  reuse_temp=reuse_temp)
 
     def add_and(self, func_name, *,
                 expr='default',
                 op_list1=[],
-                op_list2=[]):
+                op_list2=[],
+                reuse_temp=False):
         if self.nb_and is not None:
             raise ValueError('nb_and has been already defined')
         if expr is not None:
@@ -479,14 +718,16 @@ class NumberGen:
             else:
                 op = Op(self.pyclassname, expr)
             op_list1 = [op] + op_list1
-        self.nb_and = BinOpGen(self, func_name,
+        self.nb_and = BinOpGen(self.__gen, func_name,
                                op_list1=op_list1,
-                               op_list2=op_list2)
+                               op_list2=op_list2,
+                               reuse_temp=reuse_temp)
 
     def add_xor(self, func_name, *,
                 expr='default',
                 op_list1=[],
-                op_list2=[]):
+                op_list2=[],
+                reuse_temp=False):
         if self.nb_xor is not None:
             raise ValueError('nb_xor has been already defined')
         if expr is not None:
@@ -495,14 +736,16 @@ class NumberGen:
             else:
                 op = Op(self.pyclassname, expr)
             op_list1 = [op] + op_list1
-        self.nb_xor = BinOpGen(self, func_name,
+        self.nb_xor = BinOpGen(self.__gen, func_name,
                                op_list1=op_list1,
-                               op_list2=op_list2)
+                               op_list2=op_list2,
+                               reuse_temp=reuse_temp)
 
     def add_or(self, func_name, *,
                expr='default',
                op_list1=[],
-               op_list2=[]):
+               op_list2=[],
+               reuse_temp=False):
         if self.nb_or is not None:
             raise ValueError('nb_or has been already defined')
         if expr is not None:
@@ -511,9 +754,10 @@ class NumberGen:
             else:
                 op = Op(self.pyclassname, expr)
             op_list1 = [op] + op_list1
-        self.nb_or = BinOpGen(self, func_name,
+        self.nb_or = BinOpGen(self.__gen, func_name,
                               op_list1=op_list1,
-                              op_list2=op_list2)
+                              op_list2=op_list2,
+                              reuse_temp=reuse_temp)
 
     def add_int(self, body):
         if self.nb_int is not None:
@@ -536,8 +780,9 @@ class NumberGen:
             else:
                 op = Iop(self.pyclassname, stmt)
             op_list1 = [op] + op_list1
-        self.nb_inplace_add = BinOpGen(self, func_name,
-                                       op_list1=op_list1)
+        self.nb_inplace_add = BinOpGen(self.__gen, func_name,
+                                       op_list1=op_list1,
+                                       is_inplace=True)
 
     def add_inplace_subtract(self, func_name, *,
                              stmt='default',
@@ -550,8 +795,9 @@ class NumberGen:
             else:
                 op = Iop(self.pyclassname, stmt)
             op_list1 = [op] + op_list1
-        self.nb_inplace_subtract = BinOpGen(self, func_name,
-                                            op_list1=op_list1)
+        self.nb_inplace_subtract = BinOpGen(self.__gen, func_name,
+                                            op_list1=op_list1,
+                                            is_inplace=True)
 
     def add_inplace_multiply(self, func_name, *,
                              stmt='default',
@@ -564,8 +810,9 @@ class NumberGen:
             else:
                 op = Iop(self.pyclassname, stmt)
             op_list1 = [op] + op_list1
-        self.nb_inplace_multiply = BinOpGen(self, func_name,
-                                            op_list1=op_list1)
+        self.nb_inplace_multiply = BinOpGen(self.__gen, func_name,
+                                            op_list1=op_list1,
+                                            is_inplace=True)
 
     def add_inplace_remainder(self, func_name, *,
                               stmt='default',
@@ -578,8 +825,9 @@ class NumberGen:
             else:
                 op = Iop(self.pyclassname, stmt)
             op_list1 = [op] + op_list1
-        self.nb_inplace_remainder = BinOpGen(self, func_name,
-                                             op_list1=op_list1)
+        self.nb_inplace_remainder = BinOpGen(self.__gen, func_name,
+                                             op_list1=op_list1,
+                                             is_inplace=True)
 
     def add_inplace_power(self, body):
         if self.nb_inplace_power is not None:
@@ -597,8 +845,9 @@ class NumberGen:
             else:
                 op = Iop(self.pyclassname, stmt)
             op_list1 = [op] + op_list1
-        self.nb_inplace_lshift = BinOpGen(self, func_name,
-                                          op_list1=op_list1)
+        self.nb_inplace_lshift = BinOpGen(self.__gen, func_name,
+                                          op_list1=op_list1,
+                                          is_inplace=True)
 
     def add_inplace_rshift(self, func_name, *,
                            stmt='default',
@@ -611,8 +860,9 @@ class NumberGen:
             else:
                 op = Iop(self.pyclassname, stmt)
             op_list1 = [op] + op_list1
-        self.nb_inplace_rshift = BinOpGen(self, func_name,
-                                          op_list1=op_list1)
+        self.nb_inplace_rshift = BinOpGen(self.__gen, func_name,
+                                          op_list1=op_list1,
+                                          is_inplace=True)
 
     def add_inplace_and(self, func_name, *,
                         stmt='default',
@@ -625,8 +875,9 @@ class NumberGen:
             else:
                 op = Iop(self.pyclassname, stmt)
             op_list1 = [op] + op_list1
-        self.nb_inplace_and = BinOpGen(self, func_name,
-                                       op_list1=op_list1)
+        self.nb_inplace_and = BinOpGen(self.__gen, func_name,
+                                       op_list1=op_list1,
+                                       is_inplace=True)
 
     def add_inplace_xor(self, func_name, *,
                         stmt='default',
@@ -639,8 +890,9 @@ class NumberGen:
             else:
                 op = Iop(self.pyclassname, stmt)
             op_list1 = [op] + op_list1
-        self.nb_inplace_xor = BinOpGen(self, func_name,
-                                       op_list1=op_list1)
+        self.nb_inplace_xor = BinOpGen(self.__gen, func_name,
+                                       op_list1=op_list1,
+                                       is_inplace=True)
 
     def add_inplace_or(self, func_name, *,
                        stmt='default',
@@ -653,26 +905,30 @@ class NumberGen:
             else:
                 op = Iop(self.pyclassname, stmt)
             op_list1 = [op] + op_list1
-        self.nb_inplace_or = BinOpGen(self, func_name,
-                                      op_list1=op_list1)
+        self.nb_inplace_or = BinOpGen(self.__gen, func_name,
+                                      op_list1=op_list1,
+                                      is_inplace=True)
 
     def add_floor_divide(self, func_name, *,
                          expr=None,
                          op_list1=[],
-                         op_list2=[]):
+                         op_list2=[],
+                         reuse_temp=False):
         if self.nb_floor_divide is not None:
             raise ValueError('nb_floor_divide has been already defined')
         if expr is not None:
             op = Op(self.pyclassname, expr)
             op_list1 = [op] + op_list1
-        self.nb_floor_divide = BinOpGen(self, func_name,
+        self.nb_floor_divide = BinOpGen(self.__gen, func_name,
                                         op_list1=op_list1,
-                                        op_list2=op_list2)
+                                        op_list2=op_list2,
+                                        reuse_temp=reuse_temp)
 
     def add_true_divide(self, func_name, *,
                         expr='default',
                         op_list1=[],
-                        op_list2=[]):
+                        op_list2=[],
+                        reuse_temp=False):
         if self.nb_true_divide is not None:
             raise ValueError('nb_divide has been already defined')
         if expr is not None:
@@ -681,9 +937,10 @@ class NumberGen:
             else:
                 op = Op(self.pyclassname, expr)
             op_list1 = [op] + op_list1
-        self.nb_true_divide = BinOpGen(self, func_name,
+        self.nb_true_divide = BinOpGen(self.__gen, func_name,
                                        op_list1=op_list1,
-                                       op_list2=op_list2)
+                                       op_list2=op_list2,
+                                       reuse_temp=reuse_temp)
 
     def add_inplace_floor_divide(self, func_name, *,
                                  stmt=None,
@@ -693,8 +950,9 @@ class NumberGen:
         if stmt is not None:
             op = Iop(self.pyclassname, stmt)
             op_list1 = [op] + op_list1
-        self.nb_inplace_floor_divide = BinOpGen(self, func_name,
-                                                op_list1=op_list1)
+        self.nb_inplace_floor_divide = BinOpGen(self.__gen, func_name,
+                                                op_list1=op_list1,
+                                                is_inplace=True)
 
     def add_inplace_true_divide(self, func_name, *,
                                 stmt=None,
@@ -707,8 +965,9 @@ class NumberGen:
             else:
                 op = Iop(self.pyclassname, stmt)
             op_list1 = [op] + op_list1
-        self.nb_inplace_true_divide = BinOpGen(self, func_name,
-                                               op_list1=op_list1)
+        self.nb_inplace_true_divide = BinOpGen(self.__gen, func_name,
+                                               op_list1=op_list1,
+                                               is_inplace=True)
 
     def add_index(self, body):
         if self.nb_index is not None:
@@ -718,15 +977,17 @@ class NumberGen:
     def add_matrix_multiply(self, func_name, *,
                             expr=None,
                             op_list1=[],
-                            op_list2=[]):
+                            op_list2=[],
+                            reuse_temp=False):
         if self.nb_matrix_multiply is not None:
             raise ValueError('nb_matrix_multiply has been already defined')
         if expr is not None:
             op = Op(self.pyclassname, expr)
             op_list1 = [op] + op_list1
-        self.nb_matrix_multiply = BinOpGen(self, func_name,
+        self.nb_matrix_multiply = BinOpGen(self.__gen, func_name,
                                            op_list1=op_list1,
-                                           op_list2=op_list2)
+                                           op_list2=op_list2,
+                                           reuse_temp=reuse_temp)
 
     def add_inplace_matrix_multiply(self, func_name, *,
                                     stmt=None,
@@ -736,11 +997,21 @@ class NumberGen:
         if stmt is not None:
             op = Iop(self.pyclassname, stmt)
             op_list1 = [op] + op_list1
-        self.nb_inplace_matrix_multiply = BinOpGen(self, func_name,
-                                                   op_list1=op_list1)
+        self.nb_inplace_matrix_multiply = BinOpGen(self.__gen, func_name,
+                                                   op_list1=op_list1,
+                                                   is_inplace=True)
 
 
     def __call__(self, writer):
+        # 一時オブジェクトの判定関数を生成する．
+        binop_list = [self.nb_add, self.nb_subtract, self.nb_multiply,
+                      self.nb_remainder, self.nb_lshift, self.nb_rshift,
+                      self.nb_and, self.nb_xor, self.nb_or,
+                      self.nb_floor_divide, self.nb_true_divide,
+                      self.nb_matrix_multiply]
+        if any(binop is not None and binop.reuse_temp for binop in binop_list):
+            self.__gen_temp_check(writer)
+
         # 個々の関数を生成する．
         gen_func(self.nb_add, writer)
         gen_func(self.nb_subtract, writer)
@@ -826,3 +1097,21 @@ class NumberGen:
     def gen_tp(self, writer):
         writer.gen_assign(f'{self.__gen.typename}.tp_as_number',
                           f'&{self.name}')
+
+    def __gen_temp_check(self, writer):
+        args = [CArg.PyArg('obj')]
+        with writer.gen_func_block(comment='obj が他から参照されていない一時オブジェクトの時 true を返す．',
+                                   return_type='inline bool',
+                                   func_name='is_temporary',
+                                   args=args):
+            if self.__gen.has_view:
+                # ビューオブジェクトの値は親の値なので書き換えてはいけない．
+                gen = self.__gen
+                with writer.gen_if_block(f'reinterpret_cast<{gen.objectname}*>(obj)->mPtr != nullptr'):
+                    writer.gen_return('false')
+            # Python 3.14 以降はスタック上の参照が参照数に数えられないことがある．
+            writer.write_pp_line('#if PY_VERSION_HEX >= 0x030E0000')
+            writer.gen_return('PyUnstable_Object_IsUniqueReferencedTemporary(obj)')
+            writer.write_pp_line('#else')
+            writer.gen_return('Py_REFCNT(obj) == 1')
+            writer.write_pp_line('#endif')
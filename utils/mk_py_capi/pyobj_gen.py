@@ -29,6 +29,8 @@ from .funcgen import ObjObjProcGen
 from .funcgen import ObjObjArgProcGen
 from .funcgen import ConvGen
 from .funcgen import DeconvGen
+from .funcgen import ViewConvGen
+from .funcgen import SharedGen
 from .funcgen import CArg
 from .number_gen import NumberGen
 from .sequence_gen import SequenceGen
@@ -37,6 +39,7 @@ from .method_gen import MethodGen
 from .getset_gen import GetSetGen
 from .utils import gen_func
 from .cxxwriter import CxxWriter
+from .arg import OptArg, RawArg, IntArg, RawObjArg
 
 
 class ConvDefGen:
@@ -80,10 +83,12 @@ class ToDefGen:
     """%%TOPYOBJECT%% の置換を行うクラス
     """
 
-    def __init__(self, conv_gen, deconv_gen):
+    def __init__(self, conv_gen, deconv_gen, view_gen=None, shared_gen=None):
         self.__to_def_pat = re.compile('^(\s*)%%TOPYOBJECT%%$')
         self.__conv_gen = conv_gen
         self.__deconv_gen = deconv_gen
+        self.__view_gen = view_gen
+        self.__shared_gen = shared_gen
 
     def __call__(self, line, writer):
         result = self.__to_def_pat.match(line)
@@ -93,6 +98,16 @@ class ToDefGen:
                 writer.indent_set(len(result.group(1)))
                 self.__conv_gen.gen_tofunc(writer)
                 writer.indent_set(0)
+            # ToPyView の宣言
+            if self.__view_gen is not None:
+                writer.indent_set(len(result.group(1)))
+                self.__view_gen.gen_decl(writer)
+                writer.indent_set(0)
+            # 共有ポインタ用の関数の宣言
+            if self.__shared_gen is not None:
+                writer.indent_set(len(result.group(1)))
+                self.__shared_gen.gen_decl(writer)
+                writer.indent_set(0)
             # FromPyObject の宣言
             if self.__deconv_gen is not None:
                 writer.indent_set(len(result.group(1)))
@@ -147,12 +162,45 @@ class TpInitGen:
         if result:
             # tp_XXX 設定の置換
             writer.indent_set(len(result.group(1)))
-            self.__gen.make_tp_init(writer)
+            self.__gen.make_tp_init_code(writer)
             writer.indent_set(0)
             return True
         return False
 
 
+class ReadyDefGen:
+    """%%READY_DEF%% の置換を行うクラス
+    """
+
+    def __init__(self, gen):
+        self.__gen = gen
+        self.__ready_def_pat = re.compile('^(\s*)%%READY_DEF%%$')
+
+    def __call__(self, line, writer):
+        result = self.__ready_def_pat.match(line)
+        if result:
+            # ready() の宣言の置換
+            writer.indent_set(len(result.group(1)))
+            self.__gen.make_ready_def(writer)
+            writer.indent_set(0)
+            return True
+        return False
+
+
+class ReadyCodeGen:
+    """%%READY_CODE%% の置換を行うクラス
+    """
+
+    def __init__(self, gen):
+        self.__gen = gen
+
+    def __call__(self, line, writer):
+        if line == '%%READY_CODE%%':
+            self.__gen.make_ready_code(writer)
+            return True
+        return False
+
+
 class ExInitGen:
     """%%EX_INIT_CODE%% の置換を行うクラス
     """
@@ -172,6 +220,44 @@ class ExInitGen:
         return False
 
 
+class ExtraMembersGen:
+    """%%EXTRA_MEMBERS%% の置換を行うクラス
+    """
+
+    def __init__(self, gen):
+        self.__gen = gen
+        self.__extra_members_pat = re.compile('^(\s*)%%EXTRA_MEMBERS%%$')
+
+    def __call__(self, line, writer):
+        result = self.__extra_members_pat.match(line)
+        if result:
+            # オブジェクト構造体の追加のメンバの置換
+            writer.indent_set(len(result.group(1)))
+            self.__gen.make_extra_members(writer)
+            writer.indent_set(0)
+            return True
+        return False
+
+
+class GetRefCodeGen:
+    """%%GET_REF_CODE%% の置換を行うクラス
+    """
+
+    def __init__(self, gen):
+        self.__gen = gen
+        self.__get_ref_pat = re.compile('^(\s*)%%GET_REF_CODE%%$')
+
+    def __call__(self, line, writer):
+        result = self.__get_ref_pat.match(line)
+        if result:
+            # _get_ref() の本体の置換
+            writer.indent_set(len(result.group(1)))
+            self.__gen.make_get_ref_code(writer)
+            writer.indent_set(0)
+            return True
+        return False
+
+
 class ConvCodeGen:
     """%%CONV_CODE%% の置換を行うクラス
     """
@@ -186,6 +272,24 @@ class ConvCodeGen:
         return False
 
 
+class PxdGen:
+    """.pxd ファイルの %%NAME%% の置換を行うクラス
+    """
+
+    def __init__(self, name, gen_func):
+        self.__pat = re.compile(f'^(\\s*)%%{name}%%$')
+        self.__gen_func = gen_func
+
+    def __call__(self, line, writer):
+        result = self.__pat.match(line)
+        if result:
+            writer.indent_set(len(result.group(1)))
+            self.__gen_func(writer)
+            writer.indent_set(0)
+            return True
+        return False
+
+
 class PyObjGen(GenBase):
     """PyObject の拡張クラスを生成するクラス
     """
@@ -197,9 +301,18 @@ class PyObjGen(GenBase):
                  typename=None,
                  objectname=None,
                  pyname,
+                 storage='inline',
+                 intern=False,
+                 item_type=None,
+                 deferred_dealloc=False,
+                 instrument=False,
+                 profile=None,
+                 shared_runtime=False,
                  header_include_files=[],
                  source_include_files=[]):
-        super().__init__()
+        super().__init__(instrument=instrument,
+                         profile=profile,
+                         shared_runtime=shared_runtime)
 
         # C++ のクラス名
         self.classname = classname
@@ -219,10 +332,54 @@ class PyObjGen(GenBase):
         self.objectname = objectname
         # Python のクラス名
         self.pyname = pyname
+        # 値の保持方法
+        # - 'inline': オブジェクト構造体に値を直接持つ．
+        # - 'shared_ptr': std::shared_ptr<const classname> を持つ．
+        #   コピーの代わりに所有権を共有する．
+        #   値の変更時には必要に応じて複製する(copy-on-write)．
+        #   ToPyObject(std::shared_ptr<const classname>) で渡された値は
+        #   const の可能性があるので最初の変更時に必ず複製する．
+        if storage not in ('inline', 'shared_ptr'):
+            raise ValueError(f'{storage}: unknown storage type')
+        self.storage = storage
+        # 等しい値に対して同一のオブジェクトを返す時 True
+        # ToPyObject() はハッシュ値と operator== で等しい値を持つ
+        # 既存のオブジェクトを探して返す．
+        # 値を変更する関数(setter, in-place 演算，reuse_temp=True の二項演算など)
+        # を持つ型では用いることができない．
+        self.intern = intern
+        # 可変長オブジェクトの要素の型(None の時は固定長)
+        # 要素はオブジェクト構造体の直後(tp_basicsize の位置)に置かれ，
+        # _get_items() で std::span として取り出せる．
+        # 要素の型はトリビアルに破棄できる型でなければならない．
+        # 要素は mVal に含まれないので mVal だけから値を作る
+        # add_copy(), add_pickle(), add_view() は用いることができない．
+        self.item_type = item_type
+        # 値の破壊をバックグラウンドのスレッドで行う時 True
+        # dealloc は mVal をムーブして PyDeferredDealloc のキューに入れる．
+        # 値は Python オブジェクトを保持していてはいけない．
+        self.deferred_dealloc = deferred_dealloc
+        # 初期化の際に先に初期化しておく必要のある拡張クラス名のリスト
+        # ModuleGen(lazy=True) で用いられる．
+        self.depends = []
+        # unity ビルド用に無名名前空間の中身を入れる名前空間名
+        # (None の時は用いない)
+        # ModuleGen.make_all() で設定される．
+        self.unity_namespace = None
+        # 型オブジェクトの準備(PyType_Ready())とモジュールへの登録を
+        # 分ける時 True
+        # ModuleGen(lazy=True) で設定される．
+        # この場合，init() の前に Conv などが用いられても良いように
+        # モジュールの初期化時に ready() を呼び出しておく．
+        self.lazy = False
 
         # ヘッダファイル用のインクルードファイルリスト
+        if item_type is not None and '<span>' not in header_include_files:
+            header_include_files = header_include_files + ['<span>']
         self.header_include_files = header_include_files
         # ソースファイル用のインクルードファイルリスト
+        if deferred_dealloc:
+            source_include_files = source_include_files + ['pym/PyDeferredDealloc.h']
         self.source_include_files = source_include_files
 
         # プリアンブル出力器
@@ -237,6 +394,18 @@ class PyObjGen(GenBase):
         self.__richcompare_gen = None
         self.__init_gen = None
         self.__new_gen = None
+        self.__has_constructor = False
+
+        # ハッシュ値をキャッシュする時 True
+        self.__hash_cache = False
+
+        # 値を変更する関数名のリスト
+        self.__mutator_list = []
+
+        # 同一性キャッシュのキーを表す式(None の時はキャッシュしない)
+        self.__identity_key = None
+        # 同一性キャッシュの最大要素数
+        self.__identity_max_size = None
 
         # Number 構造体の定義
         self.__number_gen = None
@@ -262,8 +431,39 @@ class PyObjGen(GenBase):
         # PyObject からの逆変換を行うコード
         self.__deconv_gen = None
 
-        self.basicsize = f'sizeof({self.objectname})'
-        self.itemsize = '0'
+        # ビューオブジェクトを作るコード
+        self.__view_gen = None
+
+        # to_shared()/from_shared() を持つ時 True
+        self.__has_shared_array = False
+
+        # __copy__()/__deepcopy__() を持つ時 True
+        self.__has_copy = False
+
+        # __reduce_ex__()/_from_pickle() を持つ時 True
+        self.__has_pickle = False
+
+        # C++ のヒープ上の大きさを求める関数の本体
+        self.__heap_size_body = None
+        # tracemalloc に報告する時のドメイン番号
+        self.__trace_domain = None
+
+        # 共有ポインタ用の関数を作るコード
+        if storage == 'shared_ptr':
+            self.__shared_gen = SharedGen(self)
+        else:
+            self.__shared_gen = None
+
+        if item_type is None:
+            self.basicsize = f'sizeof({self.objectname})'
+            self.itemsize = '0'
+        else:
+            # 可変長の要素はオブジェクト構造体の直後に置かれる．
+            # 構造体は標準レイアウトとは限らないので offsetof() は用いずに
+            # sizeof() を要素の境界に切り上げた値を用いる．
+            self.basicsize = (f'(sizeof({self.objectname}) + alignof({item_type}) - 1)'
+                              f' / alignof({item_type}) * alignof({item_type})')
+            self.itemsize = f'sizeof({item_type})'
         self.flags = 'Py_TPFLAGS_DEFAULT'
 
         # 説明文
@@ -293,13 +493,102 @@ class PyObjGen(GenBase):
         self.__repr_gen = ReprFuncGen(self, func_name, func_body)
 
     def add_hash(self, func_body=None, *,
-                 func_name=None):
+                 func_name=None,
+                 cache=False):
         """hash 関数定義を追加する．
+
+        cache=True の場合，計算したハッシュ値をオブジェクト構造体に保持する．
+        キャッシュは setter, in-place 演算, sq_ass_item などの
+        値を変更する関数で無効化される．
+        値を変更するメソッドは add_method(..., mutator=True) で登録すること．
+        0 は未計算を表すので，ハッシュ値が 0 の場合は毎回計算し直される．
+        ビュー(add_view())の値は親オブジェクトの変更で変わるので
+        ビューのハッシュ値はキャッシュされない．
         """
         if self.__hash_gen is not None:
             raise ValueError('hash has been already defined')
         func_name = self.complete_name(func_name, 'hash_func')
-        self.__hash_gen = HashFuncGen(self, func_name, func_body)
+        self.__hash_gen = HashFuncGen(self, func_name, func_body,
+                                      cache=cache)
+        self.__hash_cache = cache
+
+    def add_dependency(self, *pyclassnames):
+        """先に初期化しておく必要のある拡張クラスを追加する．
+
+        このクラスのメソッドなどが生成するオブジェクトの型や
+        基底クラスの型を指定する．
+        ModuleGen(lazy=True) の場合，このクラスの初期化の前に
+        指定されたクラスが初期化される．
+        """
+        for pyclassname in pyclassnames:
+            if pyclassname not in self.depends:
+                self.depends.append(pyclassname)
+
+    def add_identity_cache(self, key_expr='val', *,
+                           max_size=4096):
+        """同一性キャッシュを追加する．
+
+        key_expr は val(変換元の値) から C++ オブジェクトのポインタを
+        取り出す式で，ポインタを保持するラッパー型で用いる．
+        Conv はポインタから Python オブジェクトへの対応表を参照して
+        同じポインタに対しては同じ Python オブジェクトを返す．
+        対応表は参照カウントを持たない(弱参照)ので dealloc で削除される．
+        max_size を超える場合には登録せずに毎回新しいオブジェクトを作る．
+        値を変更する関数(setter, in-place 演算，reuse_temp=True の二項演算など)
+        を持つ型では用いることができない．
+        """
+        if self.__identity_key is not None:
+            raise ValueError('identity_cache has been already defined')
+        self.__identity_key = key_expr
+        self.__identity_max_size = max_size
+
+    @property
+    def perf_prefix(self):
+        """計測結果の名前の接頭辞を返す．
+        """
+        return self.pyname
+
+    @property
+    def is_interned(self):
+        """インターン化を行う時 True を返す．
+        """
+        return self.intern
+
+    @property
+    def has_identity_cache(self):
+        """同一性キャッシュを持つ時 True を返す．
+        """
+        return self.__identity_key is not None
+
+    def add_view(self):
+        """ビューオブジェクトを作る ToPyView() を追加する．
+
+        ビューオブジェクトは値をコピーせずに親の C++ オブジェクト中の
+        値へのポインタと親の Python オブジェクトへの参照を持つ．
+        _get_ref() は通常のオブジェクトと同様に値の参照を返すので
+        他の関数はビューかどうかを意識する必要はない．
+        """
+        if self.__view_gen is not None:
+            raise ValueError('view has been already defined')
+        self.__view_gen = ViewConvGen(self)
+
+    @property
+    def has_conv(self):
+        """Conv を持つ時 True を返す．
+        """
+        return self.__conv_gen is not None
+
+    @property
+    def has_deconv(self):
+        """Deconv を持つ時 True を返す．
+        """
+        return self.__deconv_gen is not None
+
+    @property
+    def has_view(self):
+        """ビューオブジェクトを作れる時 True を返す．
+        """
+        return self.__view_gen is not None
 
     def add_ex_init(self, gen_body):
         if self.__ex_init_gen is not None:
@@ -338,21 +627,28 @@ class PyObjGen(GenBase):
                    func_name=None,
                    expr='default',
                    op_list1=[],
-                   op_list2=[]):
+                   op_list2=[],
+                   reuse_temp=False):
         """nb_add の関数定義を追加する．
+
+        reuse_temp=True の場合，左オペランドが一時オブジェクトの時には
+        その領域を再利用して結果を格納する．
+        他の二項演算の reuse_temp も同様．
         """
         self.__check_number()
         func_name = self.complete_name(func_name, 'nb_add')
         self.__number_gen.add_add(func_name,
                                   expr=expr,
                                   op_list1=op_list1,
-                                  op_list2=op_list2)
+                                  op_list2=op_list2,
+                                  reuse_temp=reuse_temp)
 
     def add_nb_subtract(self, *,
                         func_name=None,
                         expr='default',
                         op_list1=[],
-                        op_list2=[]):
+                        op_list2=[],
+                        reuse_temp=False):
         """nb_subtract の関数定義を追加する．
         """
         self.__check_number()
@@ -360,13 +656,15 @@ class PyObjGen(GenBase):
         self.__number_gen.add_subtract(func_name,
                                        expr=expr,
                                        op_list1=op_list1,
-                                       op_list2=op_list2)
+                                       op_list2=op_list2,
+                                       reuse_temp=reuse_temp)
 
     def add_nb_multiply(self, *,
                         func_name=None,
                         expr='default',
                         op_list1=[],
-                        op_list2=[]):
+                        op_list2=[],
+                        reuse_temp=False):
         """nb_multiply の関数定義を追加する．
         """
         self.__check_number()
@@ -374,13 +672,15 @@ class PyObjGen(GenBase):
         self.__number_gen.add_multiply(func_name,
                                        expr=expr,
                                        op_list1=op_list1,
-                                       op_list2=op_list2)
+                                       op_list2=op_list2,
+                                       reuse_temp=reuse_temp)
 
     def add_nb_remainder(self, *,
                          func_name=None,
                          expr='default',
                          op_list1=[],
-                         op_list2=[]):
+                         op_list2=[],
+                         reuse_temp=False):
         """nb_remainder の関数定義を追加する．
         """
         self.__check_number()
@@ -388,7 +688,8 @@ class PyObjGen(GenBase):
         self.__number_gen.add_remainder(func_name,
                                         expr=expr,
                                         op_list1=op_list1,
-                                        op_list2=op_list2)
+                                        op_list2=op_list2,
+                                        reuse_temp=reuse_temp)
 
     def add_nb_divmod(self, *,
                       func_name=None,
@@ -465,32 +766,37 @@ class PyObjGen(GenBase):
     def add_nb_lshift(self, *,
                       func_name=None,
                       expr='default',
-                      op_list1=[]):
+                      op_list1=[],
+                      reuse_temp=False):
         """nb_lshift の関数定義を追加する．
         """
         self.__check_number()
         func_name = self.complete_name(func_name, 'nb_lshift')
         self.__number_gen.add_lshift(func_name,
                                      expr=expr,
-                                     op_list1=op_list1)
+                                     op_list1=op_list1,
+                                     reuse_temp=reuse_temp)
 
     def add_nb_rshift(self, *,
                       func_name=None,
                       expr='default',
-                      op_list1=[]):
+                      op_list1=[],
+                      reuse_temp=False):
         """nb_rshift の関数定義を追加する．
         """
         self.__check_number()
         func_name = self.complete_name(func_name, 'nb_rshift')
         self.__number_gen.add_rshift(func_name,
                                      expr=expr,
-                                     op_list1=op_list1)
+                                     op_list1=op_list1,
+                                     reuse_temp=reuse_temp)
 
     def add_nb_and(self, *,
                    func_name=None,
                    expr='default',
                    op_list1=[],
-                   op_list2=[]):
+                   op_list2=[],
+                   reuse_temp=False):
         """nb_and の関数定義を追加する．
         """
         self.__check_number()
@@ -498,13 +804,15 @@ class PyObjGen(GenBase):
         self.__number_gen.add_and(func_name,
                                   expr=expr,
                                   op_list1=op_list1,
-                                  op_list2=op_list2)
+                                  op_list2=op_list2,
+                                  reuse_temp=reuse_temp)
 
     def add_nb_xor(self, *,
                    func_name=None,
                    expr='default',
                    op_list1=[],
-                   op_list2=[]):
+                   op_list2=[],
+                   reuse_temp=False):
         """nb_xor の関数定義を追加する．
         """
         self.__check_number()
@@ -512,13 +820,15 @@ class PyObjGen(GenBase):
         self.__number_gen.add_xor(func_name,
                                   expr=expr,
                                   op_list1=op_list1,
-                                  op_list2=op_list2)
+                                  op_list2=op_list2,
+                                  reuse_temp=reuse_temp)
 
     def add_nb_or(self, *,
                   func_name=None,
                   expr='default',
                   op_list1=[],
-                  op_list2=[]):
+                  op_list2=[],
+                  reuse_temp=False):
         """nb_or の関数定義を追加する．
         """
         self.__check_number()
@@ -526,7 +836,8 @@ class PyObjGen(GenBase):
         self.__number_gen.add_or(func_name,
                                  expr=expr,
                                  op_list1=op_list1,
-                                 op_list2=op_list2)
+                                 op_list2=op_list2,
+                                 reuse_temp=reuse_temp)
 
     def add_nb_int(self, *,
                    func_name=None,
@@ -601,7 +912,8 @@ class PyObjGen(GenBase):
         """
         self.__check_number()
         func_name = self.complete_name(func_name, 'nb_inplace_power')
-        self.__number_gen.add_inplace_power(self.new_ternaryfunc(func_name, body))
+        self.__number_gen.add_inplace_power(self.new_ternaryfunc(func_name, body,
+                                                                 is_mutator=True))
 
     def add_nb_inplace_lshift(self, *,
                               func_name=None,
@@ -667,7 +979,8 @@ class PyObjGen(GenBase):
                             func_name=None,
                             expr,
                             op_list1=[],
-                            op_list2=[]):
+                            op_list2=[],
+                            reuse_temp=False):
         """nb_floor_divide の関数定義を追加する．
         """
         self.__check_number()
@@ -675,13 +988,15 @@ class PyObjGen(GenBase):
         self.__number_gen.add_floor_divide(func_name,
                                            expr=expr,
                                            op_list1=op_list1,
-                                           op_list2=op_list2)
+                                           op_list2=op_list2,
+                                           reuse_temp=reuse_temp)
 
     def add_nb_true_divide(self, *,
                            func_name=None,
                            expr='default',
                            op_list1=[],
-                           op_list2=[]):
+                           op_list2=[],
+                           reuse_temp=False):
         """nb_true_divide の関数定義を追加する．
         """
         self.__check_number()
@@ -689,7 +1004,8 @@ class PyObjGen(GenBase):
         self.__number_gen.add_true_divide(func_name,
                                           expr=expr,
                                           op_list1=op_list1,
-                                          op_list2=op_list2)
+                                          op_list2=op_list2,
+                                          reuse_temp=reuse_temp)
 
     def add_nb_inplace_floor_divide(self, *,
                                     func_name=None,
@@ -728,7 +1044,8 @@ class PyObjGen(GenBase):
                                func_name=None,
                                expr='default',
                                op_list1=[],
-                               op_list2=[]):
+                               op_list2=[],
+                               reuse_temp=False):
         """nb_matrix_multiply の関数定義を追加する．
         """
         self.__check_number()
@@ -736,7 +1053,8 @@ class PyObjGen(GenBase):
         self.__number_gen.add_matrix_multiply(func_name,
                                               expr=expr,
                                               op_list1=op_list1,
-                                              op_list2=op_list2)
+                                              op_list2=op_list2,
+                                              reuse_temp=reuse_temp)
 
     def add_nb_inplace_matrix_multiply(self, *,
                                        func_name=None,
@@ -799,6 +1117,8 @@ class PyObjGen(GenBase):
         """
         if self.__init_gen is not None:
             raise ValueError('init has been already defined')
+        if self.__has_constructor:
+            raise ValueError('init can not be used with constructor')
         func_name = self.complete_name(func_name, 'init_func')
         self.__init_gen = InitProcGen(self, func_name, func_body, arg_list)
 
@@ -812,24 +1132,72 @@ class PyObjGen(GenBase):
         func_name = self.complete_name(func_name, 'new_func')
         self.__new_gen = NewFuncGen(self, func_name, func_body, arg_list)
 
+    def add_constructor(self, arg_list, func_body, *,
+                        func_name=None):
+        """引数を解釈して値を構築する new 関数定義を追加する．
+
+        add_new() と add_init() の組み合わせと異なり，引数の解釈は一度だけ行われ，
+        mVal は変換された引数から直接 placement new で構築される．
+        tp_init は設定されない．
+        func_body はコンストラクタの引数を表す文字列か，
+        writer を引数にとり，必要なコードを出力してコンストラクタの引数を表す
+        文字列を返す関数．
+        """
+        if self.__new_gen is not None:
+            raise ValueError('new has been already defined')
+        if self.__init_gen is not None:
+            raise ValueError('constructor can not be used with init')
+        func_name = self.complete_name(func_name, 'new_func')
+
+        def ctor_body(writer):
+            if callable(func_body):
+                expr = func_body(writer)
+            else:
+                expr = func_body
+            writer.gen_auto_assign('self', 'type->tp_alloc(type, 0)')
+            with writer.gen_if_block('self == nullptr'):
+                writer.gen_return('nullptr')
+            self.gen_obj_conv(writer, objname='self', varname='my_obj')
+            with writer.gen_try_block():
+                self.gen_val_construct(writer, expr=expr)
+            with writer.gen_catch_block('...'):
+                # 構築に失敗した場合は領域を解放して例外を送出し直す．
+                writer.gen_stmt('type->tp_free(self)')
+                writer.write_line('throw;')
+            if self.has_trace_malloc:
+                self.gen_trace_track(writer, objname='self')
+            writer.gen_return_self()
+
+        self.__new_gen = NewFuncGen(self, func_name, ctor_body, arg_list)
+        self.__has_constructor = True
+
     def add_method(self, name, *,
                    func_name=None,
                    func_body=None,
                    arg_list=[],
                    is_static=False,
+                   mutator=False,
+                   use_val=True,
                    doc_str=''):
         """メソッド定義を追加する．
+
+        mutator=True は self の値を変更するメソッドであることを表す．
+        use_val=False は本体で val を用いないことを表す．
         """
         if self.__method_gen is None:
             tbl_name = self.check_name('methods')
             self.__method_gen = MethodGen(self, tbl_name)
         # デフォルトの関数名は Python のメソッド名をそのまま用いる．
         func_name = self.complete_name(func_name, name)
+        if mutator:
+            self.add_mutator(func_name)
         self.__method_gen.add(func_name,
                               name=name,
                               arg_list=arg_list,
                               arg_parser=None,
                               is_static=is_static,
+                              mutator=mutator,
+                              use_val=use_val,
                               func_body=func_body,
                               doc_str=doc_str)
 
@@ -838,6 +1206,7 @@ class PyObjGen(GenBase):
                                func_body=None,
                                arg_parser,
                                is_static=False,
+                               mutator=False,
                                doc_str=''):
         """メソッド定義を追加する．
         """
@@ -846,11 +1215,14 @@ class PyObjGen(GenBase):
             self.__method_gen = MethodGen(self, tbl_name)
         # デフォルトの関数名は Python のメソッド名をそのまま用いる．
         func_name = self.complete_name(func_name, name)
+        if mutator:
+            self.add_mutator(func_name)
         self.__method_gen.add(func_name,
                               name=name,
                               arg_list=None,
                               arg_parser=arg_parser,
                               is_static=is_static,
+                              mutator=mutator,
                               func_body=func_body,
                               doc_str=doc_str)
 
@@ -883,6 +1255,308 @@ class PyObjGen(GenBase):
                         is_static=True,
                         doc_str=doc_str)
 
+    def add_pickle(self, *,
+                   serialize,
+                   deserialize,
+                   version=1,
+                   oob_threshold=4096):
+        """pickle 用の __reduce_ex__() と _from_pickle() を追加する．
+
+        serialize は serialize(val, buf) の形で呼び出される C++ の関数で
+        val(const ElemType&) の内容を buf(PyByteArrayBuf&) の末尾に書き込む．
+        PyByteArrayBuf は push_back(), append(), grow() を持ち，
+        bytearray に直接書き込むので大きなデータでも複製は起こらない．
+        serialize が送出した例外は ValueError(Python の例外がセットされている
+        場合はその例外)に変換される．
+        deserialize は deserialize(data, size, version) の形で呼び出される
+        C++ の関数で，データから復元した ElemType を返す．
+        不正なデータの場合には std::invalid_argument を送出すること．
+
+        データの先頭の 1 バイトは版数(version)を表す．
+        プロトコル 5 でデータが oob_threshold バイト以上の場合は
+        bytearray をそのまま PickleBuffer として返すので out-of-band で転送できる．
+        """
+        if not 0 < version < 256:
+            raise ValueError(f'{version}: version must be in 1 .. 255')
+        self.__has_pickle = True
+        self.__add_source_include('pym/PyByteArrayBuf.h')
+        self.__add_source_include('<cstdint>')
+
+        def reduce_body(writer):
+            writer.gen_vardecl(typename='PyObject*', varname='array',
+                               initializer='nullptr')
+            with writer.gen_try_block():
+                writer.gen_vardecl(typename='PyByteArrayBuf', varname='buf')
+                writer.gen_comment('先頭は版数')
+                writer.gen_stmt(f'buf.push_back(static_cast<char>({version}))')
+                writer.gen_stmt(f'{serialize}(val, buf)')
+                writer.gen_assign('array', 'buf.release()')
+            with writer.gen_catch_block('std::exception& err'):
+                with writer.gen_if_block('!PyErr_Occurred()'):
+                    writer.gen_stmt('PyErr_SetString(PyExc_ValueError, err.what())')
+                writer.gen_return('nullptr')
+            with writer.gen_if_block('array == nullptr'):
+                writer.gen_return('nullptr')
+            writer.gen_vardecl(typename='PyObject*', varname='payload',
+                               initializer='nullptr')
+            writer.gen_auto_assign('size', 'PyByteArray_GET_SIZE(array)')
+            with writer.gen_if_block(f'protocol >= 5 && size >= {oob_threshold}'):
+                writer.gen_comment('大きなデータは複製せずに out-of-band で転送できるようにする．')
+                writer.gen_assign('payload', 'PyPickleBuffer_FromObject(array)')
+            with writer.gen_else_block():
+                writer.gen_assign('payload',
+                                  'PyBytes_FromStringAndSize(PyByteArray_AS_STRING(array), size)')
+            writer.write_line('Py_DECREF(array);')
+            with writer.gen_if_block('payload == nullptr'):
+                writer.gen_return('nullptr')
+            writer.gen_auto_assign('type',
+                                   f'reinterpret_cast<PyObject*>({self.pyclassname}::_typeobject())')
+            writer.gen_auto_assign('func',
+                                   'PyObject_GetAttrString(type, "_from_pickle")')
+            with writer.gen_if_block('func == nullptr'):
+                writer.write_line('Py_DECREF(payload);')
+                writer.gen_return('nullptr')
+            writer.gen_return_buildvalue('N(N)', ['func', 'payload'])
+
+        self.add_method('__reduce_ex__',
+                        func_name='reduce_ex',
+                        func_body=reduce_body,
+                        arg_list=[IntArg(cvarname='protocol')],
+                        doc_str='reduce for pickle')
+
+        def from_pickle_body(writer):
+            writer.gen_vardecl(typename='Py_buffer', varname='view')
+            with writer.gen_if_block('PyObject_GetBuffer(data_obj, &view, PyBUF_SIMPLE) == -1'):
+                writer.gen_return('nullptr')
+            writer.gen_auto_assign('data', 'static_cast<const char*>(view.buf)')
+            writer.gen_auto_assign('size', 'view.len')
+            with writer.gen_if_block(f'size < 1 || static_cast<std::uint8_t>(data[0]) > {version}'):
+                writer.write_line('PyBuffer_Release(&view);')
+                writer.gen_value_error('"unsupported pickle data"')
+            with writer.gen_try_block():
+                writer.gen_auto_assign('data_version', 'static_cast<std::uint8_t>(data[0])')
+                writer.gen_auto_assign('val', f'{deserialize}(data + 1, size - 1, data_version)')
+                writer.write_line('PyBuffer_Release(&view);')
+                writer.gen_return_pyobject(self.pyclassname, 'val', move=True)
+            with writer.gen_catch_block('std::invalid_argument err'):
+                writer.write_line('PyBuffer_Release(&view);')
+                writer.gen_value_error('err.what()')
+
+        self.add_static_method('_from_pickle',
+                               func_name='from_pickle',
+                               func_body=from_pickle_body,
+                               arg_list=[RawObjArg(cvarname='data_obj')],
+                               doc_str='reconstruct from pickle data')
+
+    def add_copy(self, *,
+                 deepcopy_body=None):
+        """__copy__() と __deepcopy__() を追加する．
+
+        どちらも Conv を用いて mVal をコピーしたオブジェクトを作る．
+        Python のオブジェクトへの参照を含まない型では memo を用いない．
+        Python のオブジェクトへの参照を含む型の場合は
+        deepcopy_body で __deepcopy__() の本体を指定する．
+        この中では val と memo(PyObject*) が使える．
+        """
+
+        def copy_body(writer):
+            if self.__conv_gen is None:
+                raise ValueError('add_copy() requires Conv')
+            if self.storage == 'shared_ptr':
+                writer.gen_comment('値は変更時に複製されるので所有権を共有する．')
+                writer.gen_return_pyobject(self.pyclassname,
+                                           f'{self.pyclassname}::_get_shared(self)')
+            else:
+                writer.gen_return_pyobject(self.pyclassname, 'val')
+
+        # shared_ptr の場合は val を用いない．
+        use_val = self.storage != 'shared_ptr'
+        self.add_method('__copy__',
+                        func_name='copy_func',
+                        func_body=copy_body,
+                        arg_list=None,
+                        use_val=use_val,
+                        doc_str='make a shallow copy')
+
+        if deepcopy_body is None:
+            deepcopy_body = copy_body
+        else:
+            use_val = True
+        self.add_method('__deepcopy__',
+                        func_name='deepcopy_func',
+                        func_body=deepcopy_body,
+                        arg_list=[RawObjArg(cvarname='memo')],
+                        use_val=use_val,
+                        doc_str='make a deep copy')
+        self.__has_copy = True
+
+    def add_sizeof(self, func_body, *,
+                   trace_domain=None):
+        """__sizeof__() を追加する．
+
+        func_body は heap_size(const ElemType& val) の本体を生成する関数で，
+        val が C++ のヒープ上に確保している領域の大きさ(バイト数)を返す．
+        __sizeof__() はオブジェクト構造体の大きさにこれを加えた値を返す．
+        trace_domain が指定された場合にはオブジェクトの生成時と開放時に
+        その大きさを PyTraceMalloc_Track()/PyTraceMalloc_Untrack() で報告する．
+        報告される大きさは生成時の値である．
+        """
+        if self.__heap_size_body is not None:
+            raise ValueError('sizeof has been already defined')
+        self.__heap_size_body = func_body
+        self.__trace_domain = trace_domain
+        if trace_domain is not None:
+            self.__add_source_include('<cstdint>')
+
+        def sizeof_body(writer):
+            writer.gen_auto_assign('size', 'Py_TYPE(self)->tp_basicsize')
+            if self.item_type is not None:
+                writer.gen_stmt('size += Py_SIZE(self) * Py_TYPE(self)->tp_itemsize')
+            writer.gen_stmt('size += static_cast<Py_ssize_t>(heap_size(val))')
+            writer.gen_return('PyLong_FromSsize_t(size)')
+
+        self.add_method('__sizeof__',
+                        func_name='sizeof_func',
+                        func_body=sizeof_body,
+                        arg_list=None,
+                        doc_str='return the size of the object in bytes')
+
+    @property
+    def has_trace_malloc(self):
+        """tracemalloc に報告する時 True を返す．
+        """
+        return self.__trace_domain is not None
+
+    def add_shared_array(self):
+        """共有メモリ用の to_shared() と from_shared() を追加する．
+
+        to_shared(values, buf, offset=0) は values の各要素の値を
+        書き込み可能なバッファ buf(multiprocessing.shared_memory など)の
+        offset バイト目から連続して書き込み，書き込んだ末尾の位置を返す．
+        from_shared(buf, offset, count) は buf 中の値を参照する
+        ビューオブジェクトのリストを返す．値のコピーは行われない．
+        ビューを通して値が書き換えられるので buf は書き込み可能で
+        連続したバッファでなければならない．
+        ElemType はトリビアルにコピーできる型でなければならない．
+        """
+        if self.__has_shared_array:
+            raise ValueError('shared_array has been already defined')
+        self.__has_shared_array = True
+        if not self.has_view:
+            self.add_view()
+        self.__add_source_include('<cstdint>')
+        self.__add_source_include('<cstring>')
+
+        def to_shared_body(writer):
+            writer.gen_vardecl(typename='Py_ssize_t', varname='elem_size',
+                               initializer=f'static_cast<Py_ssize_t>(sizeof({self.classname}))')
+            writer.gen_vardecl(typename='Py_buffer', varname='view')
+            with writer.gen_if_block('PyObject_GetBuffer(buf_obj, &view, PyBUF_WRITABLE) == -1'):
+                writer.gen_return('nullptr')
+            writer.gen_auto_assign('seq', 'PySequence_Fast(values_obj, "values must be a sequence")')
+            with writer.gen_if_block('seq == nullptr'):
+                writer.write_line('PyBuffer_Release(&view);')
+                writer.gen_return('nullptr')
+            writer.gen_auto_assign('n', 'PySequence_Fast_GET_SIZE(seq)')
+            writer.gen_comment('offset + n * sizeof() があふれないように割り算で調べる．')
+            with writer.gen_if_block('offset < 0 || offset > view.len || '
+                                     f'n > (view.len - offset) / elem_size'):
+                writer.write_line('Py_DECREF(seq);')
+                writer.write_line('PyBuffer_Release(&view);')
+                writer.gen_value_error('"invalid offset"')
+            writer.gen_auto_assign('end', 'offset + n * elem_size')
+            writer.gen_auto_assign('dst', 'static_cast<char*>(view.buf) + offset')
+            with writer.gen_if_block('reinterpret_cast<std::uintptr_t>(dst) % '
+                                     f'alignof({self.classname}) != 0'):
+                writer.write_line('Py_DECREF(seq);')
+                writer.write_line('PyBuffer_Release(&view);')
+                writer.gen_value_error('"invalid offset"')
+            with writer.gen_for_block('Py_ssize_t i = 0', 'i < n', '++ i'):
+                writer.gen_auto_assign('item', 'PySequence_Fast_GET_ITEM(seq, i)')
+                with writer.gen_if_block(f'{self.pyclassname}::Check(item)'):
+                    writer.gen_autoref_assign('val', f'{self.pyclassname}::_get_ref(item)')
+                    writer.gen_stmt(f'std::memcpy(dst + i * elem_size, &val, elem_size)')
+                    writer.write_line('continue;')
+                if self.has_deconv:
+                    writer.gen_vardecl(typename=self.classname, varname='val')
+                    with writer.gen_if_block(f'{self.pyclassname}::FromPyObject(item, val)'):
+                        writer.gen_stmt(f'std::memcpy(dst + i * elem_size, &val, elem_size)')
+                        writer.write_line('continue;')
+                writer.write_line('Py_DECREF(seq);')
+                writer.write_line('PyBuffer_Release(&view);')
+                writer.gen_type_error(f'"could not convert to {self.classname}"')
+            writer.write_line('Py_DECREF(seq);')
+            writer.write_line('PyBuffer_Release(&view);')
+            writer.gen_return('PyLong_FromSsize_t(end)')
+
+        self.add_static_method('to_shared',
+                               func_name='to_shared',
+                               func_body=to_shared_body,
+                               arg_list=[RawObjArg(name='values',
+                                                   cvarname='values_obj'),
+                                         RawObjArg(name='buf',
+                                                   cvarname='buf_obj'),
+                                         OptArg(),
+                                         RawArg(name='offset',
+                                                pchar='n',
+                                                cvartype='Py_ssize_t',
+                                                cvarname='offset',
+                                                cvardefault='0')],
+                               doc_str='write values into a shared buffer')
+
+        def from_shared_body(writer):
+            writer.gen_vardecl(typename='Py_ssize_t', varname='elem_size',
+                               initializer=f'static_cast<Py_ssize_t>(sizeof({self.classname}))')
+            writer.gen_comment('memoryview が buf のバッファを保持し続ける．')
+            writer.gen_auto_assign('mv', 'PyMemoryView_FromObject(buf_obj)')
+            with writer.gen_if_block('mv == nullptr'):
+                writer.gen_return('nullptr')
+            writer.gen_auto_assign('view', 'PyMemoryView_GET_BUFFER(mv)')
+            writer.gen_comment('ビューを通して値が書き換えられるので')
+            writer.gen_comment('書き込み可能で連続したバッファに限る．')
+            with writer.gen_if_block("view->readonly || !PyBuffer_IsContiguous(view, 'C')"):
+                writer.write_line('Py_DECREF(mv);')
+                writer.gen_type_error('"buf must be a writable contiguous buffer"')
+            writer.gen_comment('offset + count * sizeof() があふれないように割り算で調べる．')
+            with writer.gen_if_block('offset < 0 || count < 0 || offset > view->len || '
+                                     'count > (view->len - offset) / elem_size'):
+                writer.write_line('Py_DECREF(mv);')
+                writer.gen_value_error('"invalid offset or count"')
+            writer.gen_auto_assign('ptr', 'static_cast<char*>(view->buf) + offset')
+            with writer.gen_if_block('reinterpret_cast<std::uintptr_t>(ptr) % '
+                                     f'alignof({self.classname}) != 0'):
+                writer.write_line('Py_DECREF(mv);')
+                writer.gen_value_error('"invalid offset or count"')
+            writer.gen_auto_assign('src', f'reinterpret_cast<{self.classname}*>(ptr)')
+            writer.gen_auto_assign('list', 'PyList_New(count)')
+            with writer.gen_if_block('list == nullptr'):
+                writer.write_line('Py_DECREF(mv);')
+                writer.gen_return('nullptr')
+            with writer.gen_for_block('Py_ssize_t i = 0', 'i < count', '++ i'):
+                writer.gen_auto_assign('obj', f'{self.pyclassname}::ToPyView(src[i], mv)')
+                with writer.gen_if_block('obj == nullptr'):
+                    writer.write_line('Py_DECREF(list);')
+                    writer.write_line('Py_DECREF(mv);')
+                    writer.gen_return('nullptr')
+                writer.gen_stmt('PyList_SET_ITEM(list, i, obj)')
+            writer.write_line('Py_DECREF(mv);')
+            writer.gen_return('list')
+
+        self.add_static_method('from_shared',
+                               func_name='from_shared',
+                               func_body=from_shared_body,
+                               arg_list=[RawObjArg(name='buf',
+                                                   cvarname='buf_obj'),
+                                         RawArg(name='offset',
+                                                pchar='n',
+                                                cvartype='Py_ssize_t',
+                                                cvarname='offset'),
+                                         RawArg(name='count',
+                                                pchar='n',
+                                                cvartype='Py_ssize_t',
+                                                cvarname='count')],
+                               doc_str='make views of values in a shared buffer')
+
     def add_getter(self, func_name, *,
                    func_body=None,
                    has_closure=False):
@@ -901,6 +1575,7 @@ class PyObjGen(GenBase):
         """
         self.__check_getset()
         self.check_name(func_name)
+        self.add_mutator(func_name)
         self.__getset_gen.add_setter(self, func_name,
                                      has_closure=has_closure,
                                      func_body=func_body)
@@ -919,8 +1594,14 @@ class PyObjGen(GenBase):
                                    closure=closure,
                                    doc_str=doc_str)
 
-    def add_conv(self, func_body):
-        self.__conv_gen = ConvGen(self, func_body)
+    def add_conv(self, func_body, *,
+                 move_body=None):
+        """Conv ファンクタの定義を追加する．
+
+        func_body が 'default' の場合は move_body も 'default' となる．
+        """
+        self.__conv_gen = ConvGen(self, func_body,
+                                  move_body=move_body)
 
     def add_deconv(self, func_body, *,
                    extra_func=None,
@@ -929,6 +1610,14 @@ class PyObjGen(GenBase):
                                       extra_func=extra_func,
                                       error_value=error_value)
 
+    def add_mutator(self, func_name):
+        """値を変更する関数を登録する．
+
+        インターン化や同一性キャッシュを行う型では値を変更できないので
+        make_source() でエラーとなる．
+        """
+        self.__mutator_list.append(func_name)
+
     def new_lenfunc(self, name, body):
         return LenFuncGen(self, name, body)
 
@@ -939,9 +1628,13 @@ class PyObjGen(GenBase):
         return UnaryFuncGen(self, name, body)
 
     def new_binaryfunc(self, name, body, *,
-                       arg2name=None):
+                       arg2name=None,
+                       is_mutator=False):
+        if is_mutator:
+            self.add_mutator(name)
         return BinaryFuncGen(self, name, body,
-                             arg2name=arg2name)
+                             arg2name=arg2name,
+                             is_mutator=is_mutator)
 
     def new_binop(self, name, *,
                   op_list1,
@@ -953,23 +1646,32 @@ class PyObjGen(GenBase):
     def new_ternaryfunc(self, name, body, *,
                         arg2name=None,
                         arg3name=None,
-                        has_ref_conv=True):
+                        has_ref_conv=True,
+                        is_mutator=False):
+        if is_mutator:
+            self.add_mutator(name)
         return TernaryFuncGen(self, name, body,
                               arg2name=arg2name,
                               arg3name=arg3name,
-                              has_ref_conv=has_ref_conv)
+                              has_ref_conv=has_ref_conv,
+                              is_mutator=is_mutator)
 
     def new_nb_ternaryfunc(self, name, body):
         return self.new_ternaryfunc(name, body, has_ref_conv=False)
 
     def new_ssizeargfunc(self, name, body, *,
-                         arg2name=None):
+                         arg2name=None,
+                         is_mutator=False):
+        if is_mutator:
+            self.add_mutator(name)
         return SsizeArgFuncGen(self, name, body,
-                               arg2name=arg2name)
+                               arg2name=arg2name,
+                               is_mutator=is_mutator)
 
     def new_ssizeobjargproc(self, name, body, *,
                             arg2name=None,
                             arg3name=None):
+        self.add_mutator(name)
         return SsizeObjArgProcGen(self, name, body,
                                   arg2name=arg2name,
                                   arg3name=arg3name)
@@ -982,6 +1684,7 @@ class PyObjGen(GenBase):
     def new_objobjargproc(self, name, body, *,
                           arg2name=None,
                           arg3name=None):
+        self.add_mutator(name)
         return ObjObjArgProcGen(self, name, body,
                                 arg2name=arg2name,
                                 arg3name=arg3name)
@@ -995,8 +1698,10 @@ class PyObjGen(GenBase):
         gen_list.append(BeginNamespaceGen(self.namespace))
         gen_list.append(EndNamespaceGen(self.namespace))
         gen_list.append(ConvDefGen(self.__conv_gen, self.__deconv_gen))
-        gen_list.append(ToDefGen(self.__conv_gen, self.__deconv_gen))
+        gen_list.append(ToDefGen(self.__conv_gen, self.__deconv_gen,
+                                 self.__view_gen, self.__shared_gen))
         gen_list.append(GetDefGen(self))
+        gen_list.append(ReadyDefGen(self))
 
         # 置換リスト
         replace_list = []
@@ -1008,6 +1713,8 @@ class PyObjGen(GenBase):
         replace_list.append(('%%Custom%%', self.classname))
         # Python 拡張用のクラス名の置換
         replace_list.append(('%%PyCustom%%', self.pyclassname))
+        # _get_ref() の返り値の型の置換
+        replace_list.append(('%%ElemTypeRef%%', self.__ref_type('ElemType')))
         # 名前空間の置換
         if self.namespace is not None:
             replace_list.append(('%%NAMESPACE%%', self.namespace))
@@ -1017,7 +1724,98 @@ class PyObjGen(GenBase):
                        gen_list=gen_list,
                        replace_list=replace_list)
 
+    def make_pxd(self, fout=sys.stdout, *,
+                 cxx_namespace=None):
+        """Cython 用の .pxd ファイルを出力する．
+
+        cxx_namespace は C++ 上の名前空間名
+        省略された場合には namespace から推測する．(例: 'YM' -> 'nsYm')
+        """
+        if cxx_namespace is None and self.namespace is not None:
+            cxx_namespace = f'ns{self.namespace.capitalize()}'
+
+        def gen_cimports(writer):
+            if self.storage == 'shared_ptr':
+                writer.write_line('from libcpp.memory cimport shared_ptr')
+            if self.item_type is not None:
+                writer.gen_CRLF()
+                writer.write_line('cdef extern from "Python.h":')
+                writer.indent_inc(4)
+                writer.write_line('ctypedef struct PyVarObject:')
+                writer.indent_inc(4)
+                writer.write_line('pass')
+                writer.indent_dec(8)
+
+        def gen_extern(writer):
+            line = f'cdef extern from "pym/{self.pyclassname}.h"'
+            if cxx_namespace is not None:
+                line += f' namespace "{cxx_namespace}"'
+            writer.write_line(f'{line}:')
+
+        def gen_funcs(writer):
+            c0 = self.classname
+            ref_type = self.__ref_type(c0)
+            func_list = []
+            # ToPyObject() は失敗すると nullptr を返す．
+            # FromPyObject() は C++ の例外を送出する可能性がある．
+            if self.__conv_gen is not None:
+                func_list.append(f'PyObject* ToPyObject(const {c0}& val) except NULL')
+            func_list.append('bool Check(PyObject* obj) nogil')
+            if self.__deconv_gen is not None:
+                func_list.append(f'bool FromPyObject(PyObject* obj, {c0}& val) except +')
+            func_list.append(f'{ref_type} _get_ref(PyObject* obj) nogil')
+            func_list.append('PyTypeObject* _typeobject() nogil')
+            for i, func in enumerate(func_list):
+                if i > 0:
+                    writer.gen_CRLF()
+                writer.write_line('@staticmethod')
+                writer.write_line(func)
+
+        def gen_members(writer):
+            if self.item_type is not None:
+                writer.write_line('PyVarObject ob_base')
+            else:
+                writer.write_line('PyObject ob_base')
+            if self.storage == 'shared_ptr':
+                writer.write_line(f'shared_ptr[const {self.classname}] mVal')
+            else:
+                writer.write_line(f'{self.classname} mVal')
+
+        # Generator リスト
+        gen_list = []
+        gen_list.append(PxdGen('PXD_CIMPORTS', gen_cimports))
+        gen_list.append(PxdGen('PXD_EXTERN', gen_extern))
+        gen_list.append(PxdGen('PXD_FUNCS', gen_funcs))
+        gen_list.append(PxdGen('PXD_MEMBERS', gen_members))
+
+        # 置換リスト
+        replace_list = []
+        # 年の置換
+        replace_list.append(('%%Year%%', self.year()))
+        # クラス名の置換
+        replace_list.append(('%%Custom%%', self.classname))
+        # Python 拡張用のクラス名の置換
+        replace_list.append(('%%PyCustom%%', self.pyclassname))
+        # オブジェクトクラス名の置換
+        replace_list.append(('%%CustomObject%%', self.objectname))
+
+        self.make_file(template_file=self.template_file('PyCustom.pxd'),
+                       writer=CxxWriter(fout=fout),
+                       gen_list=gen_list,
+                       replace_list=replace_list)
+
     def make_get_def(self, writer):
+        if self.item_type is not None:
+            dox_comments = [f'@brief {self.classname} を表す PyObject から可変長の要素を取り出す．',
+                            '',
+                            'Check(obj) == true であると仮定している．']
+            args = [CArg.PyArg('obj',
+                               comment='[in] 変換元の PyObject')]
+            writer.gen_func_declaration(dox_comments=dox_comments,
+                                        is_static=True,
+                                        return_type=f'std::span<{self.item_type}>',
+                                        func_name='_get_items',
+                                        args=args)
         if self.__deconv_gen is None:
             return
         dox_comment = f'@brief PyObject から {self.classname} を取り出す．'
@@ -1038,20 +1836,74 @@ class PyObjGen(GenBase):
 
     def make_source(self, fout=sys.stdout):
 
+        if self.intern:
+            if self.__hash_gen is None:
+                raise ValueError('intern=True requires hash')
+            if self.has_identity_cache:
+                raise ValueError('intern=True can not be used with identity_cache')
+            if len(self.__mutator_list) > 0:
+                # 値が変わるとインターン表のハッシュ値が古くなる．
+                raise ValueError('intern=True can not be used with functions '
+                                 'changing the value: '
+                                 f'{", ".join(self.__mutator_list)}')
+        if self.item_type is not None:
+            # 可変長の要素は mVal に含まれないので
+            # mVal だけを用いる関数では要素が失われる．
+            for flag, name in ((self.__has_copy, 'add_copy()'),
+                               (self.__has_pickle, 'add_pickle()'),
+                               (self.has_view, 'add_view()')):
+                if flag:
+                    raise ValueError(f'{name} can not be used with var-sized objects')
+        if self.has_identity_cache and len(self.__mutator_list) > 0:
+            # 値が変わると同一性キャッシュのキーが古くなる．
+            raise ValueError('identity_cache can not be used with functions '
+                             'changing the value: '
+                             f'{", ".join(self.__mutator_list)}')
+        if self.__dealloc_gen is None and \
+           (self.__has_constructor or self.deferred_dealloc):
+            # 構築した mVal は dealloc で破壊する必要がある．
+            self.add_dealloc()
+        if self.__dealloc_gen is None:
+            if self.has_identity_cache or self.has_view or self.intern or \
+               self.has_trace_malloc:
+                # 表からの削除と親の参照の解放は dealloc で行う．
+                self.add_dealloc(None)
+
         # Generator リスト
         gen_list = []
-        gen_list.append(IncludesGen(self.source_include_files))
+        include_files = self.add_arg_include_files(self.source_include_files)
+        if self.instrument:
+            include_files = include_files + ['pym/PyPerfStats.h']
+        if self.shared_runtime:
+            include_files = include_files + ['pym/PyRuntime.h']
+        gen_list.append(IncludesGen(include_files))
         gen_list.append(BeginNamespaceGen(self.namespace))
         gen_list.append(EndNamespaceGen(self.namespace))
+        gen_list.append(ExtraMembersGen(self))
         gen_list.append(ExtraCodeGen(self))
         gen_list.append(TpInitGen(self))
         gen_list.append(ExInitGen(self))
+        gen_list.append(ReadyCodeGen(self))
+        gen_list.append(GetRefCodeGen(self))
         gen_list.append(ConvCodeGen(self))
 
         # 置換リスト
         replace_list = []
         # 年の置換
         replace_list.append(('%%Year%%', self.year()))
+        # オブジェクト構造体のヘッダの置換
+        if self.item_type is None:
+            replace_list.append(('%%ObjectHead%%', 'PyObject_HEAD'))
+        else:
+            replace_list.append(('%%ObjectHead%%', 'PyObject_VAR_HEAD'))
+        # 値を保持するメンバの型の置換
+        if self.storage == 'shared_ptr':
+            storage_type = f'std::shared_ptr<const {self.classname}>'
+        else:
+            storage_type = self.classname
+        replace_list.append(('%%Storage%%', storage_type))
+        # _get_ref() の返り値の型の置換
+        replace_list.append(('%%CustomRef%%', self.__ref_type(self.classname)))
         # クラス名の置換
         replace_list.append(('%%Custom%%', self.classname))
         # Python 拡張用のクラス名の置換
@@ -1071,11 +1923,70 @@ class PyObjGen(GenBase):
                        gen_list=gen_list,
                        replace_list=replace_list)
 
+    def make_extra_members(self, writer):
+        if self.storage == 'shared_ptr':
+            writer.gen_comment('mVal の実体をこのオブジェクトが作った時 true')
+            writer.gen_comment('(false の時は const の可能性があるので変更時に複製する)')
+            writer.gen_vardecl(typename='bool', varname='mOwned')
+        if self.__hash_cache:
+            writer.gen_comment('ハッシュ値のキャッシュ(0 の時は未計算)')
+            writer.gen_vardecl(typename='Py_hash_t', varname='mHash')
+        if self.has_identity_cache:
+            writer.gen_comment('同一性キャッシュのキー(nullptr の時は未登録)')
+            writer.gen_vardecl(typename='const void*', varname='mKey')
+        if self.intern:
+            writer.gen_comment('インターン表のキー')
+            writer.gen_vardecl(typename='Py_hash_t', varname='mInternHash')
+        if self.has_view:
+            writer.gen_comment('ビューの場合の値へのポインタ(nullptr の時は mVal を用いる)')
+            writer.gen_vardecl(typename=f'{self.classname}*', varname='mPtr')
+            writer.gen_comment('ビューの場合の親オブジェクト')
+            writer.gen_vardecl(typename='PyObject*', varname='mParent')
+
     def make_extra_code(self, writer):
+        if self.unity_namespace is not None:
+            # 他のクラスと同じ翻訳単位になっても名前が衝突しないように
+            # クラスごとの名前空間に入れる．
+            writer.gen_CRLF()
+            writer.write_line(f'namespace {self.unity_namespace} {{')
+            self.__make_extra_code(writer)
+            writer.gen_CRLF()
+            writer.write_line(f'}} // namespace {self.unity_namespace}')
+        else:
+            self.__make_extra_code(writer)
+
+    def __make_extra_code(self, writer):
         def gen_common(writer, gen):
             if gen is not None:
                 gen(writer)
+        if self.__has_shared_array:
+            writer.gen_CRLF()
+            writer.gen_comment('共有メモリ上にそのままコピーされる．')
+            writer.gen_stmt(f'static_assert(std::is_trivially_copyable_v<{self.classname}>)')
+        if self.item_type is not None:
+            writer.gen_CRLF()
+            writer.gen_comment('要素のデストラクタは起動されない．')
+            writer.gen_stmt(f'static_assert(std::is_trivially_destructible_v<{self.item_type}>)')
+        if self.has_identity_cache:
+            writer.gen_CRLF()
+            writer.gen_comment('C++ のポインタから Python オブジェクトへの対応表')
+            writer.gen_comment('Python オブジェクトの参照カウントは増やさない．')
+            writer.gen_vardecl(typename='std::unordered_map<const void*, PyObject*>',
+                               varname='IdentityTable')
+        if self.intern:
+            writer.gen_CRLF()
+            writer.gen_comment('ハッシュ値から Python オブジェクトへの対応表')
+            writer.gen_comment('Python オブジェクトの参照カウントは増やさない．')
+            writer.gen_vardecl(typename='std::unordered_multimap<Py_hash_t, PyObject*>',
+                               varname='InternTable')
         gen_common(writer, self.__preamble_gen)
+        if self.__heap_size_body is not None:
+            args = [CArg.GenArg(f'const {self.classname}&', 'val')]
+            with writer.gen_func_block(comment='C++ のヒープ上の大きさを返す．',
+                                       return_type='std::size_t',
+                                       func_name='heap_size',
+                                       args=args):
+                self.__heap_size_body(writer)
         gen_func(self.__dealloc_gen, writer,
                  comment='終了関数')
         gen_func(self.__repr_gen, writer,
@@ -1085,6 +1996,10 @@ class PyObjGen(GenBase):
         gen_common(writer, self.__mapping_gen)
         gen_func(self.__hash_gen, writer,
                  comment='hash 関数')
+        if self.intern:
+            self.__hash_gen.gen_value_hash(writer,
+                                           func_name='intern_hash',
+                                           comment='インターン表用のハッシュ関数')
         gen_func(self.__call_gen, writer,
                  comment='call 関数')
         gen_func(self.__str_gen, writer,
@@ -1098,9 +2013,56 @@ class PyObjGen(GenBase):
         gen_func(self.__new_gen, writer,
                  comment='new 関数')
 
+    def make_ready_def(self, writer):
+        """ready() の宣言を出力する．
+
+        lazy=False の場合には何も出力しない．
+        """
+        if not self.lazy:
+            return
+        # 引数を持たないので gen_func_declaration() は用いない．
+        writer.gen_CRLF()
+        writer.gen_dox_comment('@brief 型オブジェクトを使用可能にする．')
+        writer.gen_dox_comment('@return 成功したら true を返す．')
+        writer.gen_dox_comment('')
+        writer.gen_dox_comment('モジュールへの登録は init() で行う．')
+        writer.write_line('static')
+        writer.write_line('bool')
+        writer.write_line('ready();')
+
+    def make_ready_code(self, writer):
+        """ready() の定義を出力する．
+
+        lazy=False の場合には何も出力しない．
+        """
+        if not self.lazy:
+            return
+        writer.gen_CRLF()
+        writer.gen_comment(f'@brief {self.pyname} の型オブジェクトを使用可能にする．')
+        writer.write_line('bool')
+        writer.write_line(f'{self.pyclassname}::ready()')
+        with writer.gen_block(no_crlf=True):
+            with writer.gen_if_block(f'PyType_HasFeature(&{self.typename}, Py_TPFLAGS_READY)'):
+                writer.gen_return('true')
+            self.make_tp_init(writer)
+            writer.gen_return(f'PyType_Ready(&{self.typename}) == 0')
+
+    def make_tp_init_code(self, writer):
+        """init() の中の tp_XXX の設定を出力する．
+
+        lazy=True の場合は ready() を呼び出す．
+        """
+        if self.lazy:
+            with writer.gen_if_block(f'!{self.pyclassname}::ready()'):
+                writer.write_line('goto error;')
+            return
+        self.make_tp_init(writer)
+
     def make_tp_init(self, writer):
         def gen_tp(writer, tp_name, rval):
             writer.gen_assign(f'{self.typename}.tp_{tp_name}', rval)
+        if self.unity_namespace is not None:
+            writer.write_line(f'using namespace {self.unity_namespace};')
         gen_tp(writer, 'name', f'"{self.pyname}"')
         gen_tp(writer, 'basicsize', self.basicsize)
         gen_tp(writer, 'itemsize', self.itemsize)
@@ -1137,22 +2099,59 @@ class PyObjGen(GenBase):
         if self.__ex_init_gen is not None:
             self.__ex_init_gen(writer)
 
+    def make_get_ref_code(self, writer):
+        self.gen_obj_conv(writer, objname='obj', varname='my_obj')
+        if self.has_view:
+            with writer.gen_if_block('my_obj->mPtr != nullptr'):
+                writer.gen_return('*my_obj->mPtr')
+        if self.storage == 'shared_ptr':
+            writer.gen_return('*my_obj->mVal')
+        else:
+            writer.gen_return('my_obj->mVal')
+
     def make_conv_code(self, writer):
+        if self.unity_namespace is not None:
+            writer.func_prologue = [f'using namespace {self.unity_namespace};']
+        self.__make_conv_code(writer)
+        writer.func_prologue = []
+
+    def __make_conv_code(self, writer):
         # Conv 関数の置換
         if self.__conv_gen is not None:
             self.__conv_gen(writer)
+        # ToPyView 関数の置換
+        if self.__view_gen is not None:
+            self.__view_gen(writer)
+        # 共有ポインタ用の関数の置換
+        if self.__shared_gen is not None:
+            self.__shared_gen(writer)
+        # 可変長の要素を取り出す関数
+        if self.item_type is not None:
+            args = [CArg.PyArg('obj',
+                               comment='[in] 変換元の PyObject')]
+            with writer.gen_func_block(comment=f'{self.classname} を表す PyObject から可変長の要素を取り出す．',
+                                       return_type=f'std::span<{self.item_type}>',
+                                       func_name=f'{self.pyclassname}::_get_items',
+                                       args=args):
+                writer.gen_comment('要素は tp_basicsize の位置から ob_size 個並んでいる．')
+                writer.gen_auto_assign('items',
+                                       'reinterpret_cast<char*>(obj) + Py_TYPE(obj)->tp_basicsize')
+                writer.gen_return(f'std::span<{self.item_type}>'
+                                  f'(reinterpret_cast<{self.item_type}*>(items), Py_SIZE(obj))')
         # Deconv 関数の置換
         if self.__deconv_gen is not None:
             self.__deconv_gen(writer)
 
     def gen_alloc_code(self, writer, *,
-                       varname='self'):
+                       varname='self',
+                       size='0'):
         """PyObject* の拡張クラスの領域を確保するコードを出力する．
 
         ただし，Cタイプの allocate なので初期化はされていない．
+        size は可変長オブジェクトの要素数を表す式
         """
         writer.gen_auto_assign('type', f'{self.pyclassname}::_typeobject()')
-        writer.gen_auto_assign(f'{varname}', 'type->tp_alloc(type, 0)')
+        writer.gen_auto_assign(f'{varname}', f'type->tp_alloc(type, {size})')
 
     def gen_raw_conv(self, writer, *,
                      varname='val'):
@@ -1175,11 +2174,175 @@ class PyObjGen(GenBase):
 
     def gen_ref_conv(self, writer, *,
                      objname='self',
-                     refname):
+                     refname,
+                     mutable=False):
         """PyObject* から値の参照を取り出すコードを生成する．
+
+        mutable=True の場合は値を変更するための参照を取り出す．
+        storage='shared_ptr' の時は _get_mutable_ref() を用いる．
         """
+        if mutable and self.storage == 'shared_ptr':
+            func_name = '_get_mutable_ref'
+        else:
+            func_name = '_get_ref'
         writer.gen_autoref_assign(refname,
-                                  f'{self.pyclassname}::_get_ref({objname})')
+                                  f'{self.pyclassname}::{func_name}({objname})')
+
+    def gen_val_construct(self, writer, *,
+                          objname='my_obj',
+                          expr):
+        """オブジェクト構造体の mVal を expr で初期化するコードを生成する．
+        """
+        if self.storage == 'shared_ptr':
+            writer.write_line(f'new (&{objname}->mVal) std::shared_ptr<const {self.classname}>'
+                              f'(std::make_shared<{self.classname}>({expr}));')
+            writer.gen_assign(f'{objname}->mOwned', 'true')
+        else:
+            writer.write_line(f'new (&{objname}->mVal) {self.classname}({expr});')
+
+    def gen_hash_invalidate(self, writer, *,
+                            objname='self'):
+        """キャッシュされたハッシュ値を無効化するコードを生成する．
+
+        ハッシュ値をキャッシュしていない場合には何も出力しない．
+        """
+        if self.__hash_cache:
+            writer.gen_assign(f'reinterpret_cast<{self.objectname}*>({objname})->mHash',
+                              '0')
+
+    def gen_identity_lookup(self, writer):
+        """同一性キャッシュを検索するコードを生成する．
+
+        見つかった場合には参照カウントを増やしてそのオブジェクトを返す．
+        キーは key という変数に格納される．
+        """
+        writer.gen_auto_assign('key', self.__identity_key,
+                               casttype='const void*')
+        writer.gen_auto_assign('p', 'IdentityTable.find(key)')
+        with writer.gen_if_block('p != IdentityTable.end()'):
+            writer.gen_auto_assign('obj', 'p->second')
+            writer.write_line('Py_INCREF(obj);')
+            writer.gen_return('obj')
+
+    def gen_identity_register(self, writer, *,
+                              objname='obj'):
+        """同一性キャッシュに登録するコードを生成する．
+        """
+        with writer.gen_if_block(f'{objname} != nullptr && '
+                                 f'IdentityTable.size() < {self.__identity_max_size}'):
+            writer.gen_assign(f'reinterpret_cast<{self.objectname}*>({objname})->mKey',
+                              'key')
+            writer.gen_stmt(f'IdentityTable.emplace(key, {objname})')
+
+    def gen_intern_lookup(self, writer):
+        """インターン表を検索するコードを生成する．
+
+        等しい値を持つオブジェクトが見つかった場合には
+        参照カウントを増やしてそのオブジェクトを返す．
+        ハッシュ値は hash_val という変数に格納される．
+        """
+        writer.gen_auto_assign('hash_val', 'intern_hash(val)')
+        writer.gen_auto_assign('range', 'InternTable.equal_range(hash_val)')
+        with writer.gen_for_block('auto p = range.first',
+                                  'p != range.second',
+                                  '++ p'):
+            writer.gen_auto_assign('obj', 'p->second')
+            with writer.gen_if_block(f'{self.pyclassname}::_get_ref(obj) == val'):
+                writer.write_line('Py_INCREF(obj);')
+                writer.gen_return('obj')
+
+    def gen_intern_register(self, writer, *,
+                            objname='obj'):
+        """インターン表に登録するコードを生成する．
+        """
+        with writer.gen_if_block(f'{objname} != nullptr'):
+            writer.gen_assign(f'reinterpret_cast<{self.objectname}*>({objname})->mInternHash',
+                              'hash_val')
+            writer.gen_stmt(f'InternTable.emplace(hash_val, {objname})')
+
+    def gen_intern_erase(self, writer, *,
+                         objname='self'):
+        """インターン表から削除するコードを生成する．
+
+        インターン化を行わない場合には何も出力しない．
+        """
+        if not self.intern:
+            return
+        writer.gen_auto_assign('hash_val',
+                               f'reinterpret_cast<{self.objectname}*>({objname})->mInternHash')
+        writer.gen_auto_assign('range', 'InternTable.equal_range(hash_val)')
+        with writer.gen_for_block('auto p = range.first',
+                                  'p != range.second',
+                                  '++ p'):
+            with writer.gen_if_block(f'p->second == {objname}'):
+                writer.gen_stmt('InternTable.erase(p)')
+                writer.write_line('break;')
+
+    def gen_trace_track(self, writer, *,
+                        objname='obj'):
+        """生成したオブジェクトの大きさを tracemalloc に報告するコードを生成する．
+        """
+        with writer.gen_if_block(f'{objname} != nullptr'):
+            writer.gen_autoref_assign('new_val', f'{self.pyclassname}::_get_ref({objname})')
+            writer.gen_stmt(f'PyTraceMalloc_Track({self.__trace_domain}, '
+                            f'reinterpret_cast<std::uintptr_t>({objname}), '
+                            'heap_size(new_val))')
+
+    def gen_trace_untrack(self, writer, *,
+                          objname='self'):
+        """tracemalloc への報告を取り消すコードを生成する．
+
+        tracemalloc に報告しない場合には何も出力しない．
+        """
+        if not self.has_trace_malloc:
+            return
+        writer.gen_stmt(f'PyTraceMalloc_Untrack({self.__trace_domain}, '
+                        f'reinterpret_cast<std::uintptr_t>({objname}))')
+
+    def gen_identity_erase(self, writer, *,
+                           objname='self'):
+        """同一性キャッシュから削除するコードを生成する．
+
+        同一性キャッシュを持たない場合には何も出力しない．
+        """
+        if not self.has_identity_cache:
+            return
+        writer.gen_auto_assign('key',
+                               f'reinterpret_cast<{self.objectname}*>({objname})->mKey')
+        with writer.gen_if_block('key != nullptr'):
+            writer.gen_stmt('IdentityTable.erase(key)')
+
+    def gen_view_release(self, writer, *,
+                         objname='self'):
+        """ビューオブジェクトの場合に親の参照を解放して領域を開放するコードを生成する．
+
+        ビューオブジェクトの mVal は初期化されていないので
+        デストラクタを起動せずにここで関数を抜ける．
+        ビューを作らない場合には何も出力しない．
+        """
+        if not self.has_view:
+            return
+        writer.gen_auto_assign('parent',
+                               f'reinterpret_cast<{self.objectname}*>({objname})->mParent')
+        with writer.gen_if_block('parent != nullptr'):
+            writer.write_line('Py_DECREF(parent);')
+            writer.write_line(f'Py_TYPE({objname})->tp_free({objname});')
+            writer.gen_return(None)
+
+    def __ref_type(self, typename):
+        """_get_ref() の返り値の型を返す．
+        """
+        if self.storage == 'shared_ptr':
+            return f'const {typename}&'
+        return f'{typename}&'
+
+    def __add_source_include(self, filename):
+        """ソースファイル用のインクルードファイルを追加する．
+
+        既に含まれている場合には何もしない．
+        """
+        if filename not in self.source_include_files:
+            self.source_include_files = self.source_include_files + [filename]
 
     def __check_number(self):
         if self.__number_gen is None:
@@ -53,9 +53,11 @@ class SequenceGen(Sequence):
         if sq_contains is not None:
             sq_contains = gen.new_objobjproc('sq_contains', sq_contains)
         if sq_inplace_concat is not None:
-            sq_inplace_concat = gen.new_binaryfunc('sq_inplace_concat', sq_inplace_concat)
+            sq_inplace_concat = gen.new_binaryfunc('sq_inplace_concat', sq_inplace_concat,
+                                                   is_mutator=True)
         if sq_inplace_repeat is not None:
-            sq_inplace_repeat = gen.new_ssizeargfunc('sq_inplace_repeat', sq_inplace_repeat)
+            sq_inplace_repeat = gen.new_ssizeargfunc('sq_inplace_repeat', sq_inplace_repeat,
+                                                     is_mutator=True)
         self = super().__new__(cls,
                                sq_length=sq_length,
                                sq_concat=sq_concat,
@@ -21,8 +21,9 @@ BEGIN_NONAMESPACE
 // またメモリを開放するときにも明示的にデストラクタを起動する必要がある．
 struct %%CustomObject%%
 {
-  PyObject_HEAD
-  %%Custom%% mVal;
+  %%ObjectHead%%
+  %%Storage%% mVal;
+  %%EXTRA_MEMBERS%%
 };
 
 // Python 用のタイプ定義
@@ -53,6 +54,7 @@ bool
 
   return false;
 }
+%%READY_CODE%%
 %%CONV_CODE%%
 
 // @brief PyObject が %%Custom%% タイプか調べる．
@@ -65,13 +67,12 @@ bool
 }
 
 // @brief PyObject から %%Custom%% を取り出す．
-%%Custom%%&
+%%CustomRef%%
 %%PyCustom%%::_get_ref(
   PyObject* obj
 )
 {
-  auto my_obj = reinterpret_cast<%%CustomObject%%*>(obj);
-  return my_obj->mVal;
+  %%GET_REF_CODE%%
 }
 
 // @brief %%Custom%% を表すオブジェクトの型定義を返す．
@@ -44,6 +44,7 @@ public:
   init(
     PyObject* m ///< [in] 親のモジュールを表す PyObject
   );
+  %%READY_DEF%%
   %%TOPYOBJECT%%
 
   /// @brief PyObject が %%Custom%% タイプか調べる．
@@ -59,7 +60,7 @@ public:
   ///
   /// Check(obj) == true であると仮定している．
   static
-  ElemType&
+  %%ElemTypeRef%%
   _get_ref(
     PyObject* obj ///< [in] 変換元の PyObject
   );
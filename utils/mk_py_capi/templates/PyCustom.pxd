@@ -0,0 +1,30 @@
+### @file %%PyCustom%%.pxd
+### @brief %%PyCustom%% の Cython 用の宣言
+### @author Yusuke Matsunaga (松永 裕介)
+###
+### Copyright (C) %%Year%% Yusuke Matsunaga
+### All rights reserved.
+
+from cpython.object cimport PyObject, PyTypeObject
+from libcpp cimport bool
+%%PXD_CIMPORTS%%
+
+%%PXD_EXTERN%%
+
+    ## @brief %%Custom%% の宣言
+    cdef cppclass %%Custom%%:
+        pass
+
+    ## @brief %%Custom%% を Python から使用するための拡張
+    cdef cppclass %%PyCustom%%:
+        %%PXD_FUNCS%%
+
+
+## @brief %%PyCustom%%.cc の %%CustomObject%% と同じレイアウトを持つ構造体
+##
+## <%%CustomObject%%*>obj として用いる．
+## 値(storage="shared_ptr" の場合は共有ポインタ)は通常は mVal に格納されているが，
+## ビューオブジェクトの場合は mVal ではなく親オブジェクトの中の値を参照している．
+## 値を取り出す時には常に %%PyCustom%%._get_ref() を用いること．
+cdef struct %%CustomObject%%:
+    %%PXD_MEMBERS%%
@@ -0,0 +1,18 @@
+#ifndef %%MODULENAME%%_PCH_H
+#define %%MODULENAME%%_PCH_H
+
+/// @file %%ModuleName%%_pch.h
+/// @brief %%ModuleName%% モジュールの unity ビルド用のプリコンパイル済みヘッダ
+/// @author Yusuke Matsunaga (松永 裕介)
+///
+/// Copyright (C) %%Year%% Yusuke Matsunaga
+/// All rights reserved.
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include "ym_config.h"
+%%INCLUDES%%
+#include "pym/PyModule.h"
+
+#endif // %%MODULENAME%%_PCH_H
@@ -0,0 +1,10 @@
+/// @file %%UnityName%%.cc
+/// @brief %%ModuleName%% モジュールの unity ビルド用のファイル
+/// @author Yusuke Matsunaga (松永 裕介)
+///
+/// Copyright (C) %%Year%% Yusuke Matsunaga
+/// All rights reserved.
+
+#include "%%ModuleName%%_pch.h"
+
+%%INCLUDES%%
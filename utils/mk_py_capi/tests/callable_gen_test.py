@@ -0,0 +1,105 @@
+#! /usr/bin/env python3
+
+""" CallableArg のテストプログラム
+
+:file: callable_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen, CallableArg
+from mk_py_capi.cxxwriter import CxxWriter
+from cxx_check import compile_check
+
+
+VEC_H = '''
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Vec
+{
+  int x{0};
+};
+
+END_NAMESPACE_YM
+'''
+
+
+def init_body(writer):
+    writer.write_line('auto& val = PyVec::_get_ref(self);')
+    writer.gen_assign('val.x', 'func(1)')
+    writer.gen_return('0')
+
+
+def get_x_body(writer):
+    writer.gen_return('PyLong_FromLong(val.x)')
+
+
+def apply_body(writer):
+    writer.gen_stmt('func(val.x)')
+    writer.gen_return_py_none()
+
+
+gen = PyObjGen(classname='Vec',
+               pyname='Vec',
+               namespace='YM',
+               header_include_files=['Vec.h'],
+               source_include_files=['pym/PyVec.h',
+                                     'pym/PyInt.h',
+                                     'pym/PyCallable.h'])
+
+gen.add_dealloc()
+gen.add_new()
+gen.add_init(init_body,
+             arg_list=[CallableArg(name='func',
+                                   cvarname='func',
+                                   ret_pyclass='PyInt',
+                                   arg_pyclasses=['PyInt'])])
+gen.add_conv('default')
+gen.add_method('apply',
+               func_body=apply_body,
+               arg_list=[CallableArg(name='func',
+                                     cvarname='func',
+                                     arg_pyclasses=['PyInt'])])
+gen.add_method('get_x',
+               func_body=get_x_body)
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+assert 'PyCallable<PyInt, PyInt> func{func_obj};' in source
+assert 'PyCallable<void, PyInt> func{func_obj};' in source
+# CallableArg を用いた関数でだけ PyCallableError を捕まえる．
+assert source.count('catch ( PyCallableError& ) {') == 2
+
+# tp_init の中では呼び出し可能でない場合も例外の場合も -1 を返す．
+init_start = source.index('init_func(')
+init_end = source.index('\n}\n', init_start)
+init_source = source[init_start:init_end]
+assert ('PyErr_SetString(PyExc_TypeError, "func: must be callable");\n'
+        '    return -1;') in init_source
+assert ('catch ( PyCallableError& ) {\n'
+        '    return -1;') in init_source
+assert 'return nullptr;' not in init_source
+
+compile_check([gen], files={'Vec.h': VEC_H})
+
+gen.make_header()
+print(source)
+
+# PyCallableError を捕まえるコードを出力しない関数ではエラーになる．
+writer = CxxWriter(fout=io.StringIO())
+try:
+    with writer.gen_func_block(return_type='int',
+                               func_name='bad_func',
+                               args=[]):
+        CallableArg(cvarname='func').gen_conv(writer)
+except ValueError as err:
+    assert str(err).startswith('bad_func: CallableArg can not be used here')
+else:
+    assert False
+# フラグは次の関数に持ち越されない．
+assert not writer.catch_py_error
@@ -0,0 +1,112 @@
+#! /usr/bin/env python3
+
+""" ModuleGen(capi_version=N) のテストプログラム
+
+:file: capi_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+import tempfile
+from mk_py_capi import PyObjGen, ModuleGen
+from cxx_check import compile_check
+from cxx_check import can_compile, compile_files, make_ym_config, write_file
+
+
+VEC_H = '''
+#pragma once
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Vec
+{
+  int x{0};
+};
+
+END_NAMESPACE_YM
+'''
+
+# 利用側のコード
+USER_CC = '''
+#include "pym/PyCapi.h"
+#include "Vec.h"
+
+BEGIN_NAMESPACE_YM
+
+int
+get_x(
+  PyObject* obj
+)
+{
+  auto table = PyCapi::import("pkg.vec._C_API", 2);
+  PyCapiType<Vec> vec_api(table, "Vec");
+  if ( vec_api.is_valid() && vec_api.Check(obj) ) {
+    return vec_api._get_ref(obj).x;
+  }
+  Vec val;
+  if ( vec_api.is_valid() && vec_api.FromPyObject(obj, val) ) {
+    return val.x;
+  }
+  return 0;
+}
+
+END_NAMESPACE_YM
+'''
+
+
+def make_gen():
+    gen = PyObjGen(classname='Vec',
+                   pyname='Vec',
+                   namespace='YM',
+                   header_include_files=['Vec.h'],
+                   source_include_files=['pym/PyVec.h'])
+    gen.add_dealloc()
+    gen.add_conv('default')
+    gen.add_deconv('default')
+    return gen
+
+
+for lazy in (False, True):
+    gen = make_gen()
+    module_gen = ModuleGen(modulename='vec',
+                           namespace='YM',
+                           pyclass_gen_list=[gen],
+                           lazy=lazy,
+                           capi_version=2)
+
+    fout = io.StringIO()
+    module_gen.make_source(fout)
+    source = fout.getvalue()
+
+    # カプセル名は実行時の __name__ から作るのでモジュール名を埋め込まない．
+    assert 'if ( !PyCapi::export_table(m, &capi_table) ) {' in source
+    assert '_C_API' not in source
+    assert 'capi_ToPyObject_PyVec' in source
+    assert 'capi_FromPyObject_PyVec' in source
+    if lazy:
+        # 型の初期化は利用側から要素を探した時に行う．
+        assert 'capi_ready_PyVec' in source
+    else:
+        assert 'capi_ready_PyVec' not in source
+
+    compile_check([gen], module_gen=module_gen, files={'Vec.h': VEC_H})
+
+    print(source)
+
+if can_compile():
+    with tempfile.TemporaryDirectory() as dirname:
+        make_ym_config(dirname)
+        write_file(dirname, 'Vec.h', VEC_H)
+        write_file(dirname, 'user.cc', USER_CC)
+        compile_files(dirname, ['user.cc'])
+
+# 公開する型が必要
+try:
+    ModuleGen(modulename='vec',
+              capi_version=1)
+except ValueError as err:
+    assert str(err) == 'capi_version requires pyclass_gen_list'
+else:
+    assert False
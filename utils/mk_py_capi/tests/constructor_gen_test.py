@@ -0,0 +1,99 @@
+#! /usr/bin/env python3
+
+""" PyObjGen.add_constructor() のテストプログラム
+
+:file: constructor_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen, IntArg, OptArg
+from cxx_check import compile_check
+
+
+BUF_H = '''
+#include "ym_config.h"
+#include <stdexcept>
+#include <vector>
+
+BEGIN_NAMESPACE_YM
+
+class Buf
+{
+public:
+
+  explicit
+  Buf(int size) : mData(check(size)) { }
+
+private:
+
+  static
+  std::size_t
+  check(int size)
+  {
+    if ( size < 0 ) {
+      throw std::invalid_argument{"size must be non-negative"};
+    }
+    return size;
+  }
+
+  std::vector<char> mData;
+
+};
+
+END_NAMESPACE_YM
+'''
+
+
+def check_error(func, msg):
+    try:
+        func()
+    except ValueError as err:
+        assert str(err) == msg, str(err)
+    else:
+        assert False, f'"{msg}" is expected'
+
+
+gen = PyObjGen(classname='Buf',
+               pyname='Buf',
+               namespace='YM',
+               header_include_files=['Buf.h'],
+               source_include_files=['pym/PyBuf.h'])
+
+gen.add_dealloc()
+gen.add_constructor([OptArg(),
+                     IntArg(name='size',
+                            cvarname='size',
+                            cvardefault='0')],
+                    'size')
+gen.add_conv('default')
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+# 値は変換した引数から直接構築される．
+assert 'new (&my_obj->mVal) Buf(size);' in source
+# 構築に失敗した場合は領域を解放する．
+assert 'type->tp_free(self);' in source
+assert 'throw;' in source
+# tp_init は設定されない．
+assert 'tp_init' not in source
+
+compile_check([gen], files={'Buf.h': BUF_H})
+
+gen.make_header()
+print(source)
+
+# コンストラクタと init は併用できない．
+gen = PyObjGen(classname='Buf',
+               pyname='Buf')
+gen.add_constructor([], 'Buf{}')
+check_error(lambda: gen.add_init(), 'init can not be used with constructor')
+
+gen = PyObjGen(classname='Buf',
+               pyname='Buf')
+gen.add_init()
+check_error(lambda: gen.add_constructor([], 'Buf{}'),
+            'constructor can not be used with init')
@@ -0,0 +1,85 @@
+#! /usr/bin/env python3
+
+""" PyObjGen の __copy__() と __deepcopy__() のテストプログラム
+
+:file: copy_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen
+from cxx_check import compile_check
+
+
+VEC_H = '''
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Vec
+{
+  int x{0};
+};
+
+END_NAMESPACE_YM
+'''
+
+
+def make_gen(storage):
+    header_include_files = ['Vec.h']
+    if storage == 'shared_ptr':
+        header_include_files.append('<memory>')
+    gen = PyObjGen(classname='Vec',
+                   pyname='Vec',
+                   namespace='YM',
+                   storage=storage,
+                   header_include_files=header_include_files,
+                   source_include_files=['pym/PyVec.h'])
+    gen.add_dealloc()
+    gen.add_conv('default')
+    gen.add_copy()
+    return gen
+
+
+# 値をコピーする．
+gen = make_gen('inline')
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+assert '"__copy__"' in source
+assert '"__deepcopy__"' in source
+assert 'return PyVec::ToPyObject(val);' in source
+
+compile_check([gen], files={'Vec.h': VEC_H})
+
+gen.make_header()
+print(source)
+
+# shared_ptr の場合は所有権を共有するので val は作らない．
+gen = make_gen('shared_ptr')
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+assert 'return PyVec::ToPyObject(PyVec::_get_shared(self));' in source
+assert 'auto& val' not in source
+
+compile_check([gen], files={'Vec.h': VEC_H})
+
+gen.make_header()
+print(source)
+
+# Conv が必要
+gen = PyObjGen(classname='Vec',
+               pyname='Vec')
+gen.add_copy()
+try:
+    gen.make_source(io.StringIO())
+except ValueError as err:
+    assert str(err) == 'add_copy() requires Conv'
+else:
+    assert False
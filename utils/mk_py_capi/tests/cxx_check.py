@@ -0,0 +1,131 @@
+#! /usr/bin/env python3
+
+""" 生成したコードのコンパイルチェックを行う関数の定義ファイル
+
+:file: cxx_check.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+import os
+import shutil
+import subprocess
+import sysconfig
+import tempfile
+
+
+# このファイルから見たリポジトリのトップディレクトリ
+TOP_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__),
+                                        '..', '..', '..'))
+
+# 環境変数 CXX で上書きできる．
+CXX = os.environ.get('CXX', 'c++')
+
+
+def make_ym_config(dirname):
+    """etc/ym_config.h.in から ym_config.h を作る．
+
+    CMake の configure_file() の代わりに最低限の置換を行う．
+    """
+    replace_list = [('@INCLUDE_STDLIB@', '#include <stdlib.h>'),
+                    ('@INCLUDE_STRING@', '#include <string.h>'),
+                    ('@INCLUDE_UNISTD@', '#include <unistd.h>'),
+                    ('@INCLUDE_LIMITS@', '#include <limits.h>'),
+                    ('@INCLUDE_FLOAT@', '#include <float.h>'),
+                    ('@INCLUDE_MATH@', '#include <math.h>'),
+                    ('@PTRINT_TYPE@', 'unsigned long'),
+                    ('@YM_NSNAME@', 'nsYm')]
+    with open(os.path.join(TOP_DIR, 'etc', 'ym_config.h.in'), 'rt') as fin, \
+         open(os.path.join(dirname, 'ym_config.h'), 'wt') as fout:
+        for line in fin:
+            if line.startswith('#cmakedefine'):
+                name = line.split()[1]
+                if name == 'YM_UNIX' and os.name == 'posix':
+                    line = f'#define {name}\n'
+                else:
+                    line = f'// {name}\n'
+            for rep_pat, rep_val in replace_list:
+                line = line.replace(rep_pat, rep_val)
+            fout.write(line)
+
+
+def write_file(dirname, filename, contents):
+    path = os.path.join(dirname, filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wt') as fout:
+        fout.write(contents)
+
+
+def gen_contents(func):
+    fout = io.StringIO()
+    func(fout)
+    return fout.getvalue()
+
+
+def can_compile():
+    """C++ コンパイラと Python.h が見つかった時 True を返す．
+    """
+    if shutil.which(CXX) is None:
+        print(f'// {CXX} not found, compile check skipped')
+        return False
+    py_include = sysconfig.get_paths()['include']
+    if not os.path.exists(os.path.join(py_include, 'Python.h')):
+        print('// Python.h not found, compile check skipped')
+        return False
+    return True
+
+
+def compile_files(dirname, source_list, flags=[]):
+    """dirname の下のソースファイルをコンパイルする．
+
+    警告もエラーとみなす．
+    """
+    py_include = sysconfig.get_paths()['include']
+    for source in source_list:
+        # 既存の生成コードは例外を値で捕まえているので
+        # -Wcatch-value だけは除外する．
+        cmd = [CXX, '-std=c++20', '-fsyntax-only',
+               '-Wall', '-Werror', '-Wno-catch-value',
+               f'-I{dirname}',
+               f'-I{os.path.join(TOP_DIR, "include")}',
+               f'-I{py_include}'] + flags + [source]
+        result = subprocess.run(cmd, cwd=dirname,
+                                capture_output=True, text=True)
+        assert result.returncode == 0, f'{source}:\n{result.stderr}'
+
+
+def compile_check(gen_list=[], *,
+                  module_gen=None,
+                  files={},
+                  flags=[]):
+    """生成したコードをコンパイルする．
+
+    gen_list は PyObjGen のリスト，module_gen は ModuleGen で，
+    それぞれヘッダファイルとソースファイルを生成してコンパイルする．
+    files はファイル名をキー，内容を値とする辞書で，
+    ラップする C++ のクラスの定義などを与える．
+    警告もエラーとみなす．
+    C++ コンパイラか Python.h が見つからない場合はチェックを行わずに
+    False を返す．
+    """
+    if not can_compile():
+        return False
+
+    with tempfile.TemporaryDirectory() as dirname:
+        make_ym_config(dirname)
+        for filename, contents in files.items():
+            write_file(dirname, filename, contents)
+        source_list = []
+        for gen in gen_list:
+            write_file(dirname, f'pym/{gen.pyclassname}.h',
+                       gen_contents(gen.make_header))
+            source = f'{gen.pyclassname}.cc'
+            write_file(dirname, source, gen_contents(gen.make_source))
+            source_list.append(source)
+        if module_gen is not None:
+            source = f'{module_gen.modulename}_module.cc'
+            write_file(dirname, source, gen_contents(module_gen.make_source))
+            source_list.append(source)
+        compile_files(dirname, source_list, flags)
+    return True
@@ -0,0 +1,82 @@
+#! /usr/bin/env python3
+
+""" PyObjGen(deferred_dealloc=True) のテストプログラム
+
+:file: deferred_dealloc_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen, ModuleGen
+from cxx_check import compile_check
+
+
+BUF_H = '''
+#include "ym_config.h"
+#include <vector>
+
+BEGIN_NAMESPACE_YM
+
+struct Buf
+{
+  std::vector<int> data;
+};
+
+END_NAMESPACE_YM
+'''
+
+
+def make_gen(deferred_dealloc):
+    gen = PyObjGen(classname='Buf',
+                   pyname='Buf',
+                   namespace='YM',
+                   deferred_dealloc=deferred_dealloc,
+                   header_include_files=['Buf.h'],
+                   source_include_files=['pym/PyBuf.h'])
+    gen.add_dealloc()
+    gen.add_conv('default')
+    return gen
+
+
+gen = make_gen(True)
+module_gen = ModuleGen(modulename='buf',
+                       namespace='YM',
+                       pyclass_gen_list=[gen])
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+# 値はムーブしてキューに入れる．
+assert '#include "pym/PyDeferredDealloc.h"' in source
+assert 'PyDeferredDealloc::push(std::move(obj->mVal));' in source
+# キューに入らなかった場合のためにデストラクタは常に呼ぶ．
+assert 'obj->mVal.~Buf();' in source
+
+fout = io.StringIO()
+module_gen.make_source(fout)
+module_source = fout.getvalue()
+
+assert '#include "pym/PyDeferredDealloc.h"' in module_source
+assert '!PyDeferredDealloc::init()' in module_source
+assert '"_dealloc_flush"' in module_source
+assert '"_dealloc_stats"' in module_source
+
+compile_check([gen], module_gen=module_gen, files={'Buf.h': BUF_H})
+
+print(source)
+print(module_source)
+
+# deferred_dealloc=False の時は何も出力しない．
+gen = make_gen(False)
+module_gen = ModuleGen(modulename='buf',
+                       namespace='YM',
+                       pyclass_gen_list=[gen])
+fout = io.StringIO()
+gen.make_source(fout)
+assert 'PyDeferredDealloc' not in fout.getvalue()
+fout = io.StringIO()
+module_gen.make_source(fout)
+assert 'PyDeferredDealloc' not in fout.getvalue()
+assert '_dealloc_flush' not in fout.getvalue()
@@ -0,0 +1,90 @@
+#! /usr/bin/env python3
+
+""" PyObjGen のハッシュ値のキャッシュのテストプログラム
+
+:file: hash_cache_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen
+from cxx_check import compile_check
+
+
+VEC_H = '''
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Vec
+{
+  int x{0};
+  SizeType hash() const { return x; }
+  Vec& operator+=(const Vec& r) { x += r.x; return *this; }
+  Vec operator+(const Vec& r) const { return Vec{x + r.x}; }
+};
+
+END_NAMESPACE_YM
+'''
+
+
+def hash_body(writer):
+    writer.gen_return('val.hash()')
+
+
+def clear_body(writer):
+    writer.gen_assign('val.x', '0')
+    writer.gen_return_py_none()
+
+
+def get_x_body(writer):
+    writer.gen_return('PyLong_FromLong(val.x)')
+
+
+def set_x_body(writer):
+    writer.gen_assign('val.x', 'PyLong_AsLong(obj)')
+    writer.gen_return('0')
+
+
+gen = PyObjGen(classname='Vec',
+               pyname='Vec',
+               namespace='YM',
+               header_include_files=['Vec.h'],
+               source_include_files=['pym/PyVec.h'])
+
+gen.add_dealloc()
+gen.add_conv('default')
+gen.add_hash(hash_body,
+             cache=True)
+gen.add_nb_add(reuse_temp=True)
+gen.add_nb_inplace_add()
+gen.add_method('clear',
+               func_body=clear_body,
+               mutator=True)
+gen.add_getter('get_x',
+               func_body=get_x_body)
+gen.add_setter('set_x',
+               func_body=set_x_body)
+gen.add_attr('x',
+             getter_name='get_x',
+             setter_name='set_x')
+gen.add_view()
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+# キャッシュ用のメンバを持つ．
+assert 'Py_hash_t mHash;' in source
+# 0 は未計算を表す．
+assert 'if ( my_obj->mHash != 0 ) {' in source
+# ビューのハッシュ値はキャッシュしない．
+assert 'if ( hash_val != -1 && my_obj->mPtr == nullptr ) {' in source
+# 一時オブジェクトの再利用，in-place 演算，mutator，setter で無効化される．
+assert source.count('reinterpret_cast<Vec_Object*>(self)->mHash = 0;') >= 4
+
+compile_check([gen], files={'Vec.h': VEC_H})
+
+gen.make_header()
+print(source)
@@ -0,0 +1,94 @@
+#! /usr/bin/env python3
+
+""" PyObjGen の同一性キャッシュのテストプログラム
+
+:file: identity_cache_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen, AddOp
+from cxx_check import compile_check
+
+
+NODEREF_H = '''
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Node
+{
+  int id{0};
+};
+
+struct NodeRef
+{
+  Node* mPtr{nullptr};
+  const Node* ptr() const { return mPtr; }
+  NodeRef& operator+=(const NodeRef&) { return *this; }
+};
+
+END_NAMESPACE_YM
+'''
+
+
+def make_gen():
+    return PyObjGen(classname='NodeRef',
+                    pyname='NodeRef',
+                    namespace='YM',
+                    header_include_files=['NodeRef.h'],
+                    source_include_files=['pym/PyNodeRef.h'])
+
+
+def check_error(gen, msg):
+    try:
+        gen.make_source(io.StringIO())
+    except ValueError as err:
+        assert str(err).startswith(msg), str(err)
+    else:
+        assert False, f'"{msg}" is expected'
+
+
+gen = make_gen()
+gen.add_dealloc()
+gen.add_conv('default')
+gen.add_identity_cache('val.ptr()',
+                       max_size=100)
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+assert 'val.ptr()' in source
+
+compile_check([gen], files={'NodeRef.h': NODEREF_H})
+
+gen.make_header()
+print(source)
+
+# 値を変更する関数を持つ型では用いることができない．
+def add_mutator1(gen):
+    gen.add_method('clear',
+                   mutator=True)
+
+def add_mutator2(gen):
+    gen.add_getter('get_x')
+    gen.add_setter('set_x')
+    gen.add_attr('x',
+                 getter_name='get_x',
+                 setter_name='set_x')
+
+def add_mutator3(gen):
+    gen.add_nb_add(op_list1=[AddOp('PyNodeRef')],
+                   reuse_temp=True)
+
+def add_mutator4(gen):
+    gen.add_nb_inplace_add()
+
+for add_mutator in (add_mutator1, add_mutator2, add_mutator3, add_mutator4):
+    gen = make_gen()
+    gen.add_conv('default')
+    gen.add_identity_cache()
+    add_mutator(gen)
+    check_error(gen, 'identity_cache can not be used with functions changing the value')
@@ -0,0 +1,82 @@
+#! /usr/bin/env python3
+
+""" instrument=True の時の計測コードのテストプログラム
+
+:file: instrument_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen, ModuleGen
+from cxx_check import compile_check
+
+
+VEC_H = '''
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Vec
+{
+  int x{0};
+  Vec operator+(const Vec& r) const { return Vec{x + r.x}; }
+};
+
+END_NAMESPACE_YM
+'''
+
+
+def clear_body(writer):
+    writer.gen_assign('val.x', '0')
+    writer.gen_return_py_none()
+
+
+def make_gen():
+    gen = PyObjGen(classname='Vec',
+                   pyname='Vec',
+                   namespace='YM',
+                   header_include_files=['Vec.h'],
+                   source_include_files=['pym/PyVec.h'])
+    gen.add_dealloc()
+    gen.add_conv('default')
+    gen.add_deconv('default')
+    gen.add_nb_add()
+    gen.add_method('clear',
+                   func_body=clear_body,
+                   mutator=True)
+    return gen
+
+
+gen = make_gen()
+module_gen = ModuleGen(modulename='vec',
+                       namespace='YM',
+                       pyclass_gen_list=[gen],
+                       instrument=True)
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+# 拡張クラスも計測の対象になる．
+assert '#include "pym/PyPerfStats.h"' in source
+assert 'PyPerfStats::entry("Vec.clear")' in source
+assert 'PyPerfStats::Probe perf_probe(perf_entry);' in source
+
+fout = io.StringIO()
+module_gen.make_source(fout)
+module_source = fout.getvalue()
+
+assert '"_perf_stats"' in module_source
+assert '"_perf_reset"' in module_source
+assert 'PyPerfStats::stats()' in module_source
+
+compile_check([gen], module_gen=module_gen, files={'Vec.h': VEC_H})
+
+print(source)
+print(module_source)
+
+# instrument=False の時は何も出力しない．
+fout = io.StringIO()
+make_gen().make_source(fout)
+assert 'PyPerfStats' not in fout.getvalue()
@@ -0,0 +1,108 @@
+#! /usr/bin/env python3
+
+""" PyObjGen のインターン化のテストプログラム
+
+:file: intern_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen, AddOp
+from cxx_check import compile_check
+
+
+SYM_H = '''
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Sym
+{
+  int id{0};
+  SizeType hash() const { return id; }
+  bool operator==(const Sym& r) const { return id == r.id; }
+  Sym& operator+=(const Sym&) { return *this; }
+  Sym operator+(const Sym& r) const { return r; }
+};
+
+END_NAMESPACE_YM
+'''
+
+
+def make_gen():
+    return PyObjGen(classname='Sym',
+                    pyname='Sym',
+                    namespace='YM',
+                    intern=True,
+                    header_include_files=['Sym.h'],
+                    source_include_files=['pym/PySym.h'])
+
+
+def hash_body(writer):
+    writer.gen_return('val.hash()')
+
+
+def check_error(gen, msg):
+    try:
+        gen.make_source(io.StringIO())
+    except ValueError as err:
+        assert str(err).startswith(msg), str(err)
+    else:
+        assert False, f'"{msg}" is expected'
+
+
+gen = make_gen()
+gen.add_dealloc()
+gen.add_conv('default')
+gen.add_hash(hash_body)
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+# tp_hash はインターン表のキーを流用する．
+assert 'mInternHash' in source
+
+compile_check([gen], files={'Sym.h': SYM_H})
+
+gen.make_header()
+print(source)
+
+# ハッシュ関数が必要
+gen = make_gen()
+gen.add_conv('default')
+check_error(gen, 'intern=True requires hash')
+
+# 同一性キャッシュとは併用できない．
+gen = make_gen()
+gen.add_conv('default')
+gen.add_hash(hash_body)
+gen.add_identity_cache()
+check_error(gen, 'intern=True can not be used with identity_cache')
+
+# 値を変更する関数を持つ型では用いることができない．
+def add_mutator1(gen):
+    gen.add_method('clear',
+                   mutator=True)
+
+def add_mutator2(gen):
+    gen.add_getter('get_x')
+    gen.add_setter('set_x')
+    gen.add_attr('x',
+                 getter_name='get_x',
+                 setter_name='set_x')
+
+def add_mutator3(gen):
+    gen.add_nb_add(op_list1=[AddOp('PySym')],
+                   reuse_temp=True)
+
+def add_mutator4(gen):
+    gen.add_nb_inplace_add()
+
+for add_mutator in (add_mutator1, add_mutator2, add_mutator3, add_mutator4):
+    gen = make_gen()
+    gen.add_conv('default')
+    gen.add_hash(hash_body)
+    add_mutator(gen)
+    check_error(gen, 'intern=True can not be used with functions changing the value')
@@ -0,0 +1,104 @@
+#! /usr/bin/env python3
+
+""" ModuleGen(lazy=True) のテストプログラム
+
+:file: lazy_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen, ModuleGen
+from cxx_check import compile_check
+
+
+SHAPE_H = '''
+#pragma once
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Point
+{
+  int x{0};
+};
+
+struct Line
+{
+  Point p1;
+  Point p2;
+};
+
+END_NAMESPACE_YM
+'''
+
+
+def p1_body(writer):
+    writer.gen_return_pyobject('PyPoint', 'val.p1')
+
+
+point_gen = PyObjGen(classname='Point',
+                     pyname='Point',
+                     namespace='YM',
+                     header_include_files=['Shape.h'],
+                     source_include_files=['pym/PyPoint.h'])
+point_gen.add_dealloc()
+point_gen.add_conv('default')
+
+line_gen = PyObjGen(classname='Line',
+                    pyname='Line',
+                    namespace='YM',
+                    header_include_files=['Shape.h'],
+                    source_include_files=['pym/PyLine.h',
+                                          'pym/PyPoint.h'])
+line_gen.add_dealloc()
+line_gen.add_conv('default')
+line_gen.add_method('p1',
+                    func_body=p1_body,
+                    arg_list=None)
+line_gen.add_dependency('PyPoint')
+
+# Line が Point に依存している．
+module_gen = ModuleGen(modulename='shape',
+                       namespace='YM',
+                       pyclass_gen_list=[line_gen, point_gen],
+                       lazy=True)
+module_gen.add_method('origin',
+                      arg_list=None,
+                      func_body=lambda writer: writer.gen_return('PyPoint::ToPyObject(Point{})'))
+
+fout = io.StringIO()
+module_gen.make_source(fout)
+module_source = fout.getvalue()
+
+assert '"__getattr__"' in module_source
+assert '"__dir__"' in module_source
+# 型オブジェクトの準備だけはモジュールの初期化時に依存関係の順に行う．
+pos_point = module_source.index('if ( !PyPoint::ready() ) {')
+pos_line = module_source.index('if ( !PyLine::ready() ) {')
+assert pos_point < pos_line
+# 登録は最初にアクセスされた時に行う．
+assert 'PyLine::init(m)' in module_source
+assert 'if ( !init_PyPoint(m) ) {' in module_source
+
+fout = io.StringIO()
+point_gen.make_source(fout)
+source = fout.getvalue()
+
+assert 'PyPoint::ready()\n{' in source
+assert 'PyType_HasFeature(&Point_Type, Py_TPFLAGS_READY)' in source
+
+compile_check([line_gen, point_gen], module_gen=module_gen,
+              files={'Shape.h': SHAPE_H})
+
+print(module_source)
+print(source)
+
+# lazy=False の時は ready() を作らない．
+gen = PyObjGen(classname='Point',
+               pyname='Point')
+gen.add_dealloc()
+fout = io.StringIO()
+gen.make_header(fout)
+gen.make_source(fout)
+assert 'ready' not in fout.getvalue()
@@ -0,0 +1,71 @@
+#! /usr/bin/env python3
+
+""" ObjRefArg と TypedObjRefArg のテストプログラム
+
+:file: objref_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen, ObjRefArg, TypedObjRefArg
+from cxx_check import compile_check
+
+
+VEC_H = '''
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Vec
+{
+  int x{0};
+  int dot(const Vec& r) const { return x * r.x; }
+};
+
+END_NAMESPACE_YM
+'''
+
+
+def dot_body(writer):
+    writer.gen_return('PyLong_FromLong(val.dot(other))')
+
+
+gen = PyObjGen(classname='Vec',
+               pyname='Vec',
+               namespace='YM',
+               header_include_files=['Vec.h'],
+               source_include_files=['pym/PyVec.h'])
+
+gen.add_dealloc()
+gen.add_conv('default')
+gen.add_deconv('default')
+gen.add_method('dot',
+               func_body=dot_body,
+               arg_list=[ObjRefArg(name='other',
+                                   cvartype='Vec',
+                                   cvarname='other',
+                                   pyclassname='PyVec')])
+gen.add_method('dot2',
+               func_body=dot_body,
+               arg_list=[TypedObjRefArg(name='other',
+                                        cvartype='Vec',
+                                        cvarname='other',
+                                        pyclassname='PyVec')])
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+# 値はコピーせずに参照する．
+assert 'other_ptr = &PyVec::_get_ref(other_obj);' in source
+assert 'const Vec& other = *other_ptr;' in source
+# 他の型の場合は FromPyObject() で変換する．
+assert 'PyVec::FromPyObject(other_obj, *other_val)' in source
+# TypedObjRefArg では PyArg_Parse() で型のチェックを行う．
+assert 'PyVec::_typeobject(), &other_obj' in source
+
+compile_check([gen], files={'Vec.h': VEC_H})
+
+gen.make_header()
+print(source)
@@ -0,0 +1,102 @@
+#! /usr/bin/env python3
+
+""" PyObjGen の pickle 用の関数のテストプログラム
+
+:file: pickle_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen
+from cxx_check import compile_check
+
+
+POINT_H = '''
+#include "ym_config.h"
+#include "pym/PyByteArrayBuf.h"
+#include <cstdint>
+#include <cstring>
+#include <stdexcept>
+
+BEGIN_NAMESPACE_YM
+
+struct Point
+{
+  double x{0.0};
+  double y{0.0};
+
+  static
+  void
+  serialize(const Point& val, PyByteArrayBuf& buf)
+  {
+    buf.append(reinterpret_cast<const char*>(&val), sizeof(Point));
+  }
+
+  static
+  Point
+  deserialize(const char* data, Py_ssize_t size, std::uint8_t version)
+  {
+    if ( size != sizeof(Point) ) {
+      throw std::invalid_argument{"wrong size"};
+    }
+    Point val;
+    std::memcpy(&val, data, sizeof(Point));
+    return val;
+  }
+};
+
+END_NAMESPACE_YM
+'''
+
+
+gen = PyObjGen(classname='Point',
+               pyname='Point',
+               namespace='YM',
+               header_include_files=['Point.h'],
+               source_include_files=['pym/PyPoint.h'])
+
+gen.add_dealloc()
+gen.add_conv('default')
+gen.add_deconv('default')
+gen.add_pickle(serialize='Point::serialize',
+               deserialize='Point::deserialize',
+               version=2,
+               oob_threshold=1024)
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+assert '"__reduce_ex__"' in source
+assert '"_from_pickle"' in source
+# 必要なヘッダは自動的にインクルードされる．
+assert '#include "pym/PyByteArrayBuf.h"' in source
+assert '#include <cstdint>' in source
+# bytearray に直接書き込む．
+assert 'PyByteArrayBuf buf;' in source
+assert 'buf.push_back(static_cast<char>(2));' in source
+# serialize の例外は Python の例外に変換する．
+assert 'catch ( std::exception& err ) {' in source
+# 大きなデータは複製せずに PickleBuffer にする．
+assert 'protocol >= 5 && size >= 1024' in source
+assert 'PyPickleBuffer_FromObject(array)' in source
+assert 'static_cast<std::uint8_t>(data[0]) > 2' in source
+
+compile_check([gen], files={'Point.h': POINT_H})
+
+gen.make_header()
+print(source)
+
+# 版数は 1 から 255 まで
+for version in (0, 256):
+    gen = PyObjGen(classname='Point',
+                   pyname='Point')
+    try:
+        gen.add_pickle(serialize='Point::serialize',
+                       deserialize='Point::deserialize',
+                       version=version)
+    except ValueError as err:
+        assert str(err) == f'{version}: version must be in 1 .. 255'
+    else:
+        assert False
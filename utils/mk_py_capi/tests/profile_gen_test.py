@@ -0,0 +1,87 @@
+#! /usr/bin/env python3
+
+""" 計測結果を用いたコード生成のテストプログラム
+
+:file: profile_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen, ModuleGen
+from mk_py_capi.number_gen import Op
+from cxx_check import compile_check
+
+
+VEC_H = '''
+#pragma once
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Scale
+{
+  double s{1.0};
+};
+
+struct Vec
+{
+  double x{0.0};
+  Vec operator*(double r) const { return Vec{x * r}; }
+  Vec operator*(const Scale& r) const { return Vec{x * r.s}; }
+};
+
+END_NAMESPACE_YM
+'''
+
+
+# pyname は pyclassname から 'Py' を除いたものとは限らない．
+scale_gen = PyObjGen(classname='Scale',
+                     pyname='Scalar',
+                     pyclassname='PyScale',
+                     namespace='YM',
+                     header_include_files=['Vec.h'],
+                     source_include_files=['pym/PyScale.h'])
+scale_gen.add_dealloc()
+scale_gen.add_conv('default')
+
+vec_gen = PyObjGen(classname='Vec',
+                   pyname='Vector',
+                   pyclassname='PyVec',
+                   namespace='YM',
+                   header_include_files=['Vec.h'],
+                   source_include_files=['pym/PyVec.h',
+                                         'pym/PyScale.h',
+                                         'pym/PyFloat.h'])
+vec_gen.add_dealloc()
+vec_gen.add_conv('default')
+vec_gen.add_nb_multiply(expr=None,
+                        op_list1=[Op('PyFloat', 'val1 * val2', useref=False),
+                                  Op('PyScale', 'val1 * val2', exact=True)])
+
+# 型ごとの呼び出し回数は Scalar の方が多い．
+profile = {
+    'Vector.nb_multiply': [100, 1.0, {'Scalar': 90, 'float': 10}],
+    'Scalar.dealloc_func': [1, 0.0, {}],
+}
+module_gen = ModuleGen(modulename='vec',
+                       namespace='YM',
+                       pyclass_gen_list=[scale_gen, vec_gen],
+                       profile=profile)
+
+fout = io.StringIO()
+vec_gen.make_source(fout)
+source = fout.getvalue()
+
+# 呼び出し回数の多い型の判定を先に行う．
+pos_scale = source.index('other_type == PyScale_type')
+pos_float = source.index('other_type == &PyFloat_Type')
+assert pos_scale < pos_float
+# 頻繁に呼ばれる関数には [[gnu::hot]] を付ける．
+assert '[[gnu::hot]]' in source
+
+compile_check([scale_gen, vec_gen], module_gen=module_gen,
+              files={'Vec.h': VEC_H})
+
+vec_gen.make_header()
+print(source)
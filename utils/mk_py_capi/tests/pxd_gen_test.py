@@ -0,0 +1,88 @@
+#! /usr/bin/env python3
+
+""" Cython 用の .pxd ファイルの生成のテストプログラム
+
+:file: pxd_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+import os
+import tempfile
+from mk_py_capi import PyObjGen, ModuleGen
+
+
+gen = PyObjGen(classname='Vec',
+               pyname='Vec',
+               namespace='YM',
+               header_include_files=['Vec.h'],
+               source_include_files=['pym/PyVec.h'])
+gen.add_dealloc()
+gen.add_conv('default')
+gen.add_deconv('default')
+gen.add_view()
+
+fout = io.StringIO()
+gen.make_pxd(fout)
+pxd = fout.getvalue()
+
+assert 'cdef extern from "pym/PyVec.h" namespace "nsYm":' in pxd
+# ToPyObject() の失敗は nullptr で表される．
+assert 'PyObject* ToPyObject(const Vec& val) except NULL' in pxd
+# FromPyObject() の C++ の例外は Python の例外に変換する．
+assert 'bool FromPyObject(PyObject* obj, Vec& val) except +' in pxd
+assert 'bool Check(PyObject* obj) nogil' in pxd
+assert 'Vec& _get_ref(PyObject* obj) nogil' in pxd
+assert 'PyTypeObject* _typeobject() nogil' in pxd
+# ビューの値は mVal にないので _get_ref() を使う．
+assert 'PyVec._get_ref() を用いること' in pxd
+assert 'cdef struct Vec_Object:' in pxd
+assert '    Vec mVal' in pxd
+
+print(pxd)
+
+# shared_ptr の場合
+gen = PyObjGen(classname='Vec',
+               pyname='Vec',
+               namespace='YM',
+               storage='shared_ptr',
+               header_include_files=['Vec.h', '<memory>'])
+gen.add_dealloc()
+
+fout = io.StringIO()
+gen.make_pxd(fout, cxx_namespace='nsFoo')
+pxd = fout.getvalue()
+
+assert 'from libcpp.memory cimport shared_ptr' in pxd
+assert 'namespace "nsFoo":' in pxd
+assert '    shared_ptr[const Vec] mVal' in pxd
+# Conv/Deconv を持たない．
+assert 'ToPyObject' not in pxd
+assert 'FromPyObject' not in pxd
+
+# 可変長オブジェクトの場合
+gen = PyObjGen(classname='Row',
+               pyname='Row',
+               item_type='double',
+               header_include_files=['Row.h'])
+gen.add_dealloc()
+
+fout = io.StringIO()
+gen.make_pxd(fout)
+pxd = fout.getvalue()
+
+assert 'ctypedef struct PyVarObject:' in pxd
+assert '    PyVarObject ob_base' in pxd
+
+# make_all() はモジュールの .pxd も出力する．
+module_gen = ModuleGen(modulename='vec',
+                       namespace='YM',
+                       pyclass_gen_list=[gen])
+with tempfile.TemporaryDirectory() as dirname:
+    module_gen.make_all(include_dir=dirname,
+                        source_dir=dirname,
+                        pxd_dir=dirname)
+    with open(os.path.join(dirname, 'vec.pxd'), 'rt') as fin:
+        assert 'from .PyRow cimport *' in fin.read()
+    assert os.path.exists(os.path.join(dirname, 'PyRow.pxd'))
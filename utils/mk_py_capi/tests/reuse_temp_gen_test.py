@@ -0,0 +1,70 @@
+#! /usr/bin/env python3
+
+""" PyObjGen の一時オブジェクトの再利用のテストプログラム
+
+:file: reuse_temp_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen, AddOp
+from cxx_check import compile_check
+
+
+VEC_H = '''
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Vec
+{
+  int x{0};
+  Vec& operator+=(const Vec& r) { x += r.x; return *this; }
+  Vec operator+(const Vec& r) const { return Vec{x + r.x}; }
+  Vec operator-(const Vec& r) const { return Vec{x - r.x}; }
+};
+
+END_NAMESPACE_YM
+'''
+
+
+gen = PyObjGen(classname='Vec',
+               pyname='Vec',
+               namespace='YM',
+               header_include_files=['Vec.h'],
+               source_include_files=['pym/PyVec.h'])
+
+gen.add_dealloc()
+gen.add_conv('default')
+gen.add_nb_add(reuse_temp=True)
+gen.add_nb_subtract()
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+# 一時オブジェクトを判定する関数が生成される．
+assert 'Py_REFCNT(obj) == 1' in source
+# 左オペランドが一時オブジェクトの場合はその領域を再利用する．
+# reuse_temp を指定していない nb_subtract では再利用しない．
+assert source.count('if ( is_temporary(self) ) {') == 1
+# ビューを持たない型ではビューの判定は行わない．
+assert 'mPtr' not in source
+
+compile_check([gen], files={'Vec.h': VEC_H})
+
+gen.make_header()
+print(source)
+
+# storage='shared_ptr' では用いることができない．
+gen = PyObjGen(classname='Vec',
+               pyname='Vec',
+               storage='shared_ptr')
+try:
+    gen.add_nb_add(op_list1=[AddOp('PyVec')],
+                   reuse_temp=True)
+except ValueError as err:
+    assert str(err) == "reuse_temp can not be used with storage='shared_ptr'"
+else:
+    assert False
@@ -0,0 +1,86 @@
+#! /usr/bin/env python3
+
+""" shared_runtime=True の時の共通関数を用いたコードのテストプログラム
+
+:file: runtime_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen, ModuleGen
+from mk_py_capi import IntArg, ObjConvArg, OptArg
+from cxx_check import compile_check
+
+
+VEC_H = '''
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Vec
+{
+  int x{0};
+  Vec operator+(const Vec& r) const { return Vec{x + r.x}; }
+};
+
+END_NAMESPACE_YM
+'''
+
+
+def init_body(writer):
+    writer.gen_autoref_assign('val', 'PyVec::_get_ref(self)')
+    writer.gen_assign('val.x', 'x + src.x')
+    writer.gen_return('0')
+
+
+def scale_body(writer):
+    writer.gen_return_pyobject('PyVec', 'Vec{val.x * n}')
+
+
+gen = PyObjGen(classname='Vec',
+               pyname='Vec',
+               namespace='YM',
+               header_include_files=['Vec.h'],
+               source_include_files=['pym/PyVec.h'])
+
+gen.add_dealloc()
+gen.add_conv('default')
+gen.add_deconv('default')
+gen.add_new()
+# tp_init は int を返すので変換のエラー時には -1 を返す．
+gen.add_init(init_body,
+             arg_list=[IntArg(name='x', cvarname='x'),
+                       OptArg(),
+                       ObjConvArg(name='src',
+                                  cvartype='Vec',
+                                  cvarname='src',
+                                  cvardefault=None,
+                                  pyclassname='PyVec')])
+gen.add_method('scale',
+               func_body=scale_body,
+               arg_list=[IntArg(name='n', cvarname='n')])
+gen.add_nb_add()
+
+module_gen = ModuleGen(modulename='vec',
+                       namespace='YM',
+                       pyclass_gen_list=[gen],
+                       shared_runtime=True)
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+# 拡張クラスも共通関数を用いる．
+assert '#include "pym/PyRuntime.h"' in source
+assert 'static const PyArgSpec arg_spec{"i|O", kwlist};' in source
+assert 'PyRuntime::parse_args(args, kwds, arg_spec,' in source
+assert 'PyRuntime::translate_exception(' in source
+# init の変換のエラーは -1 を返す．
+pos = source.index('PyRuntime::conv_arg<PyVec>(src_obj, src, ')
+assert source[pos:].split('\n')[1].strip() == 'return -1;'
+
+compile_check([gen], module_gen=module_gen, files={'Vec.h': VEC_H})
+
+gen.make_header()
+print(source)
@@ -0,0 +1,92 @@
+#! /usr/bin/env python3
+
+""" 作業領域を用いる ObjConvArg のテストプログラム
+
+:file: scratch_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen, ModuleGen, ObjConvArg
+from cxx_check import compile_check
+
+
+VEC_H = '''
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Vec
+{
+  int x{0};
+};
+
+END_NAMESPACE_YM
+'''
+
+
+def sum_body(writer):
+    writer.gen_return('PyLong_FromSize_t(vals.size())')
+
+
+def vals_arg(scratch_limit=4096):
+    return ObjConvArg(cvartype='std::vector<int>',
+                      cvarname='vals',
+                      cvardefault=None,
+                      pyclassname='PyList<int, PyInt>',
+                      scratch=True,
+                      scratch_limit=scratch_limit)
+
+
+gen = PyObjGen(classname='Vec',
+               pyname='Vec',
+               namespace='YM',
+               header_include_files=['Vec.h'],
+               source_include_files=['pym/PyVec.h',
+                                     'pym/PyList.h',
+                                     'pym/PyInt.h'])
+
+gen.add_dealloc()
+gen.add_conv('default')
+gen.add_method('sum',
+               func_body=sum_body,
+               use_val=False,
+               arg_list=[vals_arg(1024)])
+gen.add_method('sum2',
+               func_body=sum_body,
+               use_val=False,
+               arg_list=[vals_arg()])
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+# 作業領域を用いる時は PyScratch.h が一度だけインクルードされる．
+assert source.count('#include "pym/PyScratch.h"') == 1
+assert 'PyScratch<std::vector<int>> vals_scratch{1024};' in source
+assert 'auto& vals = vals_scratch.get();' in source
+
+compile_check([gen], files={'Vec.h': VEC_H})
+
+gen.make_header()
+print(source)
+
+# モジュール関数でも同様
+module_gen = ModuleGen(modulename='vec',
+                       namespace='YM',
+                       pyclass_gen_list=[gen],
+                       extra_include_files=['pym/PyList.h',
+                                            'pym/PyInt.h'])
+module_gen.add_method('sum',
+                      func_body=sum_body,
+                      arg_list=[vals_arg()])
+fout = io.StringIO()
+module_gen.make_source(fout)
+module_source = fout.getvalue()
+assert module_source.count('#include "pym/PyScratch.h"') == 1
+assert 'auto& vals = vals_scratch.get();' in module_source
+
+compile_check([gen], module_gen=module_gen, files={'Vec.h': VEC_H})
+
+print(module_source)
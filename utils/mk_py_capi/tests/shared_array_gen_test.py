@@ -0,0 +1,73 @@
+#! /usr/bin/env python3
+
+""" PyObjGen の共有メモリ用の関数のテストプログラム
+
+:file: shared_array_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen
+from cxx_check import compile_check
+
+
+# <cstring> や <cstdint> はインクルードしない．
+POINT_H = '''
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Point
+{
+  double x{0.0};
+  double y{0.0};
+};
+
+END_NAMESPACE_YM
+'''
+
+
+gen = PyObjGen(classname='Point',
+               pyname='Point',
+               namespace='YM',
+               header_include_files=['Point.h'],
+               source_include_files=['pym/PyPoint.h'])
+
+gen.add_dealloc()
+gen.add_conv('default')
+gen.add_deconv('default')
+gen.add_shared_array()
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+assert '"to_shared"' in source
+assert '"from_shared"' in source
+# 必要なヘッダは自動的にインクルードされる．
+assert '#include <cstdint>' in source
+assert '#include <cstring>' in source
+assert 'PyBUF_WRITABLE' in source
+# 読み出し専用や連続でないバッファは受け付けない．
+assert "view->readonly || !PyBuffer_IsContiguous(view, 'C')" in source
+# 範囲のチェックはあふれを起こさない形で行う．
+assert 'n > (view.len - offset) / elem_size' in source
+assert 'count > (view->len - offset) / elem_size' in source
+assert 'mPtr' in source
+
+compile_check([gen], files={'Point.h': POINT_H})
+
+gen.make_header()
+print(source)
+
+# add_shared_array() は一度しか呼べない．
+gen = PyObjGen(classname='Point',
+               pyname='Point')
+gen.add_shared_array()
+try:
+    gen.add_shared_array()
+except ValueError as err:
+    assert str(err) == 'shared_array has been already defined'
+else:
+    assert False
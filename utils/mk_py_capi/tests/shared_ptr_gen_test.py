@@ -0,0 +1,68 @@
+#! /usr/bin/env python3
+
+""" PyObjGen の storage='shared_ptr' のテストプログラム
+
+:file: shared_ptr_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen
+from cxx_check import compile_check
+
+
+VEC_H = '''
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Vec
+{
+  int x{0};
+  Vec& operator+=(const Vec& r) { x += r.x; return *this; }
+  Vec operator+(const Vec& r) const { return Vec{x + r.x}; }
+};
+
+END_NAMESPACE_YM
+'''
+
+
+def clear_body(writer):
+    writer.gen_assign('val.x', '0')
+    writer.gen_return_py_none()
+
+
+gen = PyObjGen(classname='Vec',
+               pyname='Vec',
+               namespace='YM',
+               storage='shared_ptr',
+               header_include_files=['Vec.h', '<memory>'],
+               source_include_files=['pym/PyVec.h'])
+
+gen.add_dealloc()
+gen.add_conv('default')
+gen.add_deconv('default')
+gen.add_nb_add()
+gen.add_nb_inplace_add()
+gen.add_method('clear',
+               func_body=clear_body,
+               mutator=True)
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+# 外部から渡された値は const の可能性があるので変更時に複製する．
+assert 'bool mOwned;' in source
+assert 'my_obj->mOwned = false;' in source
+assert 'if ( !my_obj->mOwned || my_obj->mVal.use_count() > 1 ) {' in source
+# 自分で作った値は複製しなくてよい．
+assert 'my_obj->mOwned = true;' in source
+# 変更する関数は _get_mutable_ref() を用いる．
+assert 'auto& val = PyVec::_get_mutable_ref(self);' in source
+
+compile_check([gen], files={'Vec.h': VEC_H})
+
+gen.make_header()
+print(source)
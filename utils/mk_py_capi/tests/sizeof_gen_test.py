@@ -0,0 +1,86 @@
+#! /usr/bin/env python3
+
+""" PyObjGen の __sizeof__() と tracemalloc への報告のテストプログラム
+
+:file: sizeof_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen
+from cxx_check import compile_check
+
+
+BLOB_H = '''
+#include "ym_config.h"
+#include <vector>
+
+BEGIN_NAMESPACE_YM
+
+struct Blob
+{
+  std::vector<double> data;
+};
+
+END_NAMESPACE_YM
+'''
+
+
+def heap_size_body(writer):
+    writer.gen_return('val.data.capacity() * sizeof(double)')
+
+
+gen = PyObjGen(classname='Blob',
+               pyname='Blob',
+               namespace='YM',
+               header_include_files=['Blob.h'],
+               source_include_files=['pym/PyBlob.h'])
+
+gen.add_dealloc()
+gen.add_conv('default')
+gen.add_sizeof(heap_size_body, trace_domain=12345)
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+assert '"__sizeof__"' in source
+assert 'size += static_cast<Py_ssize_t>(heap_size(val));' in source
+# 生成時と開放時に tracemalloc に報告する．
+assert 'PyTraceMalloc_Track(12345, ' in source
+assert 'PyTraceMalloc_Untrack(12345, ' in source
+assert '#include <cstdint>' in source
+
+compile_check([gen], files={'Blob.h': BLOB_H})
+
+gen.make_header()
+print(source)
+
+# trace_domain を指定しない場合は報告しない．
+gen = PyObjGen(classname='Blob',
+               pyname='Blob',
+               namespace='YM',
+               header_include_files=['Blob.h'],
+               source_include_files=['pym/PyBlob.h'])
+
+gen.add_dealloc()
+gen.add_conv('default')
+gen.add_sizeof(heap_size_body)
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+assert '"__sizeof__"' in source
+assert 'PyTraceMalloc' not in source
+
+compile_check([gen], files={'Blob.h': BLOB_H})
+
+# add_sizeof() は一度しか呼べない．
+try:
+    gen.add_sizeof(heap_size_body)
+except ValueError as err:
+    assert str(err) == 'sizeof has been already defined'
+else:
+    assert False
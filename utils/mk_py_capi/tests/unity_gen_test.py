@@ -0,0 +1,97 @@
+#! /usr/bin/env python3
+
+""" ModuleGen.make_all() の unity ビルドのテストプログラム
+
+:file: unity_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import os
+import tempfile
+from mk_py_capi import PyObjGen, ModuleGen
+from cxx_check import can_compile, compile_files, make_ym_config, write_file
+
+
+SHAPE_H = '''
+#pragma once
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Point
+{
+  int x{0};
+};
+
+struct Size
+{
+  int w{0};
+};
+
+END_NAMESPACE_YM
+'''
+
+
+def make_gen(classname, member):
+    def clear_body(writer):
+        writer.gen_assign(f'val.{member}', '0')
+        writer.gen_return_py_none()
+
+    gen = PyObjGen(classname=classname,
+                   pyname=classname,
+                   namespace='YM',
+                   header_include_files=['Shape.h'],
+                   source_include_files=[f'pym/Py{classname}.h'])
+    gen.add_dealloc()
+    gen.add_conv('default')
+    gen.add_deconv('default')
+    # 同じ名前の関数を定義する．
+    gen.add_method('clear',
+                   func_body=clear_body,
+                   mutator=True)
+    return gen
+
+
+gen_list = [make_gen('Point', 'x'), make_gen('Size', 'w')]
+module_gen = ModuleGen(modulename='shape',
+                       namespace='YM',
+                       pyclass_gen_list=gen_list)
+
+with tempfile.TemporaryDirectory() as dirname:
+    include_dir = os.path.join(dirname, 'pym')
+    os.makedirs(include_dir)
+    module_gen.make_all(include_dir=include_dir,
+                        source_dir=dirname,
+                        unity_batch=2)
+    assert sorted(os.listdir(dirname)) == ['PyPoint.cc', 'PySize.cc',
+                                           'pym',
+                                           'shape_module.cc',
+                                           'shape_unity_0.cc']
+    assert sorted(os.listdir(include_dir)) == ['PyPoint.h', 'PySize.h',
+                                               'shape.h', 'shape_pch.h']
+    with open(os.path.join(dirname, 'shape_unity_0.cc'), 'rt') as fin:
+        unity_source = fin.read()
+    assert '#include "shape_pch.h"' in unity_source
+    assert '#include "PyPoint.cc"' in unity_source
+    assert '#include "PySize.cc"' in unity_source
+    with open(os.path.join(dirname, 'PyPoint.cc'), 'rt') as fin:
+        source = fin.read()
+    # 無名名前空間の代わりにクラスごとの名前空間を用いる．
+    assert 'namespace nsPyPoint {' in source
+
+    if can_compile():
+        make_ym_config(dirname)
+        write_file(dirname, 'Shape.h', SHAPE_H)
+        # 同じ翻訳単位に入れても名前が衝突しない．
+        compile_files(dirname, ['shape_module.cc', 'shape_unity_0.cc'],
+                      flags=['-Ipym'])
+
+    print(unity_source)
+
+try:
+    module_gen.make_all(include_dir='.', source_dir='.', unity_batch=0)
+except ValueError as err:
+    assert str(err) == '0: unity_batch should be positive'
+else:
+    assert False
@@ -0,0 +1,109 @@
+#! /usr/bin/env python3
+
+""" PyObjGen の可変長オブジェクトのテストプログラム
+
+:file: varobj_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen
+from cxx_check import compile_check
+
+
+ROW_H = '''
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Row
+{
+  SizeType mSize{0};
+  SizeType size() const { return mSize; }
+};
+
+END_NAMESPACE_YM
+'''
+
+
+def conv_body(writer):
+    gen.gen_alloc_code(writer, varname='obj', size='val.size()')
+    gen.gen_obj_conv(writer, objname='obj', varname='my_obj')
+    gen.gen_val_construct(writer, objname='my_obj', expr='val')
+    writer.gen_return('obj')
+
+
+def heap_size_body(writer):
+    writer.gen_return('0')
+
+
+gen = PyObjGen(classname='Row',
+               pyname='Row',
+               namespace='YM',
+               item_type='double',
+               header_include_files=['Row.h'],
+               source_include_files=['pym/PyRow.h'])
+
+gen.add_dealloc()
+gen.add_conv(conv_body)
+gen.add_sizeof(heap_size_body)
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+# 要素は tp_basicsize の位置に置かれる(offsetof は用いない)．
+assert 'offsetof' not in source
+assert '(sizeof(Row_Object) + alignof(double) - 1) / alignof(double) * alignof(double)' in source
+assert 'Py_TYPE(obj)->tp_basicsize' in source
+assert 'Py_SIZE(self) * Py_TYPE(self)->tp_itemsize' in source
+assert 'static_assert(std::is_trivially_destructible_v<double>)' in source
+
+fout = io.StringIO()
+gen.make_header(fout)
+header = fout.getvalue()
+assert '#include <span>' in header
+assert 'std::span<double>' in header
+
+compile_check([gen], files={'Row.h': ROW_H})
+
+print(header)
+print(source)
+
+# 可変長オブジェクトではデフォルトの Conv は使えない．
+gen = PyObjGen(classname='Row',
+               pyname='Row',
+               item_type='double')
+try:
+    gen.add_conv('default')
+except ValueError as err:
+    assert str(err) == 'default Conv is not available for var-sized objects'
+else:
+    assert False
+
+# 要素は mVal に含まれないので mVal だけから値を作る関数は使えない．
+def add_copy(gen):
+    gen.add_copy()
+
+def add_pickle(gen):
+    gen.add_pickle(serialize='serialize',
+                   deserialize='deserialize')
+
+def add_view(gen):
+    gen.add_view()
+
+for add_func, name in ((add_copy, 'add_copy()'),
+                       (add_pickle, 'add_pickle()'),
+                       (add_view, 'add_view()')):
+    gen = PyObjGen(classname='Row',
+                   pyname='Row',
+                   item_type='double')
+    gen.add_conv(conv_body)
+    add_func(gen)
+    try:
+        gen.make_source(io.StringIO())
+    except ValueError as err:
+        assert str(err) == f'{name} can not be used with var-sized objects', str(err)
+    else:
+        assert False
@@ -0,0 +1,52 @@
+#! /usr/bin/env python3
+
+""" PyObjGen のビューオブジェクトのテストプログラム
+
+:file: view_gen_test.py
+:author: Yusuke Matsunaga (松永 裕介)
+:copyright: Copyright (C) 2025 Yusuke Matsunaga, All rights reserved.
+"""
+
+import io
+from mk_py_capi import PyObjGen
+from cxx_check import compile_check
+
+
+VEC_H = '''
+#include "ym_config.h"
+
+BEGIN_NAMESPACE_YM
+
+struct Vec
+{
+  int x{0};
+  Vec& operator+=(const Vec& r) { x += r.x; return *this; }
+  Vec operator+(const Vec& r) const { return Vec{x + r.x}; }
+};
+
+END_NAMESPACE_YM
+'''
+
+
+gen = PyObjGen(classname='Vec',
+               pyname='Vec',
+               namespace='YM',
+               header_include_files=['Vec.h'],
+               source_include_files=['pym/PyVec.h'])
+
+gen.add_dealloc()
+gen.add_conv('default')
+gen.add_nb_add(reuse_temp=True)
+gen.add_view()
+
+fout = io.StringIO()
+gen.make_source(fout)
+source = fout.getvalue()
+
+# ビューオブジェクトは一時オブジェクトであっても再利用されない．
+assert 'reinterpret_cast<Vec_Object*>(obj)->mPtr != nullptr' in source
+
+compile_check([gen], files={'Vec.h': VEC_H})
+
+gen.make_header()
+print(source)